@@ -7,8 +7,9 @@ into a Neo4j graph database.
 
 from .etl import YFinanceManager, FinancialDataETL, FinancialETLPipeline, NewsAnalyzer, GroqAnalyzer
 from .database import Neo4jDatabase
+from .async_database import AsyncNeo4jDatabase
 from .text_processor import TextProcessor
 
 __version__ = '1.0.0'
 __all__ = ['YFinanceManager', 'FinancialDataETL', 'FinancialETLPipeline', 
-           'Neo4jDatabase', 'TextProcessor', 'NewsAnalyzer', 'GroqAnalyzer']
\ No newline at end of file
+           'Neo4jDatabase', 'AsyncNeo4jDatabase', 'TextProcessor', 'NewsAnalyzer', 'GroqAnalyzer']
\ No newline at end of file
@@ -0,0 +1,462 @@
+"""
+Asyncio client for the knowledge graph.
+
+AsyncNeo4jDatabase has the operations of Neo4jDatabase (``create_company_node``,
+``store_news``, ``store_document``, ...) as coroutines on the driver's async API.
+Both clients run the Cypher of ``graph_queries`` and build their parameters with
+the same helpers. Writes of many tickers can be in flight on one event loop,
+each borrowing a connection from the driver's pool while it waits on the server,
+instead of occupying a worker thread:
+
+    async with AsyncNeo4jDatabase(uri, user, password) as db:
+        await asyncio.gather(*(db.store_news(ticker, news[ticker]) for ticker in news))
+
+The driver is bound to the event loop it was created on, so create one client
+per loop.
+"""
+
+import logging
+import pandas as pd
+from neo4j import AsyncGraphDatabase
+from .database import Neo4jDatabase, QueryResult, UPSERT_BATCH_SIZE, UPSERT_KEYS, STATEMENT_LABELS
+from .graph_queries import (
+    SCHEMA_STATEMENTS, PRICE_TICKER_BACKFILL_QUERY, CONNECTION_TEST_QUERY, COMPANY_QUERY,
+    PRICE_UPSERT_QUERY, INDICATOR_ROWS_QUERY, LATEST_INDICATORS_QUERY, FINANCIAL_RATIOS_QUERY,
+    FILING_UPSERT_QUERY, NEWS_UPSERT_QUERY, REPORT_QUERY, TEXT_CHUNKS_QUERY, SECTOR_QUERY,
+    COMPANY_SECTOR_QUERY, SECTOR_REPORT_QUERY, COMPANIES_BY_SECTOR_QUERY, ANALYSIS_QUERY,
+    SENTIMENT_QUERY, MARKET_RELATIONSHIP_QUERY, PEER_COMPARISON_QUERY, COMPANY_BY_TICKER_QUERY,
+    SEMANTIC_SEARCH_QUERY, DOCUMENT_QUERY, TRANSCRIPT_QUERY, TRANSCRIPT_SEGMENTS_QUERY,
+    TRANSCRIPT_SEGMENTS_READ_QUERY
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncNeo4jDatabase:
+    """
+    Asyncio client for the knowledge graph of the financial data ETL pipeline.
+
+    Statements run in managed transactions (``session.execute_write`` and
+    ``session.execute_read``) that the driver retries on transient errors, as
+    in Neo4jDatabase. Unlike Neo4jDatabase, the constructor does not connect:
+    ``await connect()`` or use the client as an async context manager.
+    """
+
+    def __init__(self, uri=None, user=None, password=None, database=None,
+                 max_connection_pool_size=50, max_connection_lifetime=3600,
+                 connection_timeout=30, connection_acquisition_timeout=60,
+                 max_transaction_retry_time=30, fetch_size=1000):
+        """
+        Initialize the client.
+
+        Args:
+            uri: Bolt or neo4j URI of the server
+            user: User name
+            password: Password
+            database: Database to use, None for the server's default database
+            max_connection_pool_size: Maximum number of pooled connections per server;
+                bounds the number of operations in flight at once
+            max_connection_lifetime: Seconds after which pooled connections are replaced
+            connection_timeout: Seconds to wait for a new connection to be established
+            connection_acquisition_timeout: Seconds to wait for a free pooled connection
+            max_transaction_retry_time: Seconds a managed transaction is retried for
+                after transient errors
+            fetch_size: Records fetched per round trip when reading results
+        """
+        self.uri = uri
+        self.user = user
+        self.password = password
+        self.database = database
+        self.driver_config = {
+            "max_connection_pool_size": max_connection_pool_size,
+            "max_connection_lifetime": max_connection_lifetime,
+            "connection_timeout": connection_timeout,
+            "connection_acquisition_timeout": connection_acquisition_timeout,
+            "max_transaction_retry_time": max_transaction_retry_time,
+            "fetch_size": fetch_size
+        }
+        self.driver = None
+
+    async def __aenter__(self):
+        if not await self.connect():
+            raise ConnectionError(f"Could not connect to Neo4j at {self.uri}")
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+        return False
+
+    async def connect(self):
+        """Create a connection to Neo4j and make sure the schema exists."""
+        try:
+            self.driver = AsyncGraphDatabase.driver(self.uri, auth=(self.user, self.password), **self.driver_config)
+            for statement in SCHEMA_STATEMENTS:
+                await self.write_query(statement)
+            await self.ensure_upsert_constraints()
+            logger.info("Neo4j connection established and schema initialized")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to connect to Neo4j: {e}")
+            if self.driver:
+                await self.driver.close()
+            self.driver = None
+            return False
+
+    async def ensure_upsert_constraints(self):
+        """Create the uniqueness constraints backing the natural keys of the upserts."""
+        async with self.session() as session:
+            result = await session.run(PRICE_TICKER_BACKFILL_QUERY)
+            await result.consume()
+
+        for label, (name, keys) in UPSERT_KEYS.items():
+            properties = ", ".join(f"n.{key}" for key in keys)
+            try:
+                await self.write_query(
+                    f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE ({properties}) IS UNIQUE"
+                )
+            except Exception as e:
+                logger.warning(f"Could not create constraint {name}, indexing instead: {e}")
+                await self.write_query(f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON ({properties})")
+
+    async def close(self):
+        """Close the Neo4j connection."""
+        if self.driver:
+            await self.driver.close()
+            self.driver = None
+            logger.info("Neo4j connection closed")
+
+    async def verify_connection(self):
+        """Verify that the connection to Neo4j is working."""
+        if not self.driver:
+            logger.error("Neo4j driver is not initialized")
+            return False
+
+        try:
+            message = (await self.read_query(CONNECTION_TEST_QUERY)).single()["message"]
+            logger.info(f"Neo4j connection test: {message}")
+            return True
+        except Exception as e:
+            logger.error(f"Neo4j connection test failed: {e}")
+            return False
+
+    def session(self):
+        """Open an async session on the configured database."""
+        if self.database:
+            return self.driver.session(database=self.database)
+        return self.driver.session()
+
+    async def execute_write(self, work, *args, **kwargs):
+        """
+        Await ``work(tx, *args, **kwargs)`` in a managed write transaction.
+
+        The driver retries the whole coroutine function on transient errors, so
+        ``work`` must not have side effects outside the transaction.
+        """
+        async with self.session() as session:
+            return await session.execute_write(work, *args, **kwargs)
+
+    async def execute_read(self, work, *args, **kwargs):
+        """Await ``work(tx, *args, **kwargs)`` in a managed read transaction."""
+        async with self.session() as session:
+            return await session.execute_read(work, *args, **kwargs)
+
+    @staticmethod
+    async def _run_statements(tx, statements):
+        """Run (query, params) pairs in a transaction and buffer their results."""
+        results = []
+        for query, params in statements:
+            result = await tx.run(query, params or {})
+            records = [record async for record in result]
+            results.append(QueryResult(records, await result.consume()))
+        return results
+
+    async def run_transaction(self, statements, read=False):
+        """
+        Run several Cypher statements in one managed transaction.
+
+        Args:
+            statements: Queries, or (query, params) pairs, in execution order
+            read: Run as a read transaction (routed to readers in a cluster)
+
+        Returns:
+            list: A QueryResult per statement
+        """
+        statements = [
+            (statement, None) if isinstance(statement, str) else statement
+            for statement in statements
+        ]
+        try:
+            if read:
+                return await self.execute_read(self._run_statements, statements)
+            return await self.execute_write(self._run_statements, statements)
+        except Exception as e:
+            logger.error(f"Transaction failed: {e}")
+            for query, params in statements:
+                logger.error(f"Query: {query}")
+                logger.error(f"Params: {params}")
+            raise
+
+    async def run_query(self, query, params=None):
+        """Run a Cypher query in its own managed write transaction and get its QueryResult."""
+        return await self.write_query(query, params)
+
+    async def write_query(self, query, params=None):
+        """Run a Cypher query in its own managed write transaction and get its QueryResult."""
+        return (await self.run_transaction([(query, params)]))[0]
+
+    async def read_query(self, query, params=None):
+        """Run a Cypher query in its own managed read transaction and get its QueryResult."""
+        return (await self.run_transaction([(query, params)], read=True))[0]
+
+    async def _write_batches(self, query, rows, params=None):
+        """
+        Run an ``UNWIND $rows ...`` query in batches of UPSERT_BATCH_SIZE rows.
+
+        Returns:
+            tuple: Number of rows written and of nodes created over all batches
+        """
+        written = created = 0
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            result = await self.write_query(query, {**(params or {}), "rows": rows[start:start + UPSERT_BATCH_SIZE]})
+            written += result.single()["rows"]
+            created += result.consume().counters.nodes_created
+        return written, created
+
+    async def _upsert(self, query, rows, params=None):
+        """
+        Run an ``UNWIND $rows ... MERGE`` query that MERGEs one node per row in batches.
+
+        Returns:
+            dict: Number of nodes "created" and "matched" by the rows
+        """
+        written, created = await self._write_batches(query, rows, params)
+        return {"created": created, "matched": written - created}
+
+    async def create_company_node(self, ticker, company_data):
+        """Create a company node in the knowledge graph."""
+        return await self.write_query(COMPANY_QUERY, {"ticker": ticker, "properties": company_data})
+
+    async def create_stock_data_nodes(self, ticker, stock_data):
+        """
+        Upsert stock price bars as Price nodes connected to a Company.
+
+        Returns:
+            dict: Number of Price nodes created and matched, or None without data
+        """
+        if stock_data is None or stock_data.empty:
+            return None
+        return await self._upsert(PRICE_UPSERT_QUERY, Neo4jDatabase._price_rows(stock_data), {"ticker": ticker})
+
+    async def store_technical_indicators(self, ticker, indicators_data):
+        """
+        Store technical indicators on a stock's Price nodes.
+
+        Accepts the same inputs as Neo4jDatabase.store_technical_indicators.
+
+        Returns:
+            int: Number of Price nodes updated, or None without data
+        """
+        if isinstance(indicators_data, dict):
+            if isinstance(indicators_data.get("series"), pd.DataFrame):
+                return await self.store_technical_indicators(ticker, indicators_data["series"])
+            date, indicators = Neo4jDatabase._snapshot_indicators(indicators_data)
+            if not indicators:
+                return None
+            if date:
+                rows = [{"date": date, "indicators": indicators}]
+                return (await self._write_batches(INDICATOR_ROWS_QUERY, rows, {"ticker": ticker}))[0]
+            result = await self.write_query(LATEST_INDICATORS_QUERY, {"ticker": ticker, "indicators": indicators})
+            return result.single()["rows"]
+        if indicators_data is None or indicators_data.empty:
+            return None
+
+        rows = Neo4jDatabase._indicator_rows(indicators_data)
+        return (await self._write_batches(INDICATOR_ROWS_QUERY, rows, {"ticker": ticker}))[0]
+
+    async def store_financial_statements(self, ticker, statements):
+        """
+        Upsert financial statement dataframes, one node per period keyed by (ticker, date).
+
+        Returns:
+            dict: Nodes created and matched per statement label, or None without statements
+        """
+        if statements is None:
+            return None
+
+        counts = {}
+        for key, statement_type in STATEMENT_LABELS.items():
+            df = statements.get(key)
+            if df is not None and not df.empty:
+                counts[statement_type] = await self._upsert(
+                    Neo4jDatabase._statement_query(statement_type), Neo4jDatabase._statement_rows(df),
+                    {"ticker": ticker}
+                )
+        return counts
+
+    async def store_financial_ratios(self, ticker, ratios):
+        """Store financial ratios for a company."""
+        if not ratios:
+            return None
+        await self.write_query(FINANCIAL_RATIOS_QUERY, {"ticker": ticker, "ratios": ratios})
+        return True
+
+    async def store_company_filings(self, ticker, filings):
+        """
+        Upsert SEC/regulatory filings, keyed by accession number.
+
+        Returns:
+            dict: Number of Filing nodes created and matched, or None without filings
+        """
+        if not filings:
+            return None
+        return await self._upsert(FILING_UPSERT_QUERY, Neo4jDatabase._filing_rows(ticker, filings), {"ticker": ticker})
+
+    async def store_news(self, ticker, news_items):
+        """
+        Upsert news items for a company, keyed by a hash of their link.
+
+        Returns:
+            dict: Number of News nodes created and matched, or None without items
+        """
+        if not news_items:
+            return None
+        return await self._upsert(NEWS_UPSERT_QUERY, Neo4jDatabase._news_rows(news_items), {"ticker": ticker})
+
+    async def store_report(self, company_name, report):
+        """Store a company report with text content."""
+        if not report:
+            return None
+        await self.write_query(REPORT_QUERY, Neo4jDatabase._report_params(company_name, report))
+        return True
+
+    async def store_text_chunks(self, source_id, source_type, chunks):
+        """Store text chunks for semantic search and retrieval."""
+        if not chunks:
+            return None
+        await self.write_query(TEXT_CHUNKS_QUERY, {"source_id": source_id, "source_label": source_type, "chunks": chunks})
+        return True
+
+    async def create_sector_node(self, sector_name, sector_data):
+        """Create a sector node in the knowledge graph."""
+        return await self.write_query(SECTOR_QUERY, {"sector_name": sector_name, "properties": sector_data})
+
+    async def connect_company_to_sector(self, ticker, sector_name):
+        """Connect a company to its sector."""
+        return await self.write_query(COMPANY_SECTOR_QUERY, {"ticker": ticker, "sector_name": sector_name})
+
+    async def store_sector_report(self, sector_name, report):
+        """Store a sector analysis report."""
+        if not report:
+            return None
+        await self.write_query(SECTOR_REPORT_QUERY, Neo4jDatabase._sector_report_params(sector_name, report))
+        return True
+
+    async def get_companies_by_sector(self, sector_name):
+        """
+        Get all companies belonging to a specific sector.
+
+        Returns:
+            list: List of company dictionaries with their properties
+        """
+        try:
+            result = await self.read_query(COMPANIES_BY_SECTOR_QUERY, {"sector_name": sector_name})
+            companies = [dict(record["c"]) for record in result]
+            logger.info(f"Retrieved {len(companies)} companies for sector {sector_name}")
+            return companies
+        except Exception as e:
+            logger.error(f"Error retrieving companies for sector {sector_name}: {e}")
+            return []
+
+    async def store_analysis(self, ticker, analysis_data):
+        """Store AI-generated analysis for a company."""
+        if not analysis_data:
+            return None
+        await self.write_query(ANALYSIS_QUERY, Neo4jDatabase._analysis_params(ticker, analysis_data))
+        return True
+
+    async def store_sentiment_analysis(self, ticker, sentiment_data):
+        """Store sentiment analysis results for a company."""
+        if not sentiment_data:
+            return None
+        await self.write_query(SENTIMENT_QUERY, Neo4jDatabase._sentiment_params(ticker, sentiment_data))
+        return True
+
+    async def create_market_relationship(self, ticker, related_ticker, relationship_type, properties):
+        """Create a relationship between companies in the market."""
+        params = {"ticker": ticker, "related_ticker": related_ticker, "properties": properties}
+        await self.write_query(MARKET_RELATIONSHIP_QUERY % relationship_type, params)
+        return True
+
+    async def store_peer_comparison(self, ticker, peer_data):
+        """Store peer comparison data for a company."""
+        if not peer_data or not peer_data.get('peers'):
+            return None
+
+        await self.write_query(PEER_COMPARISON_QUERY, {"ticker": ticker, "metrics": peer_data.get('metrics', {})})
+        for peer_ticker, similarity in Neo4jDatabase._peer_similarities(ticker, peer_data):
+            await self.create_market_relationship(ticker, peer_ticker, "HAS_PEER", {"similarity": similarity})
+        return True
+
+    async def get_company_by_ticker(self, ticker):
+        """Get a company node by ticker symbol."""
+        try:
+            record = (await self.read_query(COMPANY_BY_TICKER_QUERY, {"ticker": ticker})).single()
+            if record:
+                return dict(record["c"])
+            return None
+        except Exception as e:
+            logger.error(f"Error retrieving company {ticker}: {e}")
+            return None
+
+    async def semantic_search(self, query_text, limit=5):
+        """Perform semantic search on text chunks in the graph."""
+        try:
+            result = await self.read_query(SEMANTIC_SEARCH_QUERY, {"search_term": query_text, "limit": limit})
+            return [{"content": record["content"], "id": record["chunk_id"]} for record in result]
+        except Exception as e:
+            logger.error(f"Error performing semantic search: {e}")
+            return []
+
+    async def store_document(self, company_ticker, document_data):
+        """Store a document (annual report, filing, transcript) and its text chunks."""
+        try:
+            doc_id, properties = Neo4jDatabase._document_properties(company_ticker, document_data)
+            await self.write_query(DOCUMENT_QUERY, {"ticker": company_ticker, "doc_id": doc_id, "properties": properties})
+
+            # Store text chunks for semantic search if content exists
+            if document_data.get("content"):
+                chunks = Neo4jDatabase._create_text_chunks(document_data["content"], doc_id)
+                await self.store_text_chunks(doc_id, "Document", chunks)
+            return True
+        except Exception as e:
+            logger.error(f"Error storing document for {company_ticker}: {e}")
+            return False
+
+    async def store_transcript(self, company_ticker, transcript_data):
+        """Store an earnings call transcript and its speaker segments."""
+        try:
+            transcript_id, properties = Neo4jDatabase._transcript_properties(company_ticker, transcript_data)
+            await self.write_query(TRANSCRIPT_QUERY, {
+                "ticker": company_ticker,
+                "transcript_id": transcript_id,
+                "properties": properties
+            })
+
+            if transcript_data.get("segments"):
+                await self.write_query(TRANSCRIPT_SEGMENTS_QUERY, {
+                    "transcript_id": transcript_id,
+                    "segments": Neo4jDatabase._segment_rows(transcript_id, transcript_data["segments"])
+                })
+            return True
+        except Exception as e:
+            logger.error(f"Error storing transcript for {company_ticker}: {e}")
+            return False
+
+    async def get_transcript_segments(self, transcript_id):
+        """Get the segments of a transcript in speaking order."""
+        try:
+            record = (await self.read_query(TRANSCRIPT_SEGMENTS_READ_QUERY, {"transcript_id": transcript_id})).single()
+            return record["segments"] if record else []
+        except Exception as e:
+            logger.error(f"Error retrieving segments of transcript {transcript_id}: {e}")
+            return []
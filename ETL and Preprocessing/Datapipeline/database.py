@@ -1,19 +1,119 @@
 from neo4j import GraphDatabase
+import hashlib
 import logging
 import pandas as pd
 from datetime import datetime
-import uuid
+from .graph_queries import (
+    SCHEMA_STATEMENTS, PRICE_TICKER_BACKFILL_QUERY, CONNECTION_TEST_QUERY, COMPANY_QUERY,
+    PRICE_UPSERT_QUERY, INDICATOR_ROWS_QUERY, LATEST_INDICATORS_QUERY, STATEMENT_UPSERT_QUERY,
+    FINANCIAL_RATIOS_QUERY, FILING_UPSERT_QUERY, NEWS_UPSERT_QUERY, REPORT_QUERY, TEXT_CHUNKS_QUERY,
+    SECTOR_QUERY, COMPANY_SECTOR_QUERY, SECTOR_REPORT_QUERY, COMPANIES_BY_SECTOR_QUERY, ANALYSIS_QUERY,
+    SENTIMENT_QUERY, MARKET_RELATIONSHIP_QUERY, PEER_COMPARISON_QUERY, COMPANY_BY_TICKER_QUERY,
+    SEMANTIC_SEARCH_QUERY, DOCUMENT_QUERY, TRANSCRIPT_QUERY, TRANSCRIPT_SEGMENTS_QUERY,
+    TRANSCRIPT_SEGMENTS_READ_QUERY
+)
 
 logger = logging.getLogger(__name__)
 
+# Rows sent to Neo4j per UNWIND batch by the upserts
+UPSERT_BATCH_SIZE = 1000
+
+# Labels of the financial statement nodes, keyed like Price nodes by (ticker, date)
+STATEMENT_LABELS = {
+    "balance_sheet": "BalanceSheet",
+    "income_statement": "IncomeStatement",
+    "cash_flow": "CashFlow",
+    "quarterly_balance_sheet": "QuarterlyBalanceSheet",
+    "quarterly_income_statement": "QuarterlyIncomeStatement",
+    "quarterly_cash_flow": "QuarterlyCashFlow"
+}
+
+# Natural keys the upserts MERGE on: label -> (constraint name, key properties)
+UPSERT_KEYS = {
+    "Price": ("price_ticker_date", ("ticker", "date")),
+    "News": ("news_link_hash", ("link_hash",)),
+    "Filing": ("filing_accession_number", ("accession_number",)),
+    "TranscriptSegment": ("transcript_segment_id", ("id",)),
+    **{
+        label: (f"{label.lower()}_ticker_date", ("ticker", "date"))
+        for label in STATEMENT_LABELS.values()
+    }
+}
+
+class QueryResult:
+    """
+    Records and summary of a statement, fetched inside its transaction.
+    
+    Managed transactions are closed once their transaction function returns, so
+    results are buffered before that instead of being streamed lazily.
+    """
+    
+    def __init__(self, records, summary):
+        self.records = records
+        self.summary = summary
+    
+    def __iter__(self):
+        return iter(self.records)
+    
+    def __len__(self):
+        return len(self.records)
+    
+    def single(self):
+        """Get the first record, or None if the statement returned no records."""
+        return self.records[0] if self.records else None
+    
+    def data(self):
+        """Get the records as dictionaries."""
+        return [dict(record) for record in self.records]
+    
+    def consume(self):
+        """Get the result summary (counters, timings, notifications)."""
+        return self.summary
+
 class Neo4jDatabase:
-    """Class to handle Neo4j database operations for the financial data ETL pipeline."""
+    """
+    Class to handle Neo4j database operations for the financial data ETL pipeline.
+    
+    The operations run their statements in managed transactions
+    (``execute_write``/``execute_read``), which the driver retries on transient errors such as deadlocks or leader
+    switches. The instance holds one driver whose connection pool is shared by
+    all threads, so parallel batch workers borrow pooled connections instead of
+    opening their own.
+    """
     
-    def __init__(self, uri=None, user=None, password=None):
-        """Initialize the Neo4j connection."""
+    def __init__(self, uri=None, user=None, password=None, database=None,
+                 max_connection_pool_size=50, max_connection_lifetime=3600,
+                 connection_timeout=30, connection_acquisition_timeout=60,
+                 max_transaction_retry_time=30, fetch_size=1000):
+        """
+        Initialize the Neo4j connection.
+        
+        Args:
+            uri: Bolt or neo4j URI of the server
+            user: User name
+            password: Password
+            database: Database to use, None for the server's default database
+            max_connection_pool_size: Maximum number of pooled connections per server;
+                should be at least the number of concurrent writers
+            max_connection_lifetime: Seconds after which pooled connections are replaced
+            connection_timeout: Seconds to wait for a new connection to be established
+            connection_acquisition_timeout: Seconds to wait for a free pooled connection
+            max_transaction_retry_time: Seconds a managed transaction is retried for
+                after transient errors
+            fetch_size: Records fetched per round trip when reading results
+        """
         self.uri = uri
         self.user = user
         self.password = password
+        self.database = database
+        self.driver_config = {
+            "max_connection_pool_size": max_connection_pool_size,
+            "max_connection_lifetime": max_connection_lifetime,
+            "connection_timeout": connection_timeout,
+            "connection_acquisition_timeout": connection_acquisition_timeout,
+            "max_transaction_retry_time": max_transaction_retry_time,
+            "fetch_size": fetch_size
+        }
         self.driver = None
         if uri and user and password:
             self.connect()
@@ -22,34 +122,44 @@ class Neo4jDatabase:
         """Create a connection to Neo4j."""
         try:
             # Initialize the driver first
-            self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
+            self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password), **self.driver_config)
             
             # Create constraints and indexes if they don't exist
-            with self.driver.session() as session:
-                # Company constraints
-                session.run("""
-                    CREATE CONSTRAINT company_ticker IF NOT EXISTS
-                    FOR (c:Company) REQUIRE c.ticker IS UNIQUE
-                """)
-                
-                # Document constraints
-                session.run("""
-                    CREATE CONSTRAINT document_id IF NOT EXISTS
-                    FOR (d:Document) REQUIRE d.id IS UNIQUE
-                """)
-                
-                # Create indexes for better performance
-                session.run("CREATE INDEX company_sector IF NOT EXISTS FOR (c:Company) ON (c.sector)")
-                session.run("CREATE INDEX document_type IF NOT EXISTS FOR (d:Document) ON (d.type)")
-                session.run("CREATE INDEX news_date IF NOT EXISTS FOR (n:News) ON (n.date)")
-                
-                logger.info("Neo4j connection established and schema initialized")
-                return True
+            for statement in SCHEMA_STATEMENTS:
+                self.write_query(statement)
+            
+            self.ensure_upsert_constraints()
+            logger.info("Neo4j connection established and schema initialized")
+            return True
         except Exception as e:
             logger.error(f"Failed to connect to Neo4j: {e}")
+            if self.driver:
+                self.driver.close()
             self.driver = None
             return False
     
+    def ensure_upsert_constraints(self):
+        """
+        Create the uniqueness constraints backing the natural keys of the upserts.
+        
+        Price nodes stored before they carried a ticker are tagged with their
+        company's ticker first. If a constraint cannot be created (e.g. the graph
+        still holds duplicates from earlier runs), an index on the same properties
+        is created instead so that the MERGE lookups stay indexed.
+        """
+        with self.session() as session:
+            session.run(PRICE_TICKER_BACKFILL_QUERY).consume()
+        
+        for label, (name, keys) in UPSERT_KEYS.items():
+            properties = ", ".join(f"n.{key}" for key in keys)
+            try:
+                self.write_query(
+                    f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE ({properties}) IS UNIQUE"
+                )
+            except Exception as e:
+                logger.warning(f"Could not create constraint {name}, indexing instead: {e}")
+                self.write_query(f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON ({properties})")
+    
     def close(self):
         """Close the Neo4j connection."""
         if self.driver:
@@ -59,405 +169,432 @@ class Neo4jDatabase:
     
     def verify_connection(self):
         """Verify that the connection to Neo4j is working."""
+        if not self.driver:
+            logger.error("Neo4j driver is not initialized")
+            return False
+        
         try:
-            with self.driver.session() as session:
-                result = session.run("RETURN 'Connection successful' AS message")
-                message = result.single()["message"]
-                logger.info(f"Neo4j connection test: {message}")
-                return True
+            message = self.read_query(CONNECTION_TEST_QUERY).single()["message"]
+            logger.info(f"Neo4j connection test: {message}")
+            return True
         except Exception as e:
             logger.error(f"Neo4j connection test failed: {e}")
             return False
     
-    def run_query(self, query, params=None):
-        """Run a Cypher query against the Neo4j database."""
+    def session(self):
+        """Open a session on the configured database."""
+        if self.database:
+            return self.driver.session(database=self.database)
+        return self.driver.session()
+    
+    def execute_write(self, work, *args, **kwargs):
+        """
+        Run ``work(tx, *args, **kwargs)`` in a managed write transaction.
+        
+        The driver retries the whole function on transient errors, so ``work``
+        must not have side effects outside the transaction.
+        """
+        with self.session() as session:
+            return session.execute_write(work, *args, **kwargs)
+    
+    def execute_read(self, work, *args, **kwargs):
+        """Run ``work(tx, *args, **kwargs)`` in a managed read transaction."""
+        with self.session() as session:
+            return session.execute_read(work, *args, **kwargs)
+    
+    @staticmethod
+    def _run_statements(tx, statements):
+        """Run (query, params) pairs in a transaction and buffer their results."""
+        results = []
+        for query, params in statements:
+            result = tx.run(query, params or {})
+            records = list(result)
+            results.append(QueryResult(records, result.consume()))
+        return results
+    
+    def run_transaction(self, statements, read=False):
+        """
+        Run several Cypher statements in one managed transaction.
+        
+        Either all statements are committed or none; on transient errors the
+        whole transaction is retried.
+        
+        Args:
+            statements: Queries, or (query, params) pairs, in execution order
+            read: Run as a read transaction (routed to readers in a cluster)
+            
+        Returns:
+            list: A QueryResult per statement
+        """
+        statements = [
+            (statement, None) if isinstance(statement, str) else statement
+            for statement in statements
+        ]
         try:
-            with self.driver.session() as session:
-                result = session.run(query, params or {})
-                return result
+            if read:
+                return self.execute_read(self._run_statements, statements)
+            return self.execute_write(self._run_statements, statements)
         except Exception as e:
-            logger.error(f"Query execution failed: {e}")
-            logger.error(f"Query: {query}")
-            logger.error(f"Params: {params}")
+            logger.error(f"Transaction failed: {e}")
+            for query, params in statements:
+                logger.error(f"Query: {query}")
+                logger.error(f"Params: {params}")
             raise
     
+    def _write_batches(self, query, rows, params=None):
+        """
+        Run an ``UNWIND $rows ...`` query in batches of UPSERT_BATCH_SIZE rows.
+        
+        Each batch is committed in its own write transaction. The query must end
+        with ``RETURN count(*) AS rows``.
+        
+        Returns:
+            tuple: Number of rows written and of nodes created over all batches
+        """
+        written = created = 0
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            result = self.write_query(query, {**(params or {}), "rows": rows[start:start + UPSERT_BATCH_SIZE]})
+            written += result.single()["rows"]
+            created += result.consume().counters.nodes_created
+        return written, created
+    
+    def _upsert(self, query, rows, params=None):
+        """
+        Run an ``UNWIND $rows ... MERGE`` query that MERGEs one node per row in batches.
+        
+        Returns:
+            dict: Number of nodes "created" and "matched" by the rows
+        """
+        written, created = self._write_batches(query, rows, params)
+        return {"created": created, "matched": written - created}
+    
+    def run_query(self, query, params=None):
+        """
+        Run a Cypher query against the Neo4j database in its own managed write transaction.
+        
+        Returns:
+            QueryResult: The buffered records and summary of the query, readable
+                after the session is closed
+        """
+        return self.write_query(query, params)
+    
+    def write_query(self, query, params=None):
+        """
+        Run a Cypher query in its own managed write transaction.
+        
+        Returns:
+            QueryResult: The buffered records and summary of the query
+        """
+        return self.run_transaction([(query, params)])[0]
+    
+    def read_query(self, query, params=None):
+        """
+        Run a Cypher query in its own managed read transaction.
+        
+        Returns:
+            QueryResult: The buffered records and summary of the query
+        """
+        return self.run_transaction([(query, params)], read=True)[0]
+    
     def create_company_node(self, ticker, company_data):
         """Create a company node in the knowledge graph."""
-        query = """
-        MERGE (c:Company {ticker: $ticker})
-        SET c += $properties
-        RETURN c
-        """
         params = {
             "ticker": ticker,
             "properties": company_data
         }
-        return self.run_query(query, params)
+        return self.write_query(COMPANY_QUERY, params)
     
     def create_stock_data_nodes(self, ticker, stock_data):
-        """Store stock price data as Price nodes connected to a Company."""
-        # First make sure the data is in the right format
-        if stock_data is None or stock_data.empty:
-            return None
-        
-        # Reset index to make date a column
-        stock_data = stock_data.reset_index()
-        
-        # Convert to list of dictionaries for Neo4j
-        records = stock_data.to_dict('records')
-        
-        # Store each price point
-        query = """
-        MATCH (c:Company {ticker: $ticker})
-        WITH c
-        UNWIND $records AS record
-        CREATE (p:Price {
-            date: date(record.Date),
-            open: record.Open,
-            high: record.High,
-            low: record.Low,
-            close: record.Close,
-            volume: record.Volume
-        })
-        CREATE (c)-[:HAS_PRICE]->(p)
         """
+        Upsert stock price bars as Price nodes connected to a Company.
         
-        # Batch process 1000 records at a time to avoid memory issues
-        batch_size = 1000
-        for i in range(0, len(records), batch_size):
-            batch = records[i:i+batch_size]
-            params = {
-                "ticker": ticker,
-                "records": batch
-            }
-            self.run_query(query, params)
+        Bars are keyed by (ticker, date), so a bar that already exists (e.g. the
+        last bar of a previous incremental run) is updated rather than duplicated.
         
-        return True
+        Returns:
+            dict: Number of Price nodes created and matched, or None without data
+        """
+        if stock_data is None or stock_data.empty:
+            return None
+        return self._upsert(PRICE_UPSERT_QUERY, self._price_rows(stock_data), {"ticker": ticker})
+    
+    @classmethod
+    def _price_rows(cls, stock_data):
+        """Convert OHLCV bars to ``{date, open, high, low, close, volume}`` rows."""
+        columns = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+        bars = pd.DataFrame({"date": stock_data.index.strftime('%Y-%m-%d')}, index=stock_data.index)
+        for name, column in columns.items():
+            bars[name] = stock_data[column] if column in stock_data else None
+        return cls._frame_rows(bars)
+    
+    @staticmethod
+    def _frame_rows(frame):
+        """Convert a DataFrame to a list of row dicts of native Python values, with NaN as None."""
+        values = frame.astype(object).where(frame.notna(), None)
+        return values.to_dict('records')
     
     def store_technical_indicators(self, ticker, indicators_data):
-        """Store technical indicators for a stock."""
-        if indicators_data is None or indicators_data.empty:
-            return None
+        """
+        Store technical indicators on a stock's Price nodes.
         
-        # Reset index to make date a column
-        indicators_data = indicators_data.reset_index()
+        All rows are written in UNWIND batches through the (ticker, date) key of
+        the Price nodes.
         
-        # Get just the technical indicators (not price data)
-        indicator_columns = [col for col in indicators_data.columns if col not in ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
-        
-        # For each date, store the indicators
-        records = indicators_data.to_dict('records')
+        Args:
+            ticker: Company ticker symbol
+            indicators_data: Either a DataFrame of indicator series indexed by
+                date (OHLCV columns are skipped), the result of
+                ``analyze_price_history`` (its ``series`` are stored), or a
+                snapshot dict whose ``latest`` values are stored on the Price node
+                of its ``date`` (the ticker's latest Price node without one)
         
-        query = """
-        MATCH (c:Company {ticker: $ticker})-[:HAS_PRICE]->(p:Price {date: date($date)})
-        SET p += $indicators
+        Returns:
+            int: Number of Price nodes updated, or None without data
         """
+        if isinstance(indicators_data, dict):
+            if isinstance(indicators_data.get("series"), pd.DataFrame):
+                return self.store_technical_indicators(ticker, indicators_data["series"])
+            return self._store_indicator_snapshot(ticker, indicators_data)
+        if indicators_data is None or indicators_data.empty:
+            return None
+        return self._write_indicator_rows(ticker, self._indicator_rows(indicators_data))
+    
+    @classmethod
+    def _indicator_rows(cls, indicators_data):
+        """Convert a DataFrame of indicator series to ``{date, indicators}`` rows."""
+        # Get just the technical indicators (not price data)
+        indicator_columns = [col for col in indicators_data.columns if col not in ['Open', 'High', 'Low', 'Close', 'Volume']]
+        dates = pd.DatetimeIndex(indicators_data.index).strftime('%Y-%m-%d')
+        return [
+            {"date": date, "indicators": {name: value for name, value in values.items() if value is not None}}
+            for date, values in zip(dates, cls._frame_rows(indicators_data[indicator_columns]))
+        ]
+    
+    def _write_indicator_rows(self, ticker, rows):
+        """Set ``{date, indicators}`` rows on the matching Price nodes in UNWIND batches."""
+        return self._write_batches(INDICATOR_ROWS_QUERY, rows, {"ticker": ticker})[0]
+    
+    @staticmethod
+    def _snapshot_indicators(snapshot):
+        """Get the date (None for the latest bar) and the non-missing latest values of a snapshot."""
+        indicators = {
+            name: value for name, value in (snapshot.get("latest") or {}).items()
+            if value is not None and pd.notna(value)
+        }
+        date = pd.Timestamp(snapshot["date"]).strftime('%Y-%m-%d') if snapshot.get("date") else None
+        return date, indicators
+    
+    def _store_indicator_snapshot(self, ticker, snapshot):
+        """Store the latest values of an indicator snapshot on one Price node."""
+        date, indicators = self._snapshot_indicators(snapshot)
+        if not indicators:
+            return None
+        if date:
+            return self._write_indicator_rows(ticker, [{"date": date, "indicators": indicators}])
         
-        for record in records:
-            date_str = record['Date'].strftime('%Y-%m-%d')
-            indicators = {col: record[col] for col in indicator_columns if pd.notna(record[col])}
-            
-            params = {
-                "ticker": ticker,
-                "date": date_str,
-                "indicators": indicators
-            }
-            
-            self.run_query(query, params)
-        
-        return True
+        result = self.write_query(LATEST_INDICATORS_QUERY, {"ticker": ticker, "indicators": indicators})
+        return result.single()["rows"]
     
     def store_financial_statements(self, ticker, statements):
         """Store financial statement data in the knowledge graph."""
         if statements is None:
             return None
         
-        # Store balance sheet
-        bs = statements.get("balance_sheet")
-        if bs is not None and not bs.empty:
-            self._store_financial_statement(ticker, bs, "BalanceSheet")
-        
-        # Store income statement
-        is_stmt = statements.get("income_statement")
-        if is_stmt is not None and not is_stmt.empty:
-            self._store_financial_statement(ticker, is_stmt, "IncomeStatement")
-        
-        # Store cash flow
-        cf = statements.get("cash_flow")
-        if cf is not None and not cf.empty:
-            self._store_financial_statement(ticker, cf, "CashFlow")
-        
-        # Store quarterly statements
-        q_bs = statements.get("quarterly_balance_sheet")
-        if q_bs is not None and not q_bs.empty:
-            self._store_financial_statement(ticker, q_bs, "QuarterlyBalanceSheet")
-        
-        q_is = statements.get("quarterly_income_statement")
-        if q_is is not None and not q_is.empty:
-            self._store_financial_statement(ticker, q_is, "QuarterlyIncomeStatement")
-        
-        q_cf = statements.get("quarterly_cash_flow")
-        if q_cf is not None and not q_cf.empty:
-            self._store_financial_statement(ticker, q_cf, "QuarterlyCashFlow")
-        
-        return True
+        counts = {}
+        for key, statement_type in STATEMENT_LABELS.items():
+            df = statements.get(key)
+            if df is not None and not df.empty:
+                counts[statement_type] = self._store_financial_statement(ticker, df, statement_type)
+        return counts
     
     def _store_financial_statement(self, ticker, df, statement_type):
-        """Helper method to store a financial statement dataframe."""
-        # Reset the index
-        df = df.reset_index()
+        """
+        Upsert a financial statement dataframe indexed by period end date.
         
+        Each period is a node keyed by (ticker, date) whose line items are set as
+        properties, so storing a statement again updates its periods in place.
+        """
+        return self._upsert(self._statement_query(statement_type), self._statement_rows(df), {"ticker": ticker})
+    
+    @staticmethod
+    def _statement_query(statement_type):
+        """Get the upsert query of a statement node label."""
+        return STATEMENT_UPSERT_QUERY % {"label": statement_type, "relationship": f"HAS_{statement_type.upper()}"}
+    
+    @classmethod
+    def _statement_rows(cls, df):
+        """Convert a statement dataframe indexed by period end date to ``{date, items}`` rows."""
         # Convert columns to strings (Neo4j doesn't like non-string column names)
+        df = df.copy()
         df.columns = df.columns.astype(str)
+        dates = pd.DatetimeIndex(df.index).strftime('%Y-%m-%d')
         
-        # Get a list of dictionaries
-        records = []
-        for _, row in df.iterrows():
-            record = {"date": row["index"].strftime('%Y-%m-%d')}
-            for col in df.columns:
-                if col != "index" and not pd.isna(row[col]):
-                    # Convert numpy/pandas numeric types to Python native types
-                    if hasattr(row[col], 'item'):
-                        record[col] = row[col].item()
-                    else:
-                        record[col] = row[col]
-            records.append(record)
-        
-        # Create statement nodes
-        query = f"""
-        MATCH (c:Company {{ticker: $ticker}})
-        WITH c
-        UNWIND $records AS record
-        CREATE (s:{statement_type} {{date: date(record.date)}})
-        SET s += record
-        CREATE (c)-[:HAS_{statement_type.upper()}]->(s)
-        """
-        
-        params = {
-            "ticker": ticker,
-            "records": records
-        }
-        
-        self.run_query(query, params)
+        return [
+            {"date": date, "items": {item: value for item, value in items.items() if value is not None}}
+            for date, items in zip(dates, cls._frame_rows(df))
+        ]
     
     def store_financial_ratios(self, ticker, ratios):
         """Store financial ratios for a company."""
         if not ratios:
             return None
         
-        query = """
-        MATCH (c:Company {ticker: $ticker})
-        SET c.financial_ratios = $ratios
-        """
-        
         params = {
             "ticker": ticker,
             "ratios": ratios
         }
         
-        self.run_query(query, params)
+        self.write_query(FINANCIAL_RATIOS_QUERY, params)
         return True
     
     def store_company_filings(self, ticker, filings):
-        """Store SEC/regulatory filings in the knowledge graph."""
-        if not filings:
-            return None
-        
-        query = """
-        MATCH (c:Company {ticker: $ticker})
-        WITH c
-        UNWIND $filings AS filing
-        CREATE (f:Filing {
-            type: filing.type,
-            filing_date: date(filing.filing_date),
-            url: filing.url,
-            id: filing.accessionNumber
-        })
-        SET f.content = filing.content
-        CREATE (c)-[:HAS_FILING]->(f)
         """
+        Upsert SEC/regulatory filings in the knowledge graph.
         
-        # Clean the filings data
-        clean_filings = []
-        for filing in filings:
-            # Convert filing date to ISO format
-            if 'filing_date' in filing and filing['filing_date']:
-                try:
-                    date_obj = datetime.strptime(filing['filing_date'], '%Y-%m-%d')
-                    filing['filing_date'] = date_obj.strftime('%Y-%m-%d')
-                except:
-                    # If date parsing fails, use today's date
-                    filing['filing_date'] = datetime.now().strftime('%Y-%m-%d')
-            else:
-                filing['filing_date'] = datetime.now().strftime('%Y-%m-%d')
-                
-            # Make sure we have an accession number
-            if 'accessionNumber' not in filing or not filing['accessionNumber']:
-                filing['accessionNumber'] = f"filing_{len(clean_filings)}_{datetime.now().timestamp()}"
-                
-            clean_filings.append(filing)
+        Filings are keyed by accession number. A filing without one gets a key
+        derived from its ticker, type, date and URL, so that it is matched again
+        when it is stored on a later run.
         
-        params = {
-            "ticker": ticker,
-            "filings": clean_filings
-        }
-        
-        self.run_query(query, params)
-        return True
+        Returns:
+            dict: Number of Filing nodes created and matched, or None without filings
+        """
+        if not filings:
+            return None
+        return self._upsert(FILING_UPSERT_QUERY, self._filing_rows(ticker, filings), {"ticker": ticker})
+    
+    @classmethod
+    def _filing_rows(cls, ticker, filings):
+        """Convert filings to rows keyed by their accession number (or a key derived from the filing)."""
+        rows = []
+        for filing in filings:
+            # Convert filing date to ISO format, using today's date if it is missing or invalid
+            try:
+                filing_date = datetime.strptime(filing.get('filing_date') or '', '%Y-%m-%d').strftime('%Y-%m-%d')
+            except (TypeError, ValueError):
+                filing_date = datetime.now().strftime('%Y-%m-%d')
+            
+            accession_number = filing.get('accessionNumber')
+            if not accession_number:
+                accession_number = "filing_" + cls._natural_key(
+                    ticker, filing.get('type'), filing.get('filing_date'), filing.get('url'))
+            
+            rows.append({
+                "accession_number": accession_number,
+                "type": filing.get('type'),
+                "filing_date": filing_date,
+                "url": filing.get('url'),
+                "content": filing.get('content')
+            })
+        return rows
+    
+    @staticmethod
+    def _natural_key(*parts):
+        """Hash identifying values into a fixed-length key."""
+        return hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
     
     def store_news(self, ticker, news_items):
-        """Store news items for a company."""
-        if not news_items:
-            return None
-        
-        query = """
-        MATCH (c:Company {ticker: $ticker})
-        WITH c
-        UNWIND $news AS item
-        CREATE (n:News {
-            headline: item.headline,
-            link: item.link,
-            id: item.link
-        })
-        SET n.date = CASE WHEN item.date IS NOT NULL THEN date(item.date) ELSE null END,
-            n.time = item.time,
-            n.sentiment = item.sentiment
-        CREATE (c)-[:HAS_NEWS]->(n)
         """
+        Upsert news items for a company.
         
-        # Clean the news items
-        clean_news = []
-        for item in news_items:
-            # Convert date to ISO format if it exists
-            if 'date' in item and item['date']:
-                try:
-                    date_obj = datetime.strptime(item['date'], '%Y-%m-%d')
-                    item['date'] = date_obj.strftime('%Y-%m-%d')
-                except:
-                    # If date parsing fails, set to null
-                    item['date'] = None
-            else:
-                item['date'] = None
-                
-            clean_news.append(item)
-        
-        params = {
-            "ticker": ticker,
-            "news": clean_news
-        }
+        Articles are keyed by a hash of their link (of the headline for items
+        without one), so an article seen again on a later run, or for another
+        company, is matched instead of duplicated.
         
-        self.run_query(query, params)
-        return True
+        Returns:
+            dict: Number of News nodes created and matched, or None without items
+        """
+        if not news_items:
+            return None
+        return self._upsert(NEWS_UPSERT_QUERY, self._news_rows(news_items), {"ticker": ticker})
+    
+    @classmethod
+    def _news_rows(cls, news_items):
+        """Convert news items to rows keyed by the hash of their link."""
+        rows = []
+        for item in news_items:
+            # Convert date to ISO format if it exists, otherwise set it to null
+            try:
+                date = datetime.strptime(item.get('date') or '', '%Y-%m-%d').strftime('%Y-%m-%d')
+            except (TypeError, ValueError):
+                date = None
+            
+            rows.append({
+                "link_hash": cls._natural_key(item.get('link') or item.get('headline')),
+                "headline": item.get('headline'),
+                "link": item.get('link'),
+                "date": date,
+                "time": item.get('time'),
+                "sentiment": item.get('sentiment')
+            })
+        return rows
     
     def store_report(self, company_name, report):
         """Store a company report with text content."""
         if not report:
             return None
         
-        query = """
-        MATCH (c:Company {name: $company_name})
-        WITH c
-        CREATE (r:Report {
-            title: $title,
-            url: $url,
-            type: $type,
-            id: $url
-        })
-        SET r.content = $content
-        CREATE (c)-[:HAS_REPORT]->(r)
-        """
-        
-        params = {
+        self.write_query(REPORT_QUERY, self._report_params(company_name, report))
+        return True
+    
+    @staticmethod
+    def _report_params(company_name, report):
+        """Get the parameters of REPORT_QUERY for a company report."""
+        return {
             "company_name": company_name,
             "title": report.get("title", ""),
             "url": report.get("url", ""),
             "type": report.get("type", ""),
             "content": report.get("text_content", "")
         }
-        
-        self.run_query(query, params)
-        return True
     
     def store_text_chunks(self, source_id, source_type, chunks):
         """Store text chunks for semantic search and retrieval."""
         if not chunks:
             return None
         
-        query = """
-        MATCH (s)
-        WHERE s.id = $source_id AND $source_label in labels(s)
-        WITH s
-        UNWIND $chunks AS chunk
-        CREATE (c:TextChunk {
-            content: chunk.content,
-            chunk_id: chunk.chunk_id
-        })
-        CREATE (s)-[:HAS_CHUNK]->(c)
-        """
-        
         params = {
             "source_id": source_id,
             "source_label": source_type,
             "chunks": chunks
         }
         
-        self.run_query(query, params)
+        self.write_query(TEXT_CHUNKS_QUERY, params)
         return True
     
     def create_sector_node(self, sector_name, sector_data):
         """Create a sector node in the knowledge graph."""
-        query = """
-        MERGE (s:Sector {name: $sector_name})
-        SET s += $properties
-        RETURN s
-        """
         params = {
             "sector_name": sector_name,
             "properties": sector_data
         }
-        return self.run_query(query, params)
+        return self.write_query(SECTOR_QUERY, params)
     
     def connect_company_to_sector(self, ticker, sector_name):
         """Connect a company to its sector."""
-        query = """
-        MATCH (c:Company {ticker: $ticker})
-        MATCH (s:Sector {name: $sector_name})
-        MERGE (c)-[:BELONGS_TO]->(s)
-        """
         params = {
             "ticker": ticker,
             "sector_name": sector_name
         }
-        return self.run_query(query, params)
+        return self.write_query(COMPANY_SECTOR_QUERY, params)
     
     def store_sector_report(self, sector_name, report):
         """Store a sector analysis report."""
         if not report:
             return None
         
-        query = """
-        MATCH (s:Sector {name: $sector_name})
-        WITH s
-        CREATE (r:SectorReport {
-            title: $title,
-            url: $url,
-            date: date($date),
-            id: $url
-        })
-        SET r.content = $content
-        CREATE (s)-[:HAS_REPORT]->(r)
-        """
-        
-        params = {
+        self.write_query(SECTOR_REPORT_QUERY, self._sector_report_params(sector_name, report))
+        return True
+    
+    @staticmethod
+    def _sector_report_params(sector_name, report):
+        """Get the parameters of SECTOR_REPORT_QUERY for a sector report."""
+        return {
             "sector_name": sector_name,
             "title": report.get("title", ""),
             "url": report.get("url", ""),
             "date": report.get("date", datetime.now().strftime('%Y-%m-%d')),
             "content": report.get("content", "")
         }
-        
-        self.run_query(query, params)
-        return True
     
     def get_companies_by_sector(self, sector_name):
         """
@@ -469,17 +606,12 @@ class Neo4jDatabase:
         Returns:
             list: List of company dictionaries with their properties
         """
-        query = """
-        MATCH (c:Company)-[:BELONGS_TO]->(s:Sector {name: $sector_name})
-        RETURN c
-        """
-        
         params = {
             "sector_name": sector_name
         }
         
         try:
-            result = self.run_query(query, params)
+            result = self.read_query(COMPANIES_BY_SECTOR_QUERY, params)
             companies = []
             for record in result:
                 company_node = record["c"]
@@ -496,46 +628,32 @@ class Neo4jDatabase:
         if not analysis_data:
             return None
         
-        query = """
-        MATCH (c:Company {ticker: $ticker})
-        MERGE (a:Analysis {ticker: $ticker})
-        SET a.fundamental_analysis = $fundamental_analysis,
-            a.news_impact = $news_impact,
-            a.investment_thesis = $investment_thesis,
-            a.timestamp = datetime($timestamp),
-            a.updated_at = datetime()
-        MERGE (c)-[:HAS_ANALYSIS]->(a)
-        """
-        
-        params = {
+        self.write_query(ANALYSIS_QUERY, self._analysis_params(ticker, analysis_data))
+        return True
+    
+    @staticmethod
+    def _analysis_params(ticker, analysis_data):
+        """Get the parameters of ANALYSIS_QUERY for an AI-generated analysis."""
+        return {
             "ticker": ticker,
             "fundamental_analysis": analysis_data.get('fundamental_analysis', ''),
             "news_impact": analysis_data.get('news_impact', ''),
             "investment_thesis": analysis_data.get('investment_thesis', ''),
             "timestamp": analysis_data.get('timestamp', datetime.now().isoformat())
         }
-        
-        self.run_query(query, params)
-        return True
     
     def store_sentiment_analysis(self, ticker, sentiment_data):
         """Store sentiment analysis results for a company."""
         if not sentiment_data:
             return None
         
-        query = """
-        MATCH (c:Company {ticker: $ticker})
-        MERGE (s:SentimentAnalysis {ticker: $ticker})
-        SET s.average_score = $average_score,
-            s.sentiment_volatility = $sentiment_volatility,
-            s.positive_ratio = $positive_ratio,
-            s.negative_ratio = $negative_ratio,
-            s.sentiment_trend = $sentiment_trend,
-            s.timestamp = datetime()
-        MERGE (c)-[:HAS_SENTIMENT]->(s)
-        """
-        
-        params = {
+        self.write_query(SENTIMENT_QUERY, self._sentiment_params(ticker, sentiment_data))
+        return True
+    
+    @staticmethod
+    def _sentiment_params(ticker, sentiment_data):
+        """Get the parameters of SENTIMENT_QUERY for sentiment analysis results."""
+        return {
             "ticker": ticker,
             "average_score": sentiment_data.get('average_score', 0.0),
             "sentiment_volatility": sentiment_data.get('sentiment_volatility', 0.0),
@@ -543,18 +661,10 @@ class Neo4jDatabase:
             "negative_ratio": sentiment_data.get('negative_ratio', 0.0),
             "sentiment_trend": sentiment_data.get('sentiment_trend', 'NEUTRAL')
         }
-        
-        self.run_query(query, params)
-        return True
     
     def create_market_relationship(self, ticker, related_ticker, relationship_type, properties):
         """Create a relationship between companies in the market."""
-        query = """
-        MATCH (c1:Company {ticker: $ticker})
-        MATCH (c2:Company {ticker: $related_ticker})
-        CREATE (c1)-[r:%s]->(c2)
-        SET r += $properties
-        """ % relationship_type
+        query = MARKET_RELATIONSHIP_QUERY % relationship_type
         
         params = {
             "ticker": ticker,
@@ -562,7 +672,7 @@ class Neo4jDatabase:
             "properties": properties
         }
         
-        self.run_query(query, params)
+        self.write_query(query, params)
         return True
     
     def store_peer_comparison(self, ticker, peer_data):
@@ -571,46 +681,39 @@ class Neo4jDatabase:
             return None
         
         # Store the comparison metrics
-        query = """
-        MATCH (c:Company {ticker: $ticker})
-        MERGE (p:PeerComparison {ticker: $ticker})
-        SET p.metrics = $metrics,
-            p.timestamp = datetime()
-        MERGE (c)-[:HAS_PEER_COMPARISON]->(p)
-        """
-        
         params = {
             "ticker": ticker,
             "metrics": peer_data.get('metrics', {})
         }
         
-        self.run_query(query, params)
+        self.write_query(PEER_COMPARISON_QUERY, params)
         
         # Create peer relationships
-        for peer in peer_data.get('peers', []):
-            peer_ticker = peer.get('ticker')
-            if peer_ticker and peer_ticker != ticker:
-                similarity = peer.get('similarity', 0.5)
-                self.create_market_relationship(
-                    ticker, 
-                    peer_ticker, 
-                    "HAS_PEER", 
-                    {"similarity": similarity}
-                )
+        for peer_ticker, similarity in self._peer_similarities(ticker, peer_data):
+            self.create_market_relationship(
+                ticker, 
+                peer_ticker, 
+                "HAS_PEER", 
+                {"similarity": similarity}
+            )
         
         return True
     
+    @staticmethod
+    def _peer_similarities(ticker, peer_data):
+        """Get (peer ticker, similarity) pairs of the other companies in peer comparison data."""
+        return [
+            (peer.get('ticker'), peer.get('similarity', 0.5))
+            for peer in peer_data.get('peers', [])
+            if peer.get('ticker') and peer.get('ticker') != ticker
+        ]
+    
     def get_company_by_ticker(self, ticker):
         """Get a company node by ticker symbol."""
-        query = """
-        MATCH (c:Company {ticker: $ticker})
-        RETURN c
-        """
-        
         params = {"ticker": ticker}
         
         try:
-            result = self.run_query(query, params)
+            result = self.read_query(COMPANY_BY_TICKER_QUERY, params)
             record = result.single()
             if record:
                 return dict(record["c"])
@@ -621,22 +724,14 @@ class Neo4jDatabase:
             
     def semantic_search(self, query_text, limit=5):
         """Perform semantic search on text chunks in the graph."""
-        # This is a placeholder - in a real implementation, 
-        # we would use vector embeddings or a full-text index
-        search_query = """
-        MATCH (c:TextChunk)
-        WHERE c.content CONTAINS $search_term
-        RETURN c.content AS content, c.chunk_id AS chunk_id
-        LIMIT $limit
-        """
-        
+        # SEMANTIC_SEARCH_QUERY is a placeholder substring search
         params = {
             "search_term": query_text,
             "limit": limit
         }
         
         try:
-            result = self.run_query(search_query, params)
+            result = self.read_query(SEMANTIC_SEARCH_QUERY, params)
             return [{"content": record["content"], "id": record["chunk_id"]} for record in result]
         except Exception as e:
             logger.error(f"Error performing semantic search: {e}")
@@ -651,29 +746,9 @@ class Neo4jDatabase:
             document_data (dict): Document metadata and content
         """
         try:
-            # Create unique document ID
-            doc_id = f"{company_ticker}_{document_data['type']}_{document_data.get('date', datetime.now().strftime('%Y%m%d'))}"
-            
-            query = """
-            MATCH (c:Company {ticker: $ticker})
-            MERGE (d:Document {id: $doc_id})
-            SET d += $properties
-            MERGE (c)-[:HAS_DOCUMENT]->(d)
-            """
-            
-            properties = {
-                "id": doc_id,
-                "type": document_data["type"],
-                "title": document_data.get("title", ""),
-                "date": document_data.get("date", datetime.now().strftime("%Y-%m-%d")),
-                "source": document_data.get("source", ""),
-                "url": document_data.get("url", ""),
-                "content": document_data.get("content", ""),
-                "sentiment_score": document_data.get("sentiment_score", 0.0),
-                "last_updated": datetime.now().isoformat()
-            }
+            doc_id, properties = self._document_properties(company_ticker, document_data)
             
-            self.run_query(query, {
+            self.write_query(DOCUMENT_QUERY, {
                 "ticker": company_ticker,
                 "doc_id": doc_id,
                 "properties": properties
@@ -692,6 +767,25 @@ class Neo4jDatabase:
             logger.error(f"Error storing document for {company_ticker}: {e}")
             return False
     
+    @staticmethod
+    def _document_properties(company_ticker, document_data):
+        """Get the unique ID and the node properties of a document."""
+        # Create unique document ID
+        doc_id = f"{company_ticker}_{document_data['type']}_{document_data.get('date', datetime.now().strftime('%Y%m%d'))}"
+        
+        properties = {
+            "id": doc_id,
+            "type": document_data["type"],
+            "title": document_data.get("title", ""),
+            "date": document_data.get("date", datetime.now().strftime("%Y-%m-%d")),
+            "source": document_data.get("source", ""),
+            "url": document_data.get("url", ""),
+            "content": document_data.get("content", ""),
+            "sentiment_score": document_data.get("sentiment_score", 0.0),
+            "last_updated": datetime.now().isoformat()
+        }
+        return doc_id, properties
+    
     def store_transcript(self, company_ticker, transcript_data):
         """
         Store an earnings call transcript with special processing.
@@ -701,29 +795,10 @@ class Neo4jDatabase:
             transcript_data (dict): Transcript data including speakers and segments
         """
         try:
-            # Create unique transcript ID
-            transcript_id = f"{company_ticker}_transcript_{transcript_data.get('date', datetime.now().strftime('%Y%m%d'))}"
+            transcript_id, properties = self._transcript_properties(company_ticker, transcript_data)
             
             # Store basic transcript info
-            query = """
-            MATCH (c:Company {ticker: $ticker})
-            MERGE (t:Transcript {id: $transcript_id})
-            SET t += $properties
-            MERGE (c)-[:HAS_TRANSCRIPT]->(t)
-            """
-            
-            properties = {
-                "id": transcript_id,
-                "type": "earnings_call",
-                "title": transcript_data.get("title", ""),
-                "date": transcript_data.get("date", datetime.now().strftime("%Y-%m-%d")),
-                "quarter": transcript_data.get("quarter", ""),
-                "year": transcript_data.get("year", ""),
-                "sentiment_score": transcript_data.get("sentiment_score", 0.0),
-                "last_updated": datetime.now().isoformat()
-            }
-            
-            self.run_query(query, {
+            self.write_query(TRANSCRIPT_QUERY, {
                 "ticker": company_ticker,
                 "transcript_id": transcript_id,
                 "properties": properties
@@ -731,44 +806,78 @@ class Neo4jDatabase:
             
             # Store speaker segments
             if transcript_data.get("segments"):
-                for segment in transcript_data["segments"]:
-                    self._store_transcript_segment(transcript_id, segment)
+                self._store_transcript_segments(transcript_id, transcript_data["segments"])
             
             return True
         except Exception as e:
             logger.error(f"Error storing transcript for {company_ticker}: {e}")
             return False
     
-    def _store_transcript_segment(self, transcript_id, segment):
-        """Store a transcript segment with speaker information."""
-        query = """
-        MATCH (t:Transcript {id: $transcript_id})
-        CREATE (s:TranscriptSegment {
-            id: $segment_id,
-            speaker: $speaker,
-            role: $role,
-            content: $content,
-            sentiment_score: $sentiment_score,
-            start_time: $start_time,
-            end_time: $end_time
-        })
-        CREATE (t)-[:HAS_SEGMENT]->(s)
+    @staticmethod
+    def _transcript_properties(company_ticker, transcript_data):
+        """Get the unique ID and the node properties of an earnings call transcript."""
+        # Create unique transcript ID
+        transcript_id = f"{company_ticker}_transcript_{transcript_data.get('date', datetime.now().strftime('%Y%m%d'))}"
+        
+        properties = {
+            "id": transcript_id,
+            "type": "earnings_call",
+            "title": transcript_data.get("title", ""),
+            "date": transcript_data.get("date", datetime.now().strftime("%Y-%m-%d")),
+            "quarter": transcript_data.get("quarter", ""),
+            "year": transcript_data.get("year", ""),
+            "sentiment_score": transcript_data.get("sentiment_score", 0.0),
+            "last_updated": datetime.now().isoformat()
+        }
+        return transcript_id, properties
+    
+    def _store_transcript_segments(self, transcript_id, segments):
         """
+        Store the speaker segments of a transcript in one transaction.
         
-        segment_id = f"{transcript_id}_seg_{uuid.uuid4().hex[:8]}"
-        
-        self.run_query(query, {
+        Segment IDs are derived from the transcript ID and the segment's
+        position, so storing a transcript again updates its segments in place;
+        segments beyond the new count (and any without an ordinal) are removed.
+        Consecutive segments are linked by NEXT_SEGMENT relationships.
+        """
+        self.write_query(TRANSCRIPT_SEGMENTS_QUERY, {
             "transcript_id": transcript_id,
-            "segment_id": segment_id,
-            "speaker": segment.get("speaker", "Unknown"),
-            "role": segment.get("role", "Unknown"),
-            "content": segment.get("content", ""),
-            "sentiment_score": segment.get("sentiment_score", 0.0),
-            "start_time": segment.get("start_time", ""),
-            "end_time": segment.get("end_time", "")
+            "segments": self._segment_rows(transcript_id, segments)
         })
     
-    def _create_text_chunks(self, text, doc_id, chunk_size=1000, overlap=200):
+    @staticmethod
+    def _segment_rows(transcript_id, segments):
+        """Convert transcript segments to rows with ordinal-based IDs."""
+        return [
+            {
+                "id": f"{transcript_id}_seg_{ordinal:04d}",
+                "ordinal": ordinal,
+                "speaker": segment.get("speaker", "Unknown"),
+                "role": segment.get("role", "Unknown"),
+                "content": segment.get("content", ""),
+                "sentiment_score": segment.get("sentiment_score", 0.0),
+                "start_time": segment.get("start_time", ""),
+                "end_time": segment.get("end_time", "")
+            }
+            for ordinal, segment in enumerate(segments)
+        ]
+    
+    def get_transcript_segments(self, transcript_id):
+        """
+        Get the segments of a transcript in speaking order by following its NEXT_SEGMENT chain.
+        
+        Returns:
+            list: Segment property dictionaries, empty if the transcript has no segments
+        """
+        try:
+            record = self.read_query(TRANSCRIPT_SEGMENTS_READ_QUERY, {"transcript_id": transcript_id}).single()
+            return record["segments"] if record else []
+        except Exception as e:
+            logger.error(f"Error retrieving segments of transcript {transcript_id}: {e}")
+            return []
+    
+    @staticmethod
+    def _create_text_chunks(text, doc_id, chunk_size=1000, overlap=200):
         """Create overlapping text chunks for semantic search."""
         from Datapipeline.text_processor import TextProcessor
         
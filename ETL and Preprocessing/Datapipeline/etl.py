@@ -1,8 +1,10 @@
 from bs4 import BeautifulSoup
 from nltk.tokenize import sent_tokenize
 from datetime import datetime, timedelta
-from neo4j import GraphDatabase
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict
+from collections.abc import Mapping
 from PIL import Image
 from nselib import capital_market
 from selenium import webdriver
@@ -14,7 +16,9 @@ from GoogleNews import GoogleNews
 from transformers import pipeline
 import logging
 import threading
+import multiprocessing
 import functools
+import sys
 import json
 import os
 import pandas as pd
@@ -28,7 +32,20 @@ try:
 except ImportError:
     GROQ_AVAILABLE = False
     print("Groq package not available. GROQ analysis will be disabled.")
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+from .database import Neo4jDatabase
 from .indian_ir_scraper import IndianIRScraper
+from .market_calendar import (
+    DEFAULT_TTL_POLICIES, FixedTTL, check_holiday_coverage, default_calendars, exchange_for_ticker
+)
+from .technical_indicators import (
+    analyze_price_history, IndicatorPanel, IndicatorState, snapshot as indicator_snapshot
+)
 
 # Setup logging
 logging.basicConfig(
@@ -37,50 +54,101 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-class Neo4jDatabase:
-    """Handle connection and operations for Neo4j graph database."""
-    
-    def __init__(self, uri, user, password):
-        """Initialize Neo4j connection."""
-        self.uri = uri       
-        self.user = user
-        self.password = password
-        self.driver = None
-        self.connect()
+class TextProcessor:
+    """Process text documents for embedding and knowledge graph storage."""  
+    # Placeholder for TextProcessor implementation
+
+class TokenBucket:
+    """
+    Token bucket for a single API.
     
-    def connect(self):
-        """Establish connection to Neo4j."""
-        try:
-            self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
-            logger.info("Connected to Neo4j database")
-        except Exception as e:
-            logger.error(f"Failed to connect to Neo4j database: {e}")
-            self.driver = None
+    Tokens refill continuously at ``requests_per_minute / 60`` per second up to
+    ``burst``. A caller reserves a token under the lock and then sleeps outside
+    it until the reservation is due, so waiting callers never block each other
+    and requests within the budget run concurrently.
+    """
     
-    def close(self):
-        """Close the Neo4j connection."""
-        if self.driver:
-            self.driver.close()
-            logger.info("Neo4j connection closed")
+    def __init__(self, requests_per_minute, burst):
+        """Initialize a full bucket."""
+        import time
+        self.time = time
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+        
+        # Metrics
+        self.queue_depth = 0
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
     
-    def verify_connection(self):
-        """Verify the Neo4j connection."""
-        if not self.driver:
-            logger.error("Neo4j driver is not initialized")
-            return False
+    def reserve(self):
+        """
+        Take a token, going into debt if none are available.
         
-        try:
-            with self.driver.session() as session:
-                session.run("RETURN 1")
-            logger.info("Neo4j connection verified")
-            return True
-        except Exception as e:
-            logger.error(f"Neo4j connection verification failed: {e}")
-            return False
-
-class TextProcessor:
-    """Process text documents for embedding and knowledge graph storage."""  
-    # Placeholder for TextProcessor implementation
+        Returns:
+            Seconds the caller has to wait before using its token
+        """
+        with self._lock:
+            now = self.time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait_time = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            
+            self.acquired += 1
+            if wait_time > 0:
+                self.waited += 1
+                self.queue_depth += 1
+                self.total_wait += wait_time
+                self.max_wait = max(self.max_wait, wait_time)
+            return wait_time
+    
+    def _release_waiter(self):
+        """Record that a waiting caller has been let through."""
+        with self._lock:
+            self.queue_depth -= 1
+    
+    def acquire(self):
+        """Block until a token is available. Returns the time waited in seconds."""
+        wait_time = self.reserve()
+        if wait_time > 0:
+            try:
+                self.time.sleep(wait_time)
+            finally:
+                self._release_waiter()
+        return wait_time
+    
+    async def acquire_async(self):
+        """Wait for a token without blocking the event loop. Returns the time waited."""
+        import asyncio
+        wait_time = self.reserve()
+        if wait_time > 0:
+            try:
+                await asyncio.sleep(wait_time)
+            finally:
+                self._release_waiter()
+        return wait_time
+    
+    def metrics(self):
+        """Get the bucket configuration, queue depth and wait-time statistics."""
+        with self._lock:
+            now = self.time.monotonic()
+            available = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            return {
+                "requests_per_minute": self.rate * 60,
+                "burst": self.capacity,
+                "available_tokens": max(available, 0.0),
+                "queue_depth": self.queue_depth,
+                "acquired": self.acquired,
+                "waited": self.waited,
+                "total_wait_seconds": self.total_wait,
+                "avg_wait_seconds": self.total_wait / self.waited if self.waited else 0.0,
+                "max_wait_seconds": self.max_wait
+            }
 
 class RateLimiter:
     """Handle API rate limiting and backoff strategies."""
@@ -92,26 +160,45 @@ class RateLimiter:
         self.time = time
         
         self.rate_limits = {
-            # API name: [requests_per_minute, min_interval_seconds]
-            "default": [60, 1.0],
-            "sec_edgar": [10, 0.1],  # SEC EDGAR has strict rate limiting (10 requests per second)
-            "yfinance": [2000, 0.05],  # Yahoo Finance is more permissive
-            "nse": [60, 1.0],  # NSE API
-            "bse": [60, 1.0],  # BSE API
-            "screener": [20, 3.0],  # Screener.in website
-            "moneycontrol": [20, 3.0]  # MoneyControl website
+            # API name: [requests_per_minute, burst]
+            "default": [60, 5],
+            "sec_edgar": [600, 10],  # SEC EDGAR has strict rate limiting (10 requests per second)
+            "yfinance": [2000, 20],  # Yahoo Finance is more permissive
+            "nse": [60, 5],  # NSE API
+            "bse": [60, 5],  # BSE API
+            "screener": [20, 2],  # Screener.in website
+            "moneycontrol": [20, 2]  # MoneyControl website
         }
         
-        # Keep track of last API call time
-        self.last_call_time = {}
-        
-        # Locks for thread safety
-        self.locks = {api: threading.Lock() for api in self.rate_limits}
+        # One token bucket per API
+        self.buckets = {
+            api: TokenBucket(requests_per_minute, burst)
+            for api, (requests_per_minute, burst) in self.rate_limits.items()
+        }
+    
+    def _bucket(self, api_name):
+        """Get the bucket for an API, falling back to the default limits."""
+        return self.buckets.get(api_name, self.buckets["default"])
+    
+    def acquire(self, api_name="default"):
+        """Block until a request to the API is allowed. Returns the time waited."""
+        return self._bucket(api_name).acquire()
+    
+    async def acquire_async(self, api_name="default"):
+        """Wait in an event loop until a request to the API is allowed."""
+        return await self._bucket(api_name).acquire_async()
+    
+    def metrics(self):
+        """Get queue depth and wait-time metrics for every API."""
+        return {api: bucket.metrics() for api, bucket in self.buckets.items()}
     
     def with_rate_limit(self, func, api_name="default"):
         """
         Decorator to apply rate limiting to a function.
         
+        Coroutine functions are wrapped with an async wrapper that waits
+        without blocking the event loop.
+        
         Args:
             func: The function to decorate
             api_name: The name of the API to apply rate limits for
@@ -119,29 +206,19 @@ class RateLimiter:
         Returns:
             Decorated function with rate limiting
         """
+        import asyncio
+        bucket = self._bucket(api_name)
+        
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                await bucket.acquire_async()
+                return await func(*args, **kwargs)
+            return async_wrapper
+        
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            nonlocal api_name
-            if api_name not in self.rate_limits:
-                api_name = "default"
-                
-            # Get rate limit settings
-            _, min_interval = self.rate_limits[api_name]
-            
-            with self.locks[api_name]:
-                # Check if we need to wait
-                current_time = self.time.time()
-                last_time = self.last_call_time.get(api_name, 0)
-                elapsed = current_time - last_time
-                
-                if elapsed < min_interval:
-                    wait_time = min_interval - elapsed
-                    self.time.sleep(wait_time)
-                
-                # Update last call time
-                self.last_call_time[api_name] = self.time.time()
-            
-            # Call the function
+            bucket.acquire()
             return func(*args, **kwargs)
         
         return wrapper
@@ -203,7 +280,14 @@ class ConfigManager:
             "neo4j": {
                 "uri": "bolt://localhost:7687",
                 "user": "neo4j",
-                "password": "password"
+                "password": "password",
+                "database": None,
+                "max_connection_pool_size": 50,
+                "max_connection_lifetime": 3600,
+                "connection_timeout": 30,
+                "connection_acquisition_timeout": 60,
+                "max_transaction_retry_time": 30,
+                "fetch_size": 1000
             },
             "data_sources": {
                 "sec_filings": True,
@@ -226,7 +310,21 @@ class ConfigManager:
                 "chunk_overlap": 200,
                 "max_pdf_size_mb": 50,
                 "ocr_enabled": True,
-                "max_threads": 5
+                "max_threads": 5,
+                "ticker_timeout_seconds": 600,
+                "upstream_concurrency": {
+                    "ir": 2,
+                    "yfinance": 8,
+                    "news": 4,
+                    "neo4j": 4
+                },
+                "pipeline_queue_size": 20,
+                "analysis_executor": "thread",
+                "analysis_workers": None,
+                "memory_cache_mb": 256,
+                "cache_frame_format": "parquet",
+                "cache_memory_map": False,
+                "market_holidays": {}
             }
         }
         
@@ -267,6 +365,25 @@ class ConfigManager:
             logger.error(f"Failed to save configuration to {config_file}: {e}")
             return False
     
+    def get_neo4j_credentials(self):
+        """Get Neo4j database credentials, with NEO4J_* environment variables taking precedence."""
+        neo4j_config = self.config.get("neo4j", {})
+        return {
+            "uri": os.getenv("NEO4J_URI", neo4j_config.get("uri")),
+            "user": os.getenv("NEO4J_USER", neo4j_config.get("user")),
+            "password": os.getenv("NEO4J_PASSWORD", neo4j_config.get("password"))
+        }
+    
+    def get_neo4j_driver_settings(self):
+        """Get the Neo4j database and driver settings (pool size, connection lifetime, timeouts)."""
+        settings = {
+            key: value for key, value in self.config.get("neo4j", {}).items()
+            if key not in ("uri", "user", "password")
+        }
+        if os.getenv("NEO4J_DATABASE"):
+            settings["database"] = os.getenv("NEO4J_DATABASE")
+        return settings
+    
     def get(self, key_path, default=None):
         """
         Get a configuration value using a dot-separated path.
@@ -343,33 +460,120 @@ class DataFrameEncoder(json.JSONEncoder):
         return super().default(obj)
 
 class DataCache:
-    """Cache financial data locally to reduce API calls.""" 
+    """
+    Cache financial data locally to reduce API calls.
+    
+    Scalar payloads are stored as JSON. DataFrames saved with ``save_frame``
+    are stored in a columnar format ("parquet" or Arrow IPC "arrow") when
+    pyarrow is installed, and as JSON otherwise.
+    
+    Unless a maximum age is given, entries expire according to the TTL policy
+    of their data type and the trading calendar of the ticker's exchange, so
+    prices stay valid while the market is closed and statements follow the
+    reporting cadence (see ``market_calendar``).
+    """ 
+    
+    FRAME_FORMATS = ("parquet", "arrow", "json")
     
-    def __init__(self, cache_dir="cache"):
-        """Initialize the cache.""" 
+    # Expiry of data types without a policy
+    DEFAULT_TTL = FixedTTL(24)
+    
+    def __init__(self, cache_dir="cache", frame_format="parquet", memory_map=False,
+                 ttl_policies=None, holidays=None):
+        """
+        Initialize the cache.
+        
+        Args:
+            cache_dir: Directory for cache files
+            frame_format: Storage format for DataFrames ("parquet", "arrow" or "json")
+            memory_map: Memory-map columnar files when reading them
+            ttl_policies: Optional data type -> TTL policy overrides
+            holidays: Optional exchange name -> extra holiday dates
+        """ 
         self.cache_dir = cache_dir
         os.makedirs(cache_dir, exist_ok=True)
         self.logger = logging.getLogger(__name__)
+        self.ttl_policies = {**DEFAULT_TTL_POLICIES, **(ttl_policies or {})}
+        self.calendars = default_calendars()
+        for exchange, dates in (holidays or {}).items():
+            if exchange in self.calendars:
+                self.calendars[exchange].add_holidays(dates)
+            else:
+                self.logger.warning(f"Ignoring holidays for unknown exchange {exchange}")
+        check_holiday_coverage(self.calendars)
+        
+        if frame_format not in self.FRAME_FORMATS:
+            raise ValueError(f"Unknown frame format {frame_format}; expected one of {self.FRAME_FORMATS}")
+        if frame_format != "json" and not PYARROW_AVAILABLE:
+            self.logger.warning("pyarrow not available, caching DataFrames as JSON")
+            frame_format = "json"
+        self.frame_format = frame_format
+        self.memory_map = memory_map
     
-    def _get_cache_path(self, ticker, data_type):
+    def _get_cache_path(self, ticker, data_type, extension="json"):
         """Get the cache file path for a ticker and data type.""" 
-        return os.path.join(self.cache_dir, f"{ticker}_{data_type}.json")
+        return os.path.join(self.cache_dir, f"{ticker}_{data_type}.{extension}")
+    
+    def expires_at(self, ticker, data_type, saved_at):
+        """
+        Get the time at which data saved at a given time goes stale.
+        
+        Args:
+            ticker: Ticker symbol, whose suffix selects the exchange calendar
+            data_type: Cached data type, which selects the TTL policy
+            saved_at: Timezone-aware timestamp (naive timestamps are taken as UTC)
+            
+        Returns:
+            Timezone-aware expiry timestamp in the exchange's timezone
+        """
+        calendar = self.calendars[exchange_for_ticker(ticker)]
+        policy = self.ttl_policies.get(data_type, self.DEFAULT_TTL)
+        return policy.expires_at(saved_at, calendar)
+    
+    def time_to_live(self, ticker, data_type):
+        """Get the number of seconds for which data saved now stays valid."""
+        now = pd.Timestamp.now(tz="UTC")
+        return (self.expires_at(ticker, data_type, now) - now).total_seconds()
+    
+    def remaining_ttl(self, ticker, data_type):
+        """
+        Get the number of seconds for which the cached entry stays valid.
+        
+        Returns:
+            Seconds until the entry goes stale (0 if it already is), or None if
+            nothing is cached
+        """
+        for extension in dict.fromkeys((self.frame_format, "json")):
+            cache_path = self._get_cache_path(ticker, data_type, extension)
+            if os.path.exists(cache_path):
+                saved_at = pd.Timestamp(os.path.getmtime(cache_path), unit="s", tz="UTC")
+                expires_at = self.expires_at(ticker, data_type, saved_at)
+                return max((expires_at - pd.Timestamp.now(tz="UTC")).total_seconds(), 0)
+        return None
     
-    def _is_cache_valid(self, cache_path, max_age_hours=24):
-        """Check if cached data is still valid.""" 
+    def _is_cache_valid(self, cache_path, max_age_hours=None, ticker=None, data_type=None):
+        """
+        Check if cached data is still valid.
+        
+        A given ``max_age_hours`` bounds the file age directly; otherwise the
+        TTL policy of ``data_type`` on the ticker's exchange calendar decides.
+        """ 
         if not os.path.exists(cache_path):
             return False
-            
+        
         # Check file age
-        file_time = datetime.fromtimestamp(os.path.getmtime(cache_path))
-        age = datetime.now() - file_time
-        return age.total_seconds() < max_age_hours * 3600
+        modified = os.path.getmtime(cache_path)
+        if max_age_hours is not None:
+            age = datetime.now() - datetime.fromtimestamp(modified)
+            return age.total_seconds() < max_age_hours * 3600
+        saved_at = pd.Timestamp(modified, unit="s", tz="UTC")
+        return pd.Timestamp.now(tz="UTC") < self.expires_at(ticker, data_type, saved_at)
     
-    def get(self, ticker, data_type):
+    def get(self, ticker, data_type, max_age_hours=None):
         """Get data from cache if available and valid.""" 
         cache_path = self._get_cache_path(ticker, data_type)
         
-        if self._is_cache_valid(cache_path):
+        if self._is_cache_valid(cache_path, max_age_hours, ticker, data_type):
             try:
                 with open(cache_path, 'r') as f:
                     data = json.load(f)
@@ -384,22 +588,360 @@ class DataCache:
         """Save data to cache.""" 
         cache_path = self._get_cache_path(ticker, data_type)
         try:
+            # Encoding to a string first uses the C encoder, unlike json.dump
+            serialized = json.dumps(data, cls=DataFrameEncoder)
             with open(cache_path, 'w') as f:
-                json.dump(data, f, cls=DataFrameEncoder)
+                f.write(serialized)
             self.logger.info(f"Cached {data_type} data for {ticker}")
             return True
         except Exception as e:
             self.logger.warning(f"Failed to cache data for {ticker}: {e}")
             return False
+    
+    def save_frame(self, ticker, data_type, frame):
+        """
+        Save a DataFrame to cache so that it can be restored with its labels and dtypes.
+        
+        Unlike ``save``, which flattens frames through ``DataFrameEncoder``, this keeps
+        datetime index/column labels (including their timezone) and the column dtypes.
+        """
+        if self.frame_format != "json":
+            if self._save_columnar(ticker, data_type, frame):
+                return True
+            self.logger.warning(f"Falling back to JSON for {data_type} frame of {ticker}")
+        
+        payload = {
+            "index": self._encode_labels(frame.index),
+            "columns": self._encode_labels(frame.columns),
+            "index_name": frame.index.name,
+            "dtypes": [str(dtype) for dtype in frame.dtypes],
+            "data": frame.to_numpy(dtype=object).tolist()
+        }
+        return self.save(ticker, data_type, payload)
+    
+    def get_frame(self, ticker, data_type, max_age_hours=None):
+        """Get a DataFrame saved with ``save_frame`` if available and valid."""
+        if self.frame_format != "json":
+            cache_path = self._get_cache_path(ticker, data_type, self.frame_format)
+            if self._is_cache_valid(cache_path, max_age_hours, ticker, data_type):
+                frame = self._read_columnar(cache_path)
+                if frame is not None:
+                    return frame
+        
+        # Frames written as JSON (before switching formats or as a fallback)
+        payload = self.get(ticker, data_type, max_age_hours)
+        if not isinstance(payload, dict) or "data" not in payload:
+            return None
+        
+        try:
+            frame = pd.DataFrame(
+                payload["data"],
+                index=self._decode_labels(payload["index"]),
+                columns=self._decode_labels(payload["columns"])
+            )
+            frame.index.name = payload.get("index_name")
+            for column, dtype in zip(frame.columns, payload["dtypes"]):
+                try:
+                    frame[column] = frame[column].astype(dtype)
+                except (TypeError, ValueError):
+                    pass
+            return frame
+        except Exception as e:
+            self.logger.warning(f"Failed to restore cached {data_type} frame for {ticker}: {e}")
+            return None
+    
+    def _save_columnar(self, ticker, data_type, frame):
+        """Write a DataFrame as Parquet or Arrow IPC, replacing any previous file atomically."""
+        cache_path = self._get_cache_path(ticker, data_type, self.frame_format)
+        tmp_path = f"{cache_path}.tmp"
+        try:
+            table = pa.Table.from_pandas(frame, preserve_index=True)
+            if self.frame_format == "parquet":
+                pq.write_table(table, tmp_path)
+            else:
+                with pa.OSFile(tmp_path, "wb") as sink:
+                    with pa.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+            os.replace(tmp_path, cache_path)
+            self.logger.info(f"Cached {data_type} data for {ticker} ({self.frame_format})")
+            return True
+        except Exception as e:
+            self.logger.warning(f"Failed to write {self.frame_format} cache for {ticker}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+    
+    def _read_columnar(self, cache_path):
+        """Read a Parquet or Arrow IPC cache file back into a DataFrame."""
+        try:
+            if self.frame_format == "parquet":
+                table = pq.read_table(cache_path, memory_map=self.memory_map)
+            elif self.memory_map:
+                table = pa.ipc.open_file(pa.memory_map(cache_path, "r")).read_all()
+            else:
+                with pa.OSFile(cache_path, "rb") as source:
+                    table = pa.ipc.open_file(source).read_all()
+            return table.to_pandas()
+        except Exception as e:
+            self.logger.warning(f"Failed to read cache file {cache_path}: {e}")
+            return None
+    
+    def get_watermark(self, ticker, target):
+        """
+        Get the date of the last price bar stored for a ticker.
+        
+        Args:
+            ticker: The stock ticker symbol
+            target: Where the bars are stored ("cache" or "graph")
+            
+        Returns:
+            datetime.date or None if nothing has been stored yet
+        """
+        watermarks = self.get(ticker, "watermarks", max_age_hours=float("inf")) or {}
+        value = watermarks.get(target)
+        return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+    
+    def set_watermark(self, ticker, target, bar_date):
+        """Record the date of the last price bar stored for a ticker."""
+        watermarks = self.get(ticker, "watermarks", max_age_hours=float("inf")) or {}
+        watermarks[target] = bar_date.strftime("%Y-%m-%d")
+        return self.save(ticker, "watermarks", watermarks)
+    
+    def clear_watermark(self, ticker, target):
+        """Forget the watermark for a ticker so the next sync is a full one."""
+        watermarks = self.get(ticker, "watermarks", max_age_hours=float("inf")) or {}
+        if watermarks.pop(target, None) is not None:
+            self.save(ticker, "watermarks", watermarks)
+    
+    @staticmethod
+    def _encode_labels(labels):
+        """Encode index or column labels for JSON storage."""
+        if isinstance(labels, pd.DatetimeIndex):
+            return {
+                "kind": "datetime",
+                "tz": str(labels.tz) if labels.tz is not None else None,
+                "values": [ts.isoformat() for ts in labels]
+            }
+        return {"kind": "plain", "values": list(labels)}
+    
+    @staticmethod
+    def _decode_labels(encoded):
+        """Restore index or column labels encoded by ``_encode_labels``."""
+        if encoded.get("kind") == "datetime":
+            if encoded.get("tz"):
+                return pd.to_datetime(encoded["values"], utc=True).tz_convert(encoded["tz"])
+            return pd.DatetimeIndex(pd.to_datetime(encoded["values"]))
+        return pd.Index(encoded["values"])
+
+class MemoryCache:
+    """
+    Thread-safe in-process cache with per-entry TTL and LRU eviction by memory size.
+    
+    Entries are evicted least-recently-used first once the estimated size of all
+    cached values exceeds ``max_bytes``. Hit, miss, expiry and eviction counters
+    are kept for monitoring.
+    """
+    
+    def __init__(self, max_bytes=256 * 1024 * 1024, default_ttl=300):
+        """Initialize the memory cache."""
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._lock = threading.RLock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+    
+    def get(self, key, default=None):
+        """Get a value if present and not expired, marking it as recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            
+            value, expires_at, _ = entry
+            if expires_at <= self._now():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key, value, ttl=None):
+        """Store a value with a TTL in seconds (falls back to the default TTL)."""
+        ttl = self.default_ttl if ttl is None else ttl
+        size = self._estimate_size(value)
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            
+            # A single value larger than the whole budget is never cached
+            if size > self.max_bytes:
+                return False
+            
+            self._entries[key] = (value, self._now() + ttl, size)
+            self.current_bytes += size
+            
+            while self.current_bytes > self.max_bytes and self._entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+            return True
+    
+    def invalidate(self, key):
+        """Remove a single key from the cache."""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                return True
+            return False
+    
+    def invalidate_prefix(self, prefix):
+        """Remove every tuple key whose leading elements match ``prefix``."""
+        with self._lock:
+            keys = [key for key in self._entries
+                    if isinstance(key, tuple) and key[:len(prefix)] == prefix]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+    
+    def clear(self):
+        """Remove all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+    
+    def stats(self):
+        """Get cache statistics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions
+            }
+    
+    def _remove(self, key):
+        """Remove an entry and release its size. Caller must hold the lock."""
+        _, _, size = self._entries.pop(key)
+        self.current_bytes -= size
+    
+    @staticmethod
+    def _now():
+        """Monotonic clock used for expiry."""
+        import time
+        return time.monotonic()
+    
+    @classmethod
+    def _estimate_size(cls, value):
+        """Estimate the memory footprint of a cached value in bytes."""
+        if isinstance(value, pd.DataFrame):
+            return int(value.memory_usage(deep=True).sum())
+        if isinstance(value, pd.Series):
+            return int(value.memory_usage(deep=True))
+        if isinstance(value, np.ndarray):
+            return int(value.nbytes)
+        if isinstance(value, dict):
+            return sys.getsizeof(value) + sum(
+                cls._estimate_size(k) + cls._estimate_size(v) for k, v in value.items()
+            )
+        if isinstance(value, (list, tuple, set)):
+            return sys.getsizeof(value) + sum(cls._estimate_size(v) for v in value)
+        return sys.getsizeof(value)
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into a single execution.
+    
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait for it and receive the same result (or exception). Nothing
+    is remembered once the call completes, so this complements the caches
+    rather than replacing them.
+    """
+    
+    class _Call:
+        """State of one in-flight call."""
+        
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+            self.waiters = 0
+    
+    def __init__(self):
+        """Initialize with no calls in flight."""
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+    
+    def do(self, key, func, *args, **kwargs):
+        """
+        Run ``func(*args, **kwargs)`` unless a call for ``key`` is already in flight.
+        
+        Args:
+            key: Hashable key identifying the upstream request
+            func: The function performing the request
+            
+        Returns:
+            The result of the single shared call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+                self.executed += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+    
+    def stats(self):
+        """Get the number of executed and coalesced calls."""
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executed": self.executed,
+                "coalesced": self.coalesced
+            }
 
 class DocumentScraper:
     """Scrapes financial documents from various sources.""" 
     
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, rate_limiter=None):
         """Initialize the document scraper.""" 
         self.config_manager = config_manager
         self.logger = logging.getLogger(__name__)
-        self.rate_limiter = RateLimiter()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
         self.options = None
         self.driver = None
         self.initialize_selenium()
@@ -828,252 +1370,583 @@ class DocumentScraper:
         """Clean up resources.""" 
         self.close_driver()
 
+class TickerData(Mapping):
+    """
+    Lazily fetched Yahoo Finance data for one ticker.
+    
+    Behaves like the dictionary previously returned by
+    ``YFinanceManager.get_ticker_data`` (``data["info"]``, ``data.get("history")``,
+    ``"info" in data``), but each field is only fetched when first accessed and
+    then memoized on the object.
+    """
+    
+    FIELDS = ("info", "history", "history_dict", "financials", "balance_sheet", "cash_flow", "earnings")
+    
+    def __init__(self, manager, ticker_symbol, refresh=False):
+        """
+        Initialize the lazy ticker data.
+        
+        Args:
+            manager: YFinanceManager used to load fields
+            ticker_symbol: The stock ticker symbol
+            refresh: Bypass the caches the first time each field is loaded
+        """
+        self.manager = manager
+        self.ticker_symbol = ticker_symbol
+        self.refresh = refresh
+        self._values = {}
+        self._ticker = None
+        self._lock = threading.RLock()
+    
+    def __getitem__(self, field):
+        if field not in self.FIELDS:
+            raise KeyError(field)
+        
+        with self._lock:
+            if field not in self._values:
+                if field == "history_dict":
+                    value = self.manager._history_to_dict(self["history"])
+                else:
+                    value = self.manager._load_field(
+                        self.ticker_symbol, field, self._get_ticker, refresh=self.refresh
+                    )
+                self._values[field] = value
+            return self._values[field]
+    
+    def __contains__(self, field):
+        # Membership must not trigger a fetch
+        return field in self.FIELDS
+    
+    def __iter__(self):
+        return iter(self.FIELDS)
+    
+    def __len__(self):
+        return len(self.FIELDS)
+    
+    def __repr__(self):
+        return f"TickerData({self.ticker_symbol!r}, loaded={self.loaded_fields})"
+    
+    @property
+    def loaded_fields(self):
+        """Fields that have already been fetched."""
+        return [field for field in self.FIELDS if field in self._values]
+    
+    def to_dict(self):
+        """Load every field and return a plain dictionary."""
+        return {field: self[field] for field in self.FIELDS}
+    
+    def _get_ticker(self):
+        """Create the underlying yfinance Ticker object on first use."""
+        if self._ticker is None:
+            self._ticker = self.manager.yf.Ticker(self.ticker_symbol)
+        return self._ticker
+
 class YFinanceManager:
     """Handle interactions with the Yahoo Finance API through yfinance.""" 
     
-    def __init__(self):
-        """Initialize the YFinance manager.""" 
+    # Memory cache time-to-live in seconds for each ticker field; fresh fetches
+    # follow the disk cache's market-calendar policy when there is one
+    FIELD_TTLS = {
+        "info": 15 * 60,
+        "history": 5 * 60,
+        "financials": 24 * 3600,
+        "balance_sheet": 24 * 3600,
+        "cash_flow": 24 * 3600,
+        "earnings": 24 * 3600
+    }
+    
+    # Period of price history held in the "history" field
+    HISTORY_PERIOD = "1y"
+    HISTORY_WINDOW = pd.DateOffset(years=1)
+    
+    # Ticker field name -> yfinance.Ticker attribute for financial statements
+    STATEMENT_ATTRIBUTES = {
+        "financials": "financials",
+        "balance_sheet": "balance_sheet",
+        "cash_flow": "cashflow",
+        "earnings": "earnings"
+    }
+    
+    def __init__(self, data_cache=None, memory_cache=None, rate_limiter=None):
+        """
+        Initialize the YFinance manager.
+        
+        Args:
+            data_cache: Optional on-disk DataCache used behind the memory cache
+            memory_cache: Optional MemoryCache; a 256 MB cache is created if omitted
+            rate_limiter: Optional RateLimiter shared with other components
+        """ 
         self.logger = logging.getLogger(__name__)
-        self.rate_limiter = RateLimiter()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
         # Ensure time module is available
         import time
         self.time = time
         # Initialize yfinance module
         self.yf = yf
+        self.data_cache = data_cache
+        self.memory_cache = memory_cache if memory_cache is not None else MemoryCache()
+        # Concurrent requests for the same ticker field share one upstream fetch
+        self.inflight = SingleFlight()
     
     @property
-    def _rate_limited_get(self):
-        """Get a rate-limited version of the ticker data fetching function.""" 
-        return self.rate_limiter.with_rate_limit(self._get_ticker_data, "yfinance")
+    def _rate_limited_fetch(self):
+        """Get a rate-limited version of the field fetching function.""" 
+        return self.rate_limiter.with_rate_limit(self._fetch_field, "yfinance")
     
-    def _get_ticker_data(self, ticker_symbol):
+    def _fetch_field(self, ticker, field):
         """
-        Fetch data for a ticker symbol directly from yfinance.
+        Fetch a single field directly from yfinance.
         
         Args:
-            ticker_symbol: The stock ticker symbol
+            ticker: A yfinance Ticker object
+            field: One of the keys of FIELD_TTLS
             
         Returns:
-            Dictionary with ticker data or None if failed
+            The field value (statements are converted to dictionaries)
         """
+        if field == "info":
+            return ticker.info
+        if field == "history":
+            return ticker.history(period=self.HISTORY_PERIOD)
+        
+        # Get additional data if available
         try:
-            ticker = self.yf.Ticker(ticker_symbol)
-            
-            # Get basic info
-            info = ticker.info
-            
-            # Get historical data
-            history = ticker.history(period="1y")
-            
-            # Get additional data if available
-            try:
-                financials = ticker.financials.to_dict() if hasattr(ticker, 'financials') else {}
-            except:
-                financials = {}
-                
-            try:
-                balance_sheet = ticker.balance_sheet.to_dict() if hasattr(ticker, 'balance_sheet') else {}
-            except:
-                balance_sheet = {}
-                
-            try:
-                cash_flow = ticker.cashflow.to_dict() if hasattr(ticker, 'cashflow') else {}
-            except:
-                cash_flow = {}
-                
-            try:
-                earnings = ticker.earnings.to_dict() if hasattr(ticker, 'earnings') else {}
-            except:
-                earnings = {}
-            
-            # Convert pandas DataFrames to dictionaries
-            if not history.empty:
-                history_dict = history.to_dict('index')
-                # Convert index datetime objects to strings
-                history_dict = {str(date): values for date, values in history_dict.items()}
-            else:
-                history_dict = {}
-            
-            return {
-                "info": info,
-                "history": history,
-                "history_dict": history_dict,
-                "financials": financials,
-                "balance_sheet": balance_sheet,
-                "cash_flow": cash_flow,
-                "earnings": earnings
-            }
-        except Exception as e:
-            self.logger.error(f"Error fetching data for {ticker_symbol}: {e}")
-            return None
+            statement = getattr(ticker, self.STATEMENT_ATTRIBUTES[field], None)
+            return statement.to_dict() if statement is not None else {}
+        except:
+            return {}
+    
+    @staticmethod
+    def _history_to_dict(history):
+        """Convert a price history DataFrame to a dictionary keyed by date string."""
+        if history is None or history.empty:
+            return {}
+        # Convert index datetime objects to strings
+        return {str(date): values for date, values in history.to_dict('index').items()}
     
-    def get_ticker_data(self, ticker_symbol):
+    def get_ticker_data(self, ticker_symbol, refresh=False, prefetch=("info",)):
         """
-        Get data for a ticker symbol with rate limiting.
+        Get data for a ticker symbol as a lazily loaded TickerData mapping.
+        
+        Each field is fetched the first time it is accessed. Fields are looked
+        up in the memory cache first, then in the on-disk DataCache, and only
+        fetched from Yahoo Finance (with rate limiting) when missing or expired
+        in both.
         
         Args:
             ticker_symbol: The stock ticker symbol
+            refresh: Bypass the caches and fetch fresh data
+            prefetch: Fields to load eagerly; if any comes back empty the
+                ticker is treated as not found
             
         Returns:
-            Dictionary with ticker data or None if failed
+            TickerData mapping or None if failed
         """
-        return self._rate_limited_get(ticker_symbol)
+        data = TickerData(self, ticker_symbol, refresh=refresh)
+        for field in prefetch or ():
+            value = data[field]
+            if value is None or len(value) == 0:
+                self.logger.error(f"No {field} data found for {ticker_symbol}")
+                return None
+        return data
+    
+    def invalidate_ticker(self, ticker_symbol):
+        """Drop every cached field for a ticker from the memory cache."""
+        return self.memory_cache.invalidate_prefix((ticker_symbol,))
+    
+    def cache_stats(self):
+        """Get memory cache statistics (hits, misses, size, evictions) and coalesced fetches."""
+        stats = self.memory_cache.stats()
+        stats["inflight"] = self.inflight.stats()
+        return stats
     
-    def calculate_technical_indicators(self, price_data):
+    def _load_field(self, ticker_symbol, field, ticker_factory, refresh=False):
         """
-        Calculate technical indicators for price data.
+        Load one field through the memory cache, the disk cache and finally yfinance.
         
         Args:
-            price_data: Pandas DataFrame with OHLC price data
+            ticker_symbol: The stock ticker symbol
+            field: One of the keys of FIELD_TTLS
+            ticker_factory: Callable returning the yfinance Ticker object
+            refresh: Skip both caches
             
         Returns:
-            Dictionary with technical indicators
+            The field value; an empty value if the fetch failed
         """
-        if price_data is None or price_data.empty:
-            return {
-                "indicators": {},
-                "summary": {
-                    "trend": "NEUTRAL",
-                    "momentum": "NEUTRAL",
-                    "volatility": "MEDIUM",
-                    "trend_strength": "WEAK"
-                }
-            }
+        if not refresh:
+            value = self._get_cached_field(ticker_symbol, field)
+            if value is not None:
+                return value
         
         try:
-            # Extract price series
-            close = price_data['Close'].values
-            high = price_data['High'].values
-            low = price_data['Low'].values
-            volume = price_data['Volume'].values if 'Volume' in price_data else None
-            
-            # Calculate indicators
-            indicators = {}
+            return self.inflight.do(
+                (ticker_symbol, field), self._fetch_and_cache, ticker_symbol, field, ticker_factory
+            )
+        except Exception as e:
+            self.logger.error(f"Error fetching {field} for {ticker_symbol}: {e}")
+            return pd.DataFrame() if field == "history" else {}
+    
+    def _fetch_and_cache(self, ticker_symbol, field, ticker_factory):
+        """Fetch a field from yfinance and store it in the caches."""
+        value = self._rate_limited_fetch(ticker_factory(), field)
+        
+        # Failed or empty fetches are not cached so the next access retries
+        if value is not None and len(value) > 0:
+            self._cache_field(ticker_symbol, field, value)
+        return value
+    
+    def _field_ttl(self, ticker_symbol, field):
+        """
+        Get the memory cache TTL in seconds for a field.
+        
+        With a disk cache the TTL follows its market-calendar policy, so that
+        prices are held while the exchange is closed; otherwise FIELD_TTLS applies.
+        """
+        if self.data_cache is None:
+            return self.FIELD_TTLS[field]
+        return max(self.data_cache.time_to_live(ticker_symbol, f"yf_{field}"), 1)
+    
+    def _get_cached_field(self, ticker_symbol, field):
+        """Get a field from the memory cache, falling back to the disk cache."""
+        key = (ticker_symbol, field)
+        
+        value = self.memory_cache.get(key)
+        if value is not None:
+            return value
+        value = self._load_field_from_disk(ticker_symbol, field)
+        if value is not None:
+            # Held in memory only for the rest of the disk entry's validity
+            ttl = self.data_cache.remaining_ttl(ticker_symbol, f"yf_{field}")
+            self.memory_cache.set(key, value, ttl if ttl is not None else self._field_ttl(ticker_symbol, field))
+        return value
+    
+    def _cache_field(self, ticker_symbol, field, value):
+        """Store a freshly fetched field in the memory and disk caches."""
+        self.memory_cache.set((ticker_symbol, field), value, self._field_ttl(ticker_symbol, field))
+        self._save_field_to_disk(ticker_symbol, field, value)
+    
+    def refresh_history(self, ticker_symbol, full_refresh=False):
+        """
+        Bring the stored price history for a ticker up to date.
+        
+        Only the bars after the ticker's cache watermark are fetched and
+        appended to the stored history, which is kept to a rolling
+        HISTORY_PERIOD window. The watermark bar itself is fetched again so
+        that a bar stored during an open session is replaced by its final
+        values. Because history is dividend and split adjusted, a split or
+        dividend in the new bars triggers a full re-sync.
+        
+        History that is still valid under the ``yf_history`` TTL policy (e.g.
+        stored after the last close, or by a bulk prefetch) is returned without
+        asking Yahoo at all; only the indicator state is brought up to it.
+        
+        Args:
+            ticker_symbol: The stock ticker symbol
+            full_refresh: Re-download the whole period instead of appending
             
-            # Moving Averages
-            try:
-                indicators['SMA20'] = talib.SMA(close, timeperiod=20)[-1]
-                indicators['SMA50'] = talib.SMA(close, timeperiod=50)[-1]
-                indicators['SMA200'] = talib.SMA(close, timeperiod=200)[-1]
-            except:
-                indicators['SMA20'] = None
-                indicators['SMA50'] = None
-                indicators['SMA200'] = None
-            
-            # RSI (Relative Strength Index)
-            try:
-                rsi = talib.RSI(close, timeperiod=14)
-                indicators['RSI'] = rsi[-1]
-            except:
-                indicators['RSI'] = None
-            
-            # MACD (Moving Average Convergence Divergence)
-            try:
-                macd, macd_signal, macd_hist = talib.MACD(close)
-                indicators['MACD'] = macd[-1]
-                indicators['MACD_signal'] = macd_signal[-1]
-                indicators['MACD_hist'] = macd_hist[-1]
-            except:
-                indicators['MACD'] = None
-                indicators['MACD_signal'] = None
-                indicators['MACD_hist'] = None
-            
-            # Bollinger Bands
-            try:
-                upper, middle, lower = talib.BBANDS(close, timeperiod=20)
-                indicators['BB_upper'] = upper[-1]
-                indicators['BB_middle'] = middle[-1]
-                indicators['BB_lower'] = lower[-1]
-            except:
-                indicators['BB_upper'] = None
-                indicators['BB_middle'] = None
-                indicators['BB_lower'] = None
+        Returns:
+            The up-to-date price history DataFrame (empty if unavailable)
+        """
+        if not full_refresh:
+            cached = self._get_cached_field(ticker_symbol, "history")
+            if cached is not None and not cached.empty:
+                self.update_indicator_state(ticker_symbol, cached)
+                return cached
+        
+        ticker = self.yf.Ticker(ticker_symbol)
+        fetch_history = self.rate_limiter.with_rate_limit(ticker.history, "yfinance")
+        
+        stored = watermark = None
+        if not full_refresh and self.data_cache is not None:
+            watermark = self.data_cache.get_watermark(ticker_symbol, "cache")
+            if watermark is not None:
+                stored = self.data_cache.get_frame(ticker_symbol, "yf_history", max_age_hours=float("inf"))
+        
+        try:
+            if stored is None or stored.empty:
+                self.logger.info(f"Full {self.HISTORY_PERIOD} history sync for {ticker_symbol}")
+                history = fetch_history(period=self.HISTORY_PERIOD)
+            else:
+                new_bars = fetch_history(start=watermark.strftime("%Y-%m-%d"))
+                if self._has_corporate_action(new_bars, watermark):
+                    self.logger.info(f"Split or dividend detected for {ticker_symbol}, running full re-sync")
+                    return self.refresh_history(ticker_symbol, full_refresh=True)
+                history = self._append_bars(stored, new_bars)
+                self.logger.info(f"Appended {len(new_bars)} bars for {ticker_symbol} since {watermark}")
+        except Exception as e:
+            self.logger.error(f"Error refreshing history for {ticker_symbol}: {e}")
+            return stored if stored is not None else pd.DataFrame()
+        
+        if history is None or history.empty:
+            return pd.DataFrame()
+        
+        self._cache_field(ticker_symbol, "history", history)
+        self.update_indicator_state(ticker_symbol, history)
+        return history
+    
+    @staticmethod
+    def _has_corporate_action(bars, watermark):
+        """Check for splits or dividends strictly after the watermark date."""
+        if bars is None or bars.empty:
+            return False
+        after = bars[bars.index.date > watermark]
+        for column in ("Stock Splits", "Dividends"):
+            if column in after and (after[column].fillna(0) != 0).any():
+                return True
+        return False
+    
+    def _append_bars(self, stored, new_bars):
+        """Append new bars to stored history, replacing overlaps and trimming to the window."""
+        if new_bars is None or new_bars.empty:
+            return stored
+        
+        history = pd.concat([stored[stored.index < new_bars.index[0]], new_bars])
+        history = history[~history.index.duplicated(keep="last")].sort_index()
+        return history[history.index > history.index[-1] - self.HISTORY_WINDOW]
+    
+    @property
+    def _rate_limited_download(self):
+        """Get a rate-limited version of the bulk download function."""
+        return self.rate_limiter.with_rate_limit(self._download, "yfinance")
+    
+    def _download(self, ticker_symbols, period):
+        """Download OHLCV history for several tickers in one grouped, threaded request."""
+        return self.yf.download(
+            ticker_symbols,
+            period=period,
+            group_by="ticker",
+            threads=True,
+            auto_adjust=True,
+            actions=True,
+            ignore_tz=False,
+            progress=False
+        )
+    
+    def get_bulk_history(self, ticker_symbols, period=None, chunk_size=100, refresh=False):
+        """
+        Get price history for many tickers using grouped bulk downloads.
+        
+        Tickers whose history is already cached are served from the cache; the
+        rest are downloaded ``chunk_size`` symbols at a time and split into
+        per-ticker frames. When ``period`` is the default history period the
+        frames also fill the cache, so later ``get_ticker_data`` calls for these
+        tickers do not fetch history again.
+        
+        Args:
+            ticker_symbols: Iterable of ticker symbols
+            period: yfinance period string (defaults to HISTORY_PERIOD)
+            chunk_size: Maximum number of symbols per download
+            refresh: Bypass the caches and download every ticker
             
-            # ATR (Average True Range) - Volatility
+        Returns:
+            Dictionary mapping ticker symbol to its history DataFrame; tickers
+            without data are omitted
+        """
+        period = period or self.HISTORY_PERIOD
+        cacheable = period == self.HISTORY_PERIOD
+        histories = {}
+        pending = []
+        
+        for symbol in dict.fromkeys(ticker_symbols):
+            cached = None
+            if cacheable and not refresh:
+                cached = self._get_cached_field(symbol, "history")
+            if cached is not None:
+                histories[symbol] = cached
+            else:
+                pending.append(symbol)
+        
+        if pending:
+            self.logger.info(f"Bulk downloading {period} history for {len(pending)} tickers "
+                             f"({len(histories)} served from cache)")
+        
+        for i in range(0, len(pending), chunk_size):
+            chunk = pending[i:i + chunk_size]
             try:
-                indicators['ATR'] = talib.ATR(high, low, close, timeperiod=14)[-1]
-            except:
-                indicators['ATR'] = None
+                frame = self._rate_limited_download(chunk, period)
+            except Exception as e:
+                self.logger.error(f"Bulk download failed for {len(chunk)} tickers: {e}")
+                continue
             
-            # Stochastic Oscillator
-            try:
-                slowk, slowd = talib.STOCH(high, low, close)
-                indicators['Stoch_K'] = slowk[-1]
-                indicators['Stoch_D'] = slowd[-1]
-            except:
-                indicators['Stoch_K'] = None
-                indicators['Stoch_D'] = None
-            
-            # Generate summary
-            summary = {}
-            
-            # Trend
-            if (indicators['SMA20'] is not None and indicators['SMA50'] is not None and 
-                indicators['SMA200'] is not None and close[-1] is not None):
-                if close[-1] > indicators['SMA200'] and indicators['SMA20'] > indicators['SMA50']:
-                    summary['trend'] = 'BULLISH'
-                elif close[-1] < indicators['SMA200'] and indicators['SMA20'] < indicators['SMA50']:
-                    summary['trend'] = 'BEARISH'
-                else:
-                    summary['trend'] = 'NEUTRAL'
-            else:
-                summary['trend'] = 'NEUTRAL'
-            
-            # Momentum
-            if indicators['RSI'] is not None:
-                rsi = indicators['RSI']
-                if rsi > 70:
-                    summary['momentum'] = 'OVERBOUGHT'
-                elif rsi < 30:
-                    summary['momentum'] = 'OVERSOLD'
-                elif rsi > 50:
-                    summary['momentum'] = 'POSITIVE'
-                elif rsi < 50:
-                    summary['momentum'] = 'NEGATIVE'
-                else:
-                    summary['momentum'] = 'NEUTRAL'
-            else:
-                summary['momentum'] = 'NEUTRAL'
-            
-            # Volatility
-            if indicators['ATR'] is not None and close[-1] is not None:
-                atr_percent = (indicators['ATR'] / close[-1]) * 100
-                if atr_percent > 3:
-                    summary['volatility'] = 'HIGH'
-                elif atr_percent < 1:
-                    summary['volatility'] = 'LOW'
-                else:
-                    summary['volatility'] = 'MEDIUM'
-            else:
-                summary['volatility'] = 'MEDIUM'
-            
-            # Trend Strength
-            if indicators['MACD'] is not None and indicators['MACD_signal'] is not None:
-                macd_diff = abs(indicators['MACD'] - indicators['MACD_signal'])
-                if macd_diff > 1:
-                    summary['trend_strength'] = 'STRONG'
-                elif macd_diff < 0.2:
-                    summary['trend_strength'] = 'WEAK'
-                else:
-                    summary['trend_strength'] = 'MODERATE'
+            for symbol, history in self._split_download(frame, chunk).items():
+                histories[symbol] = history
+                if cacheable:
+                    self._cache_field(symbol, "history", history)
+        
+        missing = [symbol for symbol in pending if symbol not in histories]
+        if missing:
+            self.logger.warning(f"No history returned for {len(missing)} tickers: {', '.join(missing[:10])}")
+        return histories
+    
+    @staticmethod
+    def _split_download(frame, ticker_symbols):
+        """Split a grouped bulk download into one history DataFrame per ticker."""
+        if frame is None or frame.empty:
+            return {}
+        
+        if isinstance(frame.columns, pd.MultiIndex):
+            available = set(frame.columns.get_level_values(0))
+            candidates = {symbol: frame[symbol] for symbol in ticker_symbols if symbol in available}
+        elif len(ticker_symbols) == 1:
+            # Single-ticker downloads come back with flat columns
+            candidates = {ticker_symbols[0]: frame}
+        else:
+            return {}
+        
+        histories = {}
+        for symbol, history in candidates.items():
+            # Rows from other exchanges' trading days are all-NaN for this ticker
+            history = history.dropna(how="all")
+            if history.empty:
+                continue
+            history = history.copy()
+            if "Volume" in history:
+                history["Volume"] = history["Volume"].fillna(0).astype("int64")
+            histories[symbol] = history
+        return histories
+    
+    def _load_field_from_disk(self, ticker_symbol, field):
+        """Load a single field from the on-disk cache if its TTL policy still holds."""
+        if self.data_cache is None:
+            return None
+        
+        data_type = f"yf_{field}"
+        if field == "history":
+            return self.data_cache.get_frame(ticker_symbol, data_type)
+        if field in ("financials", "balance_sheet", "cash_flow", "earnings"):
+            # Statements keep Timestamp keys, so they are stored as frames
+            frame = self.data_cache.get_frame(ticker_symbol, data_type)
+            return frame.to_dict() if frame is not None else None
+        return self.data_cache.get(ticker_symbol, data_type)
+    
+    def _save_field_to_disk(self, ticker_symbol, field, value):
+        """Persist a single field to the on-disk cache."""
+        if self.data_cache is None:
+            return
+        
+        data_type = f"yf_{field}"
+        try:
+            if field == "history":
+                self.data_cache.save_frame(ticker_symbol, data_type, value)
+                if not value.empty:
+                    self.data_cache.set_watermark(ticker_symbol, "cache", value.index[-1].date())
+            elif field in ("financials", "balance_sheet", "cash_flow", "earnings"):
+                self.data_cache.save_frame(ticker_symbol, data_type, pd.DataFrame(value))
             else:
-                summary['trend_strength'] = 'WEAK'
+                self.data_cache.save(ticker_symbol, data_type, value)
+        except Exception as e:
+            self.logger.warning(f"Failed to persist {field} for {ticker_symbol}: {e}")
+    
+    def calculate_technical_indicators(self, price_data, ticker_symbol=None):
+        """
+        Calculate technical indicators for price data.
+        
+        Results are cached per ticker and last bar, so repeated requests for the
+        same history (e.g. from the charting endpoints) are not recomputed.
+        
+        Args:
+            price_data: Pandas DataFrame with OHLC price data
+            ticker_symbol: Optional ticker symbol used to cache the result
             
-            return {
-                "indicators": {k: float(v) if v is not None else None for k, v in indicators.items()},
-                "summary": summary
-            }
+        Returns:
+            Dictionary with the full indicator ``series`` (DataFrame indexed by
+            date), the ``latest`` values, the ``indicators`` snapshot and a ``summary``
+        """
+        cached = self.get_cached_technical_indicators(ticker_symbol, price_data)
+        if cached is not None:
+            return cached
+        
+        try:
+            result = analyze_price_history(price_data)
         except Exception as e:
             self.logger.error(f"Error calculating technical indicators: {e}")
-            return {
-                "indicators": {},
-                "summary": {
-                    "trend": "NEUTRAL",
-                    "momentum": "NEUTRAL",
-                    "volatility": "MEDIUM",
-                    "trend_strength": "WEAK"
-                }
-            }
+            return analyze_price_history(None)
+        
+        self.cache_technical_indicators(ticker_symbol, price_data, result)
+        return result
+    
+    @staticmethod
+    def _indicator_cache_key(ticker_symbol, price_data):
+        """Cache key identifying a ticker's indicators by its last bar."""
+        if (not ticker_symbol or price_data is None or price_data.empty
+                or "Close" not in price_data.columns):
+            return None
+        # The close is part of the key so re-adjusted history (splits/dividends) is recomputed
+        return (ticker_symbol, "technical_indicators", price_data.index[-1],
+                len(price_data), float(price_data["Close"].iloc[-1]))
+    
+    def get_cached_technical_indicators(self, ticker_symbol, price_data):
+        """Get indicators previously calculated for the same ticker and last bar."""
+        key = self._indicator_cache_key(ticker_symbol, price_data)
+        return self.memory_cache.get(key) if key is not None else None
+    
+    def cache_technical_indicators(self, ticker_symbol, price_data, result):
+        """Cache indicators for a ticker and its last bar."""
+        key = self._indicator_cache_key(ticker_symbol, price_data)
+        if key is not None:
+            self.memory_cache.set(key, result, self.FIELD_TTLS["financials"])
+    
+    def update_indicator_state(self, ticker_symbol, history=None):
+        """
+        Advance a ticker's incremental indicator state to its latest bar.
+        
+        The state is persisted next to the price cache as of the second to last
+        bar, so each refresh only feeds the bars that arrived since the previous
+        one (constant time per bar) and the last bar, which may still change
+        during an open session, is applied to a copy. The state is rebuilt from
+        the whole history when it is missing or no longer matches the stored
+        bars, e.g. after a split or dividend re-adjusted the history.
+        
+        Args:
+            ticker_symbol: The stock ticker symbol
+            history: Price history DataFrame (defaults to the cached history)
+            
+        Returns:
+            Dictionary with the ``date`` of the latest bar and its ``latest``
+            values, ``indicators`` snapshot and ``summary``; None without history
+        """
+        if history is None:
+            history = self._get_cached_field(ticker_symbol, "history")
+        if history is None or history.empty or "Close" not in history:
+            return None
+        
+        # The memory cache holds the state object itself, the disk cache its serialized form
+        key = (ticker_symbol, "indicator_state")
+        base = self.memory_cache.get(key)
+        if base is None and self.data_cache is not None:
+            payload = self.data_cache.get(ticker_symbol, "indicator_state", max_age_hours=float("inf"))
+            if payload:
+                base = IndicatorState.from_dict(payload["base"])
+        
+        start = 0
+        if base is not None:
+            try:
+                position = history.index.get_loc(pd.Timestamp(base.last_date))
+            except (KeyError, TypeError, ValueError):
+                position = None
+            if (not isinstance(position, int) or position >= len(history) - 1
+                    or float(history["Close"].iloc[position]) != base.last_close):
+                self.logger.debug(f"Rebuilding indicator state for {ticker_symbol}")
+                base = None
+            else:
+                start = position + 1
+        if base is None:
+            base = IndicatorState()
+        
+        bars = {name.lower(): history[name].to_numpy(dtype=np.float64)[start:]
+                for name in ("High", "Low", "Close", "Volume") if name in history}
+        dates = history.index[start:]
+        base.update_arrays(**{name: values[:-1] for name, values in bars.items()}, dates=dates[:-1])
+        serialized = base.to_dict()
+        state = IndicatorState.from_dict(serialized)
+        values = state.update_arrays(**{name: values[-1:] for name, values in bars.items()}, dates=dates[-1:])[-1]
+        result = indicator_snapshot(values, bars["close"][-1])
+        result["date"] = state.last_date
+        
+        self.memory_cache.set(key, base, self.FIELD_TTLS["history"])
+        if self.data_cache is not None:
+            self.data_cache.save(ticker_symbol, "indicator_state", {"base": serialized, "snapshot": result})
+        return result
 
 class NewsAnalyzer:
     """Analyze sentiment of news articles"""
@@ -1198,8 +2071,12 @@ class NewsAnalyzer:
 class GroqAnalyzer:
     """Analyze company data using GROQ AI models"""
     
+    MODEL = "llama3-70b-8192"
+    
     def __init__(self, api_key=None):
         self.client = None
+        # Identical prompts issued concurrently share one completion request
+        self.inflight = SingleFlight()
         if GROQ_AVAILABLE and api_key:
             try:
                 self.client = Groq(api_key=api_key)
@@ -1207,6 +2084,18 @@ class GroqAnalyzer:
             except Exception as e:
                 logger.error(f"Error initializing GROQ client: {e}")
         
+    def _complete(self, prompt):
+        """Get a chat completion for a prompt, coalescing identical concurrent requests."""
+        return self.inflight.do((self.MODEL, prompt), self._create_completion, prompt)
+    
+    def _create_completion(self, prompt):
+        """Request a chat completion from GROQ."""
+        completion = self.client.chat.completions.create(
+            model=self.MODEL,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return completion.choices[0].message.content
+        
     def analyze_company_fundamentals(self, company_info, ratios, tech_indicators):
         """Analyze company fundamentals"""
         if not self.client:
@@ -1234,11 +2123,7 @@ class GroqAnalyzer:
         """
         
         try:
-            completion = self.client.chat.completions.create(
-                model="llama3-70b-8192",
-                messages=[{"role": "user", "content": prompt}]
-            )
-            return completion.choices[0].message.content
+            return self._complete(prompt)
         except Exception as e:
             logger.error(f"Error in GROQ analysis: {e}")
             return f"Analysis unavailable due to error: {str(e)}"
@@ -1268,11 +2153,7 @@ class GroqAnalyzer:
         """
         
         try:
-            completion = self.client.chat.completions.create(
-                model="llama3-70b-8192",
-                messages=[{"role": "user", "content": prompt}]
-            )
-            return completion.choices[0].message.content
+            return self._complete(prompt)
         except Exception as e:
             logger.error(f"Error in GROQ news analysis: {e}")
             return f"News impact analysis unavailable due to error: {str(e)}"
@@ -1302,27 +2183,97 @@ class GroqAnalyzer:
         """
         
         try:
-            completion = self.client.chat.completions.create(
-                model="llama3-70b-8192",
-                messages=[{"role": "user", "content": prompt}]
-            )
-            return completion.choices[0].message.content
+            return self._complete(prompt)
         except Exception as e:
             logger.error(f"Error generating investment thesis: {e}")
             return f"Investment thesis unavailable due to error: {str(e)}"
 
+# Per-process state of analysis pool workers. Models are created on first use
+# and reused for every task the worker runs.
+_analysis_worker_state = {}
+
+def _init_analysis_worker():
+    """Initialize a process-pool analysis worker."""
+    _analysis_worker_state.clear()
+
+def _analysis_worker_resource(name, factory):
+    """Get a resource of the current worker process, creating it once."""
+    if name not in _analysis_worker_state:
+        _analysis_worker_state[name] = factory()
+    return _analysis_worker_state[name]
+
+def _frame_to_arrays(frame, columns=None):
+    """
+    Convert a DataFrame with a DatetimeIndex to contiguous column arrays.
+    
+    The arrays are pickled as raw buffers, which makes them much cheaper to send
+    to another process than the DataFrame itself.
+    """
+    columns = [column for column in (columns or frame.columns) if column in frame.columns]
+    index = frame.index
+    return {
+        "index": index.asi8.copy(),
+        "tz": str(index.tz) if getattr(index, "tz", None) is not None else None,
+        "index_name": index.name,
+        "columns": {column: np.ascontiguousarray(frame[column].to_numpy()) for column in columns}
+    }
+
+def _arrays_to_frame(arrays):
+    """Rebuild a DataFrame from the output of ``_frame_to_arrays``."""
+    index = pd.DatetimeIndex(arrays["index"].view("datetime64[ns]"), name=arrays["index_name"])
+    if arrays["tz"]:
+        index = index.tz_localize("UTC").tz_convert(arrays["tz"])
+    return pd.DataFrame(arrays["columns"], index=index)
+
+def _technical_indicators_task(arrays):
+    """Calculate technical indicators in an analysis worker."""
+    return analyze_price_history(_arrays_to_frame(arrays))
+
+def _news_sentiment_task(news_items):
+    """Score news sentiment in an analysis worker, loading FinBERT once per worker."""
+    analyzer = _analysis_worker_resource("news_analyzer", NewsAnalyzer)
+    return analyzer.analyze_news(news_items)
+
+def _concall_text_task(filepath):
+    """Extract the text of a concall transcript in an analysis worker."""
+    scraper = _analysis_worker_resource("ir_scraper", IndianIRScraper)
+    return scraper.extract_concall_text(filepath)
+
 class FinancialDataETL:
     """Process financial data from various sources and load it into a knowledge graph.""" 
     
+    # Price columns used by the technical indicators
+    OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+    
     def __init__(self, config_file="config.json"):
         """Initialize the ETL pipeline components.""" 
         self.config_manager = ConfigManager(config_file)
-        self.data_cache = DataCache()
+        self.data_cache = DataCache(
+            frame_format=self.config_manager.get("processing.cache_frame_format", "parquet"),
+            memory_map=self.config_manager.get("processing.cache_memory_map", False),
+            holidays=self.config_manager.get("processing.market_holidays")
+        )
         self.rate_limiter = RateLimiter()
-        self.yfinance_manager = YFinanceManager()
-        self.document_scraper = DocumentScraper(self.config_manager)
+        memory_cache_mb = self.config_manager.get("processing.memory_cache_mb", 256)
+        self.yfinance_manager = YFinanceManager(
+            data_cache=self.data_cache,
+            memory_cache=MemoryCache(max_bytes=int(memory_cache_mb) * 1024 * 1024),
+            rate_limiter=self.rate_limiter
+        )
+        self.document_scraper = DocumentScraper(self.config_manager, rate_limiter=self.rate_limiter)
         self.text_processor = TextProcessor()
         self.news_analyzer = NewsAnalyzer()
+        self.inflight = SingleFlight()
+        
+        # CPU-bound analysis runs on the calling thread or in a process pool
+        self.analysis_executor = self.config_manager.get("processing.analysis_executor", "thread")
+        self.analysis_workers = int(
+            self.config_manager.get("processing.analysis_workers")
+            or self.config_manager.get("processing.max_threads")
+            or os.cpu_count() or 1
+        )
+        self._analysis_pool = None
+        self._analysis_pool_lock = threading.Lock()
         self.neo4j = None
         
         # Initialize GROQ analyzer if API key is available
@@ -1336,7 +2287,8 @@ class FinancialDataETL:
                 self.connect_to_neo4j(
                     neo4j_config["uri"],
                     neo4j_config["user"],
-                    neo4j_config["password"]
+                    neo4j_config["password"],
+                    **self.config_manager.get_neo4j_driver_settings()
                 )
                 if not self.neo4j or not self.neo4j.verify_connection():
                     logger.warning("Neo4j connection failed - continuing without graph database")
@@ -1350,10 +2302,16 @@ class FinancialDataETL:
         # Initialize Indian IR scraper
         self.ir_scraper = IndianIRScraper()
 
-    def connect_to_neo4j(self, uri, user, password):
-        """Establish connection to Neo4j database.""" 
+    def connect_to_neo4j(self, uri, user, password, **driver_settings):
+        """
+        Establish connection to Neo4j database.
+        
+        ``driver_settings`` (database, max_connection_pool_size, max_connection_lifetime,
+        ...) are passed on to Neo4jDatabase. The pool is shared by the store workers,
+        so it should hold at least ``processing.upstream_concurrency.neo4j`` connections.
+        """
         try:
-            self.neo4j = Neo4jDatabase(uri, user, password)
+            self.neo4j = Neo4jDatabase(uri, user, password, **driver_settings)
             if not self.neo4j.verify_connection():
                 logger.error("Failed to connect to Neo4j database")
                 self.neo4j = None
@@ -1362,65 +2320,225 @@ class FinancialDataETL:
             logger.error(f"Error connecting to Neo4j: {e}")
             return False
 
+    def _run_in_analysis_pool(self, task, *args):
+        """
+        Run a CPU-bound task in the analysis process pool and wait for its result.
+        
+        The pool is created on first use with ``analysis_workers`` processes. If a
+        worker dies the pool is discarded and recreated on the next call.
+        
+        Workers are spawned rather than forked: the pool is first used from the
+        batch engine's or a web request's thread, and forking a process with
+        running threads can leave the children holding locks (logging, rate
+        limiter, driver threads) that are never released. ``_init_analysis_worker``
+        only resets a worker's resource cache; models are created lazily by the
+        first task that needs them in that worker (``_analysis_worker_resource``)
+        and reused by its later tasks.
+        """
+        with self._analysis_pool_lock:
+            if self._analysis_pool is None:
+                logger.info(f"Starting analysis process pool with {self.analysis_workers} workers")
+                self._analysis_pool = ProcessPoolExecutor(
+                    max_workers=self.analysis_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_analysis_worker
+                )
+            pool = self._analysis_pool
+        
+        try:
+            return pool.submit(task, *args).result()
+        except BrokenProcessPool:
+            with self._analysis_pool_lock:
+                if self._analysis_pool is pool:
+                    self._analysis_pool = None
+            raise
+    
+    def shutdown_analysis_pool(self):
+        """Stop the analysis process pool if it was started."""
+        with self._analysis_pool_lock:
+            pool, self._analysis_pool = self._analysis_pool, None
+        if pool is not None:
+            pool.shutdown()
+    
+    def _use_analysis_pool(self):
+        """Whether CPU-bound analysis runs in the process pool."""
+        return self.analysis_executor == "process"
+    
+    def calculate_technical_indicators(self, price_history, ticker_symbol=None):
+        """Calculate technical indicators, in the analysis pool when enabled."""
+        if not self._use_analysis_pool():
+            return self.yfinance_manager.calculate_technical_indicators(price_history, ticker_symbol)
+        
+        result = self.yfinance_manager.get_cached_technical_indicators(ticker_symbol, price_history)
+        if result is None:
+            arrays = _frame_to_arrays(price_history, self.OHLCV_COLUMNS)
+            result = self._run_in_analysis_pool(_technical_indicators_task, arrays)
+            self.yfinance_manager.cache_technical_indicators(ticker_symbol, price_history, result)
+        return result
+    
+    def analyze_news_sentiment(self, news_items):
+        """Score news sentiment with FinBERT, in the analysis pool when enabled."""
+        if self._use_analysis_pool():
+            return self._run_in_analysis_pool(_news_sentiment_task, news_items)
+        return self.news_analyzer.analyze_news(news_items)
+    
+    def extract_concall_text(self, filepath):
+        """Extract concall transcript text, in the analysis pool when enabled."""
+        if self._use_analysis_pool():
+            return self._run_in_analysis_pool(_concall_text_task, filepath)
+        return self.ir_scraper.extract_concall_text(filepath)
+    
+    @staticmethod
+    def _yf_symbol(ticker, exchange=None):
+        """Get the Yahoo Finance symbol for a ticker on an exchange."""
+        if ticker.endswith((".NS", ".BO")):
+            return ticker
+        if exchange == "NSE":
+            return f"{ticker}.NS"
+        if exchange == "BSE":
+            return f"{ticker}.BO"
+        return ticker
+    
+    def prefetch_price_history(self, tickers, exchange=None):
+        """
+        Warm the price history cache for many tickers with bulk downloads.
+        
+        Args:
+            tickers: List of ticker symbols
+            exchange: Optional stock exchange (NYSE, NASDAQ, NSE, BSE)
+            
+        Returns:
+            Number of tickers with price history available
+        """
+        symbols = [self._yf_symbol(ticker, exchange) for ticker in tickers]
+        histories = self.yfinance_manager.get_bulk_history(symbols)
+        logger.info(f"Prefetched price history for {len(histories)}/{len(symbols)} tickers")
+        return len(histories)
+    
+    def refresh_indicator_snapshots(self, tickers, exchange=None):
+        """
+        Bring the technical indicator snapshots of many tickers up to date.
+        
+        Uses the incremental indicator state kept next to the price cache, so
+        only bars added since the previous refresh are processed. Intended for
+        refreshing the whole universe after the close, once the price histories
+        have been refreshed.
+        
+        Args:
+            tickers: List of ticker symbols
+            exchange: Optional stock exchange (NYSE, NASDAQ, NSE, BSE)
+            
+        Returns:
+            Dictionary mapping ticker to its indicator snapshot; tickers without
+            cached history are omitted
+        """
+        snapshots = {}
+        for ticker in tickers:
+            yf_ticker = self._yf_symbol(ticker, exchange)
+            try:
+                result = self.yfinance_manager.update_indicator_state(yf_ticker)
+            except Exception as e:
+                logger.error(f"Error refreshing technical indicators for {ticker}: {e}")
+                continue
+            if result is None:
+                continue
+            self.data_cache.save(yf_ticker, "technical_indicators", {
+                "latest": result["latest"],
+                "indicators": result["indicators"],
+                "summary": result["summary"]
+            })
+            snapshots[ticker] = result
+        logger.info(f"Refreshed technical indicators for {len(snapshots)}/{len(tickers)} tickers")
+        return snapshots
+    
+    def build_indicator_panel(self, tickers, exchange=None):
+        """
+        Compute technical indicators for a universe of tickers in one pass.
+        
+        Price histories come from the cache or grouped bulk downloads and are
+        laid out as tickers x dates arrays, so screens over the whole universe
+        (e.g. ``panel.screen([("rsi", "<", 30), ("close", ">", "sma200")])``)
+        do not loop over tickers.
+        
+        Args:
+            tickers: List of ticker symbols
+            exchange: Optional stock exchange (NYSE, NASDAQ, NSE, BSE)
+            
+        Returns:
+            IndicatorPanel keyed by the given ticker symbols
+        """
+        symbols = {ticker: self._yf_symbol(ticker, exchange) for ticker in tickers}
+        histories = self.yfinance_manager.get_bulk_history(symbols.values())
+        panel = IndicatorPanel.from_histories({
+            ticker: histories[symbol] for ticker, symbol in symbols.items() if symbol in histories
+        })
+        logger.info(f"Built indicator panel for {len(panel)}/{len(symbols)} tickers "
+                    f"over {len(panel.dates)} dates")
+        return panel
+    
     def get_company_news(self, ticker):
         """Get recent news for a company.""" 
         try:
             if not self.config_manager.get("data_sources.news"):
                 return []
-                
-            # Check cache first
-            cached_news = self.data_cache.get(ticker, "news")
-            if cached_news:
-                return cached_news
-            
-            # Use GoogleNews to get news
-            googlenews = GoogleNews(lang='en', period='7d')
-            googlenews.search(ticker)
-            news_items = googlenews.result()
-            
-            # Process news items
-            processed_news = []
-            for item in news_items:
-                try:
-                    # Extract data
-                    news = {
-                        'headline': item.get('title', ''),
-                        'link': item.get('link', ''),
-                        'date': item.get('date', None),
-                        'time': item.get('time', None),
-                        'summary': item.get('desc', ''),
-                        'publisher': item.get('media', '')
-                    }
-                    
-                    processed_news.append(news)
-                except Exception as e:
-                    logger.error(f"Error processing news item: {e}")
-                    continue
-            
-            # Use advanced sentiment analysis if available
-            if self.news_analyzer and self.news_analyzer.sentiment_analyzer:
-                analyzed_news = self.news_analyzer.analyze_news(processed_news)
-                for i, news in enumerate(processed_news):
-                    if i < len(analyzed_news):
-                        news['sentiment_score'] = analyzed_news[i].get('sentiment_score', 0.0)
-                        news['sentiment'] = analyzed_news[i].get('sentiment', 'NEUTRAL')
-            else:
-                # Fallback to basic sentiment analysis
-                for news in processed_news:
-                    if news['headline']:
-                        news['sentiment'] = self.text_processor.analyze_sentiment(news['headline'])
-                    else:
-                        news['sentiment'] = 0.0
-            
-            # Cache the results
-            if processed_news:
-                self.data_cache.save(ticker, "news", processed_news)
-                
-            return processed_news
             
+            # Concurrent requests for the same ticker share one search
+            return self.inflight.do(("news", ticker), self._fetch_company_news, ticker)
         except Exception as e:
             logger.error(f"Error getting news for {ticker}: {e}")
             return []
+    
+    def _fetch_company_news(self, ticker):
+        """Get news for a company from the cache or GoogleNews and score its sentiment."""
+        # Check cache first
+        cached_news = self.data_cache.get(ticker, "news")
+        if cached_news:
+            return cached_news
+        
+        # Use GoogleNews to get news
+        googlenews = GoogleNews(lang='en', period='7d')
+        googlenews.search(ticker)
+        news_items = googlenews.result()
+        
+        # Process news items
+        processed_news = []
+        for item in news_items:
+            try:
+                # Extract data
+                news = {
+                    'headline': item.get('title', ''),
+                    'link': item.get('link', ''),
+                    'date': item.get('date', None),
+                    'time': item.get('time', None),
+                    'summary': item.get('desc', ''),
+                    'publisher': item.get('media', '')
+                }
+                
+                processed_news.append(news)
+            except Exception as e:
+                logger.error(f"Error processing news item: {e}")
+                continue
+        
+        # Use advanced sentiment analysis if available
+        if self.news_analyzer and self.news_analyzer.sentiment_analyzer:
+            analyzed_news = self.analyze_news_sentiment(processed_news)
+            for i, news in enumerate(processed_news):
+                if i < len(analyzed_news):
+                    news['sentiment_score'] = analyzed_news[i].get('sentiment_score', 0.0)
+                    news['sentiment'] = analyzed_news[i].get('sentiment', 'NEUTRAL')
+        else:
+            # Fallback to basic sentiment analysis
+            for news in processed_news:
+                if news['headline']:
+                    news['sentiment'] = self.text_processor.analyze_sentiment(news['headline'])
+                else:
+                    news['sentiment'] = 0.0
+        
+        # Cache the results
+        if processed_news:
+            self.data_cache.save(ticker, "news", processed_news)
+            
+        return processed_news
 
     def generate_investment_thesis(self, ticker):
         """Generate comprehensive investment thesis for a ticker.""" 
@@ -1496,13 +2614,15 @@ class FinancialDataETL:
             logger.error(f"Error generating investment thesis for {ticker}: {e}")
             return None
 
-    def process_company(self, ticker, exchange=None):
+    def process_company(self, ticker, exchange=None, full_refresh=False):
         """
         Process a single company's data.
         
         Args:
             ticker: The stock ticker symbol
             exchange: Optional stock exchange (NYSE, NASDAQ, NSE, BSE)
+            full_refresh: Re-sync the whole price history (e.g. after a split)
+                instead of only the bars since the last run
             
         Returns:
             Boolean indicating success or failure
@@ -1510,109 +2630,17 @@ class FinancialDataETL:
         try:
             logger.info(f"Processing company {ticker} on {exchange if exchange else 'default exchange'}")
             
-            # Adjust ticker format for Indian exchanges
-            yf_ticker = ticker
-            if exchange == "NSE":
-                yf_ticker = f"{ticker}.NS"
-            elif exchange == "BSE":
-                yf_ticker = f"{ticker}.BO"
+            self._scrape_ir_documents(ticker, exchange)
             
-            # For Indian companies, scrape IR website first
-            if exchange in ["NSE", "BSE"]:
-                logger.info(f"Scraping IR documents for {ticker}")
-                ir_documents = self.ir_scraper.scrape_ir_documents(ticker, exchange_code=ticker)
-                
-                if ir_documents:
-                    logger.info(f"Found {sum(len(docs) for docs in ir_documents.values())} IR documents")
-                    
-                    # Process concall transcripts
-                    for transcript in ir_documents.get('concall_transcript', []):
-                        transcript_data = self.ir_scraper.extract_concall_text(transcript['filepath'])
-                        if transcript_data:
-                            # Store transcript in Neo4j
-                            if self.neo4j:
-                                self.neo4j.store_transcript(ticker, transcript_data)
-                    
-                    # Store other documents
-                    if self.neo4j:
-                        for doc_type, docs in ir_documents.items():
-                            if doc_type != 'concall_transcript':  # Already processed above
-                                for doc in docs:
-                                    self.neo4j.store_document(ticker, doc)
-            
-            # Get company information from Yahoo Finance
-            logger.info(f"Fetching data for {yf_ticker} from Yahoo Finance")
-            ticker_data = self.yfinance_manager.get_ticker_data(yf_ticker)
-            
-            if not ticker_data or not ticker_data.get("info"):
-                logger.error(f"Failed to get data for {yf_ticker} from Yahoo Finance")
+            market_data = self._fetch_market_data(ticker, exchange, full_refresh)
+            if market_data is None:
                 return False
-                
-            # Cache the data
-            self.data_cache.save(ticker, "yfinance", ticker_data)
-            logger.info(f"Cached Yahoo Finance data for {ticker}")
-            
-            # Calculate technical indicators
-            logger.info(f"Calculating technical indicators for {ticker}")
-            price_history = ticker_data.get("history")
-            if price_history is not None and not price_history.empty:
-                technical_indicators = self.yfinance_manager.calculate_technical_indicators(price_history)
-                self.data_cache.save(ticker, "technical_indicators", technical_indicators)
-                logger.info(f"Technical analysis for {ticker}: {technical_indicators['summary']}")
-            else:
-                logger.warning(f"No price history available for {ticker}, skipping technical analysis")
+            ticker_data, price_history = market_data
             
-            # Get news articles
-            logger.info(f"Fetching news for {ticker}")
-            news = self.get_company_news(ticker)
-            if news:
-                logger.info(f"Found {len(news)} news articles for {ticker}")
-                
-                # Analyze sentiment if news analyzer is available
-                if self.news_analyzer and hasattr(self.news_analyzer, "analyze_news"):
-                    logger.info(f"Analyzing news sentiment for {ticker}")
-                    analyzed_news = self.news_analyzer.analyze_news(news)
-                    
-                    # Generate aggregate sentiment metrics
-                    if hasattr(self.news_analyzer, "get_aggregate_sentiment"):
-                        sentiment_metrics = self.news_analyzer.get_aggregate_sentiment(analyzed_news)
-                        logger.info(f"News sentiment for {ticker}: {sentiment_metrics}")
-            else:
-                logger.warning(f"No news found for {ticker}")
-            
-            # Store data in Neo4j if available
-            if self.neo4j:
-                logger.info(f"Storing data for {ticker} in Neo4j")
-                
-                # Create company node
-                company_info = ticker_data.get("info", {})
-                company_node = {
-                    "symbol": ticker,
-                    "name": company_info.get("shortName", ""),
-                    "sector": company_info.get("sector", ""),
-                    "industry": company_info.get("industry", ""),
-                    "country": company_info.get("country", ""),
-                    "exchange": exchange or company_info.get("exchange", ""),
-                    "market_cap": company_info.get("marketCap", 0),
-                    "beta": company_info.get("beta", 0),
-                    "pe_ratio": company_info.get("trailingPE", 0),
-                    "dividend_yield": company_info.get("dividendYield", 0),
-                    "last_updated": datetime.now().isoformat()
-                }
-                
-                self.neo4j.create_company_node(ticker, company_node)
-                
-                # Store price history
-                if price_history is not None and not price_history.empty:
-                    self.neo4j.create_stock_data_nodes(ticker, price_history)
-                
-                # Store technical indicators
-                if technical_indicators:
-                    self.neo4j.store_technical_indicators(ticker, technical_indicators)
-                
-                # Store news and sentiment
-                if news:
-                    self.neo4j.store_news(ticker, news)
+            technical_indicators = self._compute_technical_indicators(ticker, price_history, exchange)
+            news = self._fetch_news(ticker)
+            self._store_company_data(ticker, exchange, ticker_data, price_history,
+                                     technical_indicators, news, full_refresh)
             
             logger.info(f"Successfully processed data for {ticker}")
             return True
@@ -1620,6 +2648,387 @@ class FinancialDataETL:
         except Exception as e:
             logger.error(f"Error processing company {ticker}: {e}")
             return False
+    
+    def _scrape_ir_documents(self, ticker, exchange):
+        """Scrape investor relations documents for Indian companies and store them."""
+        if exchange not in ["NSE", "BSE"]:
+            return
+        
+        logger.info(f"Scraping IR documents for {ticker}")
+        ir_documents = self.ir_scraper.scrape_ir_documents(ticker, exchange_code=ticker)
+        if not ir_documents:
+            return
+        
+        logger.info(f"Found {sum(len(docs) for docs in ir_documents.values())} IR documents")
+        
+        # Process concall transcripts
+        for transcript in ir_documents.get('concall_transcript', []):
+            transcript_data = self.extract_concall_text(transcript['filepath'])
+            if transcript_data:
+                # Store transcript in Neo4j
+                if self.neo4j:
+                    self.neo4j.store_transcript(ticker, transcript_data)
+        
+        # Store other documents
+        if self.neo4j:
+            for doc_type, docs in ir_documents.items():
+                if doc_type != 'concall_transcript':  # Already processed above
+                    for doc in docs:
+                        self.neo4j.store_document(ticker, doc)
+    
+    def _fetch_market_data(self, ticker, exchange, full_refresh=False):
+        """
+        Fetch company info and bring the price history up to date.
+        
+        Returns:
+            Tuple of (TickerData, price history DataFrame) or None if the ticker was not found
+        """
+        yf_ticker = self._yf_symbol(ticker, exchange)
+        
+        # Get company information from Yahoo Finance
+        logger.info(f"Fetching data for {yf_ticker} from Yahoo Finance")
+        ticker_data = self.yfinance_manager.get_ticker_data(yf_ticker)
+        
+        if not ticker_data or not ticker_data.get("info"):
+            logger.error(f"Failed to get data for {yf_ticker} from Yahoo Finance")
+            return None
+        
+        # Bring price history up to date, fetching only missing bars
+        price_history = self.yfinance_manager.refresh_history(yf_ticker, full_refresh=full_refresh)
+        return ticker_data, price_history
+    
+    def _compute_technical_indicators(self, ticker, price_history, exchange=None):
+        """
+        Calculate and cache technical indicators for a price history.
+        
+        The results are cached under the Yahoo Finance symbol, whose suffix
+        selects the exchange calendar their market-hours expiry follows.
+        """
+        logger.info(f"Calculating technical indicators for {ticker}")
+        if price_history is None or price_history.empty:
+            logger.warning(f"No price history available for {ticker}, skipping technical analysis")
+            return None
+        
+        yf_ticker = self._yf_symbol(ticker, exchange)
+        indicators = self.calculate_technical_indicators(price_history, yf_ticker)
+        self.data_cache.save(yf_ticker, "technical_indicators", {
+            "latest": indicators["latest"],
+            "indicators": indicators["indicators"],
+            "summary": indicators["summary"]
+        })
+        self.data_cache.save_frame(yf_ticker, "technical_indicator_series", indicators["series"])
+        logger.info(f"Technical analysis for {ticker}: {indicators['summary']}")
+        return indicators
+    
+    def _fetch_news(self, ticker):
+        """Get news articles for a company and log their aggregate sentiment."""
+        logger.info(f"Fetching news for {ticker}")
+        news = self.get_company_news(ticker)
+        if not news:
+            logger.warning(f"No news found for {ticker}")
+            return news
+        
+        logger.info(f"Found {len(news)} news articles for {ticker}")
+        
+        # Analyze sentiment if news analyzer is available
+        if self.news_analyzer and hasattr(self.news_analyzer, "analyze_news"):
+            # Items scored by FinBERT when they were fetched keep their score;
+            # only the rest are scored here
+            analyzed_news = [item for item in news if "sentiment_score" in item]
+            unscored = [item for item in news if "sentiment_score" not in item]
+            if unscored:
+                logger.info(f"Analyzing news sentiment for {ticker}")
+                analyzed_news += self.analyze_news_sentiment(unscored)
+            
+            # Generate aggregate sentiment metrics
+            if hasattr(self.news_analyzer, "get_aggregate_sentiment"):
+                sentiment_metrics = self.news_analyzer.get_aggregate_sentiment(analyzed_news)
+                logger.info(f"News sentiment for {ticker}: {sentiment_metrics}")
+        return news
+    
+    def _store_company_data(self, ticker, exchange, ticker_data, price_history,
+                            technical_indicators, news, full_refresh=False):
+        """Store a company's info, new price bars, indicators and news in Neo4j if available."""
+        if not self.neo4j:
+            return
+        
+        logger.info(f"Storing data for {ticker} in Neo4j")
+        
+        # Create company node
+        company_info = ticker_data.get("info", {})
+        company_node = {
+            "symbol": ticker,
+            "name": company_info.get("shortName", ""),
+            "sector": company_info.get("sector", ""),
+            "industry": company_info.get("industry", ""),
+            "country": company_info.get("country", ""),
+            "exchange": exchange or company_info.get("exchange", ""),
+            "market_cap": company_info.get("marketCap", 0),
+            "beta": company_info.get("beta", 0),
+            "pe_ratio": company_info.get("trailingPE", 0),
+            "dividend_yield": company_info.get("dividendYield", 0),
+            "last_updated": datetime.now().isoformat()
+        }
+        
+        self.neo4j.create_company_node(ticker, company_node)
+        
+        # Store only the price bars the graph does not have yet, with their indicators
+        if price_history is not None and not price_history.empty:
+            graph_watermark = None if full_refresh else self.data_cache.get_watermark(ticker, "graph")
+            new_bars = price_history
+            if graph_watermark is not None:
+                new_bars = price_history[price_history.index.date >= graph_watermark]
+            if not new_bars.empty:
+                self.neo4j.create_stock_data_nodes(ticker, new_bars)
+                if technical_indicators and not technical_indicators["series"].empty:
+                    self.neo4j.store_technical_indicators(
+                        ticker, technical_indicators["series"].loc[new_bars.index])
+                self.data_cache.set_watermark(ticker, "graph", new_bars.index[-1].date())
+                logger.info(f"Stored {len(new_bars)} price bars for {ticker} in Neo4j")
+        
+        # Store news and sentiment
+        if news:
+            self.neo4j.store_news(ticker, news)
+    
+    async def run_batch_process(self, tickers, exchange=None, max_concurrency=None,
+                                ticker_timeout=None, full_refresh=False):
+        """
+        Process many companies as a streaming fetch -> analyze -> store pipeline.
+        
+        Each stage has its own pool of workers and threads, and the stages are
+        connected by bounded queues (``processing.pipeline_queue_size``):
+        
+        - fetch: ``max_concurrency`` (``processing.max_threads``) workers for the
+          network-bound IR scraping, Yahoo Finance and news requests
+        - analyze: up to one worker per CPU for the technical indicators, or one
+          per analysis process when ``processing.analysis_executor`` is "process"
+        - store: ``processing.upstream_concurrency.neo4j`` workers for the Neo4j writes
+        
+        While one ticker is being written to Neo4j the next ones are analyzed and
+        fetched. When the store stage falls behind, its full queue blocks the
+        analyze workers and then the fetch workers, so slow writes never pile up
+        fetched data in memory. Requests to each upstream are additionally
+        bounded by ``processing.upstream_concurrency``.
+        
+        Each stage may spend ``ticker_timeout`` seconds on a ticker, counted
+        while its steps run: time spent waiting in the queues or for an
+        upstream slot does not count, so backpressure never times out tickers
+        that were already fetched. Tickers exceeding it are reported as timed
+        out. A step already running in its thread cannot be interrupted and is
+        left to finish in the background; the stage summary counts the timed
+        out steps and how many of them were still running when the batch ended.
+        
+        Args:
+            tickers: List of ticker symbols
+            exchange: Optional stock exchange (NYSE, NASDAQ, NSE, BSE)
+            max_concurrency: Number of fetch workers
+            ticker_timeout: Seconds of work allowed per ticker in each stage
+            full_refresh: Re-sync the whole price history for every ticker
+            
+        Returns:
+            Summary dictionary with success/failure/timeout counts, per-ticker
+            status and per-stage utilisation and timeouts
+        """
+        import asyncio
+        import time
+        
+        max_concurrency = int(max_concurrency or self.config_manager.get("processing.max_threads", 5))
+        ticker_timeout = ticker_timeout or self.config_manager.get("processing.ticker_timeout_seconds", 600)
+        upstream_limits = self.config_manager.get("processing.upstream_concurrency", {}) or {}
+        queue_size = int(self.config_manager.get("processing.pipeline_queue_size", 2 * max_concurrency))
+        
+        upstream_sizes = {
+            name: max(1, min(int(upstream_limits.get(name, max_concurrency)), max_concurrency))
+            for name in ("ir", "yfinance", "news", "neo4j")
+        }
+        if self._use_analysis_pool():
+            # Keep every analysis process busy
+            analyze_workers = self.analysis_workers
+        else:
+            analyze_workers = max(1, min(os.cpu_count() or 1, max_concurrency))
+        stage_workers = {
+            "fetch": max_concurrency,
+            "analyze": analyze_workers,
+            "store": upstream_sizes["neo4j"]
+        }
+        
+        pools = {
+            stage: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"etl-{stage}")
+            for stage, workers in stage_workers.items()
+        }
+        upstreams = {name: asyncio.Semaphore(size) for name, size in upstream_sizes.items()}
+        queues = {
+            "fetch": asyncio.Queue(),
+            "analyze": asyncio.Queue(maxsize=queue_size),
+            "store": asyncio.Queue(maxsize=queue_size)
+        }
+        
+        tickers = list(dict.fromkeys(tickers))
+        summary = {
+            "total": len(tickers),
+            "success": 0,
+            "failure": 0,
+            "timeout": 0,
+            "results": {},
+            "failed_tickers": [],
+            "stages": {
+                stage: {"workers": workers, "busy_seconds": 0.0, "max_queue": 0,
+                        "timed_out_steps": 0, "abandoned_running": 0}
+                for stage, workers in stage_workers.items()
+            }
+        }
+        remaining = {}  # ticker -> seconds left in its current stage
+        abandoned = {stage: [] for stage in stage_workers}  # futures of timed out steps
+        started = time.monotonic()
+        progress_every = max(1, len(tickers) // 20)
+        
+        def finish(ticker, status):
+            summary["results"][ticker] = status
+            if status == "success":
+                summary["success"] += 1
+            else:
+                summary["failure"] += 1
+                summary["failed_tickers"].append(ticker)
+                if status == "timeout":
+                    summary["timeout"] += 1
+            
+            done = len(summary["results"])
+            if done % progress_every == 0 or done == len(tickers):
+                elapsed = time.monotonic() - started
+                remaining = elapsed / done * (len(tickers) - done)
+                logger.info(f"Batch progress: {done}/{len(tickers)} tickers "
+                            f"({summary['failure']} failed), {elapsed:.0f}s elapsed, ~{remaining:.0f}s remaining")
+        
+        async def call(stage, ticker, func, *args):
+            if remaining[ticker] <= 0:
+                raise asyncio.TimeoutError()
+            future = pools[stage].submit(func, *args)
+            step_started = time.monotonic()
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(future), remaining[ticker])
+            except asyncio.TimeoutError:
+                # The thread keeps running; remember it so the summary can report it
+                summary["stages"][stage]["timed_out_steps"] += 1
+                abandoned[stage].append(future)
+                raise
+            finally:
+                step_seconds = time.monotonic() - step_started
+                remaining[ticker] -= step_seconds
+                summary["stages"][stage]["busy_seconds"] += step_seconds
+        
+        async def run_step(stage, upstream, ticker, func, *args):
+            if upstream is None:
+                return await call(stage, ticker, func, *args)
+            async with upstreams[upstream]:
+                return await call(stage, ticker, func, *args)
+        
+        async def hand_off(stage, item):
+            await queues[stage].put(item)
+            summary["stages"][stage]["max_queue"] = max(
+                summary["stages"][stage]["max_queue"], queues[stage].qsize())
+        
+        async def worker(stage, handle):
+            while True:
+                item = await queues[stage].get()
+                if item is None:
+                    return
+                ticker = item[0]
+                # Each stage's budget starts when the stage picks the ticker up
+                remaining[ticker] = ticker_timeout
+                try:
+                    await handle(*item)
+                except asyncio.TimeoutError:
+                    logger.error(f"Timed out processing {ticker} in the {stage} stage after {ticker_timeout}s")
+                    finish(ticker, "timeout")
+                except Exception as e:
+                    logger.error(f"Error processing company {ticker}: {e}")
+                    finish(ticker, "failure")
+        
+        async def fetch(ticker):
+            await run_step("fetch", "ir", ticker, self._scrape_ir_documents, ticker, exchange)
+            market_data = await run_step("fetch", "yfinance", ticker,
+                                         self._fetch_market_data, ticker, exchange, full_refresh)
+            if market_data is None:
+                finish(ticker, "failure")
+                return
+            news = await run_step("fetch", "news", ticker, self._fetch_news, ticker)
+            await hand_off("analyze", (ticker, *market_data, news))
+        
+        async def analyze(ticker, ticker_data, price_history, news):
+            technical_indicators = await run_step("analyze", None, ticker,
+                                                  self._compute_technical_indicators, ticker, price_history,
+                                                  exchange)
+            await hand_off("store", (ticker, ticker_data, price_history, technical_indicators, news))
+        
+        async def store(ticker, ticker_data, price_history, technical_indicators, news):
+            await run_step("store", "neo4j", ticker, self._store_company_data, ticker, exchange,
+                           ticker_data, price_history, technical_indicators, news, full_refresh)
+            finish(ticker, "success")
+        
+        handlers = {"fetch": fetch, "analyze": analyze, "store": store}
+        for ticker in tickers:
+            queues["fetch"].put_nowait((ticker,))
+        
+        try:
+            workers = {
+                stage: [asyncio.create_task(worker(stage, handlers[stage])) for _ in range(count)]
+                for stage, count in stage_workers.items()
+            }
+            # Drain the stages in order: each is told to stop once its producers are done
+            for stage in ("fetch", "analyze", "store"):
+                for _ in workers[stage]:
+                    await queues[stage].put(None)
+                await asyncio.gather(*workers[stage])
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=False)
+        
+        summary["elapsed_seconds"] = round(time.monotonic() - started, 2)
+        summary["tickers_per_minute"] = round(
+            len(tickers) / summary["elapsed_seconds"] * 60, 2) if summary["elapsed_seconds"] else None
+        for stage, stage_summary in summary["stages"].items():
+            stage_summary["busy_seconds"] = round(stage_summary["busy_seconds"], 2)
+            stage_summary["abandoned_running"] = sum(not future.done() for future in abandoned[stage])
+            if stage_summary["abandoned_running"]:
+                logger.warning(f"{stage_summary['abandoned_running']} timed out {stage} steps are still running")
+        logger.info(f"Batch complete: {summary['success']} succeeded, {summary['failure']} failed "
+                    f"({summary['timeout']} timed out) in {summary['elapsed_seconds']}s")
+        return summary
+    
+    def run_sector_analysis(self, sectors_data, exchange=None):
+        """
+        Process every company of one or more sectors and link them to their sector.
+        
+        Args:
+            sectors_data: Dictionary mapping sector name to a list of ticker symbols
+            exchange: Optional stock exchange (NYSE, NASDAQ, NSE, BSE)
+            
+        Returns:
+            Dictionary with sectors_processed, companies_processed and failures counts
+        """
+        import asyncio
+        results = {"sectors_processed": 0, "companies_processed": 0, "failures": 0, "sectors": {}}
+        
+        for sector_name, tickers in sectors_data.items():
+            logger.info(f"Processing sector {sector_name} with {len(tickers)} companies")
+            self.prefetch_price_history(tickers, exchange)
+            summary = asyncio.run(self.run_batch_process(tickers, exchange))
+            
+            if self.neo4j:
+                try:
+                    self.neo4j.create_sector_node(sector_name, {"company_count": len(tickers)})
+                    for ticker, status in summary["results"].items():
+                        if status == "success":
+                            self.neo4j.connect_company_to_sector(ticker, sector_name)
+                except Exception as e:
+                    logger.error(f"Error linking companies to sector {sector_name}: {e}")
+            
+            results["sectors_processed"] += 1
+            results["companies_processed"] += summary["success"]
+            results["failures"] += summary["failure"]
+            results["sectors"][sector_name] = summary
+        
+        return results
 
 class FinancialETLPipeline:
     """High-level pipeline for running the financial data ETL process.""" 
@@ -1667,6 +3076,9 @@ class FinancialETLPipeline:
             
             self.logger.info(f"Processing {len(tickers)} tickers from {ticker_file}")
             
+            # Fetch price history for the whole batch in a few bulk requests
+            self.etl.prefetch_price_history(tickers, exchange)
+            
             # Use async processing
             import asyncio
             results = asyncio.run(self.etl.run_batch_process(tickers, exchange))
@@ -1707,6 +3119,8 @@ def run_cli():
     company_parser = subparsers.add_parser("company", help="Process a single company")
     company_parser.add_argument("ticker", help="Company ticker symbol")
     company_parser.add_argument("--exchange", help="Stock exchange (NYSE, NASDAQ, NSE, BSE)")
+    company_parser.add_argument("--full-refresh", action="store_true",
+                                help="Re-sync the full price history instead of only new bars")
     
     # Process a sector
     sector_parser = subparsers.add_parser("sector", help="Process a sector with multiple companies")
@@ -1740,7 +3154,7 @@ def run_cli():
             print(f"{source}: {'Connected' if status else 'Not connected'}")
             
     elif args.command == "company":
-        success = pipeline.etl.process_company(args.ticker, args.exchange)
+        success = pipeline.etl.process_company(args.ticker, args.exchange, full_refresh=args.full_refresh)
         print(f"Company processing {'succeeded' if success else 'failed'}")
         
     elif args.command == "sector":
@@ -1786,6 +3200,8 @@ def run_cli():
     
     else:
         parser.print_help()
+    
+    pipeline.etl.shutdown_analysis_pool()
 
 if __name__ == "__main__":
     run_cli()
\ No newline at end of file
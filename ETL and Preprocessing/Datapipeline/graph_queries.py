@@ -0,0 +1,251 @@
+"""
+Cypher statements of the knowledge graph operations.
+
+Neo4jDatabase and AsyncNeo4jDatabase run the same statements, so they are kept
+here once instead of inside each client's methods.
+"""
+
+# Constraints and indexes created on connect
+SCHEMA_STATEMENTS = (
+    # Company constraints
+    "CREATE CONSTRAINT company_ticker IF NOT EXISTS FOR (c:Company) REQUIRE c.ticker IS UNIQUE",
+    # Document constraints
+    "CREATE CONSTRAINT document_id IF NOT EXISTS FOR (d:Document) REQUIRE d.id IS UNIQUE",
+    # Create indexes for better performance
+    "CREATE INDEX company_sector IF NOT EXISTS FOR (c:Company) ON (c.sector)",
+    "CREATE INDEX document_type IF NOT EXISTS FOR (d:Document) ON (d.type)",
+    "CREATE INDEX news_date IF NOT EXISTS FOR (n:News) ON (n.date)"
+)
+
+# Tags Price nodes stored before they carried a ticker. CALL ... IN TRANSACTIONS
+# commits by itself and can only run auto-commit.
+PRICE_TICKER_BACKFILL_QUERY = """
+MATCH (c:Company)-[:HAS_PRICE]->(p:Price)
+WHERE p.ticker IS NULL
+CALL { WITH c, p SET p.ticker = c.ticker } IN TRANSACTIONS OF 10000 ROWS
+"""
+
+CONNECTION_TEST_QUERY = "RETURN 'Connection successful' AS message"
+
+COMPANY_QUERY = """
+MERGE (c:Company {ticker: $ticker})
+SET c += $properties
+RETURN c
+"""
+
+PRICE_UPSERT_QUERY = """
+MATCH (c:Company {ticker: $ticker})
+UNWIND $rows AS row
+MERGE (p:Price {ticker: $ticker, date: date(row.date)})
+SET p.open = row.open,
+    p.high = row.high,
+    p.low = row.low,
+    p.close = row.close,
+    p.volume = row.volume
+MERGE (c)-[:HAS_PRICE]->(p)
+RETURN count(*) AS rows
+"""
+
+INDICATOR_ROWS_QUERY = """
+UNWIND $rows AS row
+MATCH (p:Price {ticker: $ticker, date: date(row.date)})
+SET p += row.indicators
+RETURN count(*) AS rows
+"""
+
+LATEST_INDICATORS_QUERY = """
+MATCH (p:Price {ticker: $ticker})
+WITH p ORDER BY p.date DESC LIMIT 1
+SET p += $indicators
+RETURN count(*) AS rows
+"""
+
+# Formatted with the statement node label and its relationship type
+STATEMENT_UPSERT_QUERY = """
+MATCH (c:Company {ticker: $ticker})
+UNWIND $rows AS row
+MERGE (s:%(label)s {ticker: $ticker, date: date(row.date)})
+SET s += row.items
+MERGE (c)-[:%(relationship)s]->(s)
+RETURN count(*) AS rows
+"""
+
+FINANCIAL_RATIOS_QUERY = """
+MATCH (c:Company {ticker: $ticker})
+SET c.financial_ratios = $ratios
+"""
+
+FILING_UPSERT_QUERY = """
+MATCH (c:Company {ticker: $ticker})
+UNWIND $rows AS row
+MERGE (f:Filing {accession_number: row.accession_number})
+SET f.id = row.accession_number,
+    f.type = row.type,
+    f.filing_date = date(row.filing_date),
+    f.url = row.url,
+    f.content = row.content
+MERGE (c)-[:HAS_FILING]->(f)
+RETURN count(*) AS rows
+"""
+
+NEWS_UPSERT_QUERY = """
+MATCH (c:Company {ticker: $ticker})
+UNWIND $rows AS row
+MERGE (n:News {link_hash: row.link_hash})
+SET n.headline = row.headline,
+    n.link = row.link,
+    n.id = row.link,
+    n.date = CASE WHEN row.date IS NOT NULL THEN date(row.date) ELSE null END,
+    n.time = row.time,
+    n.sentiment = row.sentiment
+MERGE (c)-[:HAS_NEWS]->(n)
+RETURN count(*) AS rows
+"""
+
+REPORT_QUERY = """
+MATCH (c:Company {name: $company_name})
+WITH c
+CREATE (r:Report {
+    title: $title,
+    url: $url,
+    type: $type,
+    id: $url
+})
+SET r.content = $content
+CREATE (c)-[:HAS_REPORT]->(r)
+"""
+
+TEXT_CHUNKS_QUERY = """
+MATCH (s)
+WHERE s.id = $source_id AND $source_label in labels(s)
+WITH s
+UNWIND $chunks AS chunk
+CREATE (c:TextChunk {
+    content: chunk.content,
+    chunk_id: chunk.chunk_id
+})
+CREATE (s)-[:HAS_CHUNK]->(c)
+"""
+
+SECTOR_QUERY = """
+MERGE (s:Sector {name: $sector_name})
+SET s += $properties
+RETURN s
+"""
+
+COMPANY_SECTOR_QUERY = """
+MATCH (c:Company {ticker: $ticker})
+MATCH (s:Sector {name: $sector_name})
+MERGE (c)-[:BELONGS_TO]->(s)
+"""
+
+SECTOR_REPORT_QUERY = """
+MATCH (s:Sector {name: $sector_name})
+WITH s
+CREATE (r:SectorReport {
+    title: $title,
+    url: $url,
+    date: date($date),
+    id: $url
+})
+SET r.content = $content
+CREATE (s)-[:HAS_REPORT]->(r)
+"""
+
+COMPANIES_BY_SECTOR_QUERY = """
+MATCH (c:Company)-[:BELONGS_TO]->(s:Sector {name: $sector_name})
+RETURN c
+"""
+
+ANALYSIS_QUERY = """
+MATCH (c:Company {ticker: $ticker})
+MERGE (a:Analysis {ticker: $ticker})
+SET a.fundamental_analysis = $fundamental_analysis,
+    a.news_impact = $news_impact,
+    a.investment_thesis = $investment_thesis,
+    a.timestamp = datetime($timestamp),
+    a.updated_at = datetime()
+MERGE (c)-[:HAS_ANALYSIS]->(a)
+"""
+
+SENTIMENT_QUERY = """
+MATCH (c:Company {ticker: $ticker})
+MERGE (s:SentimentAnalysis {ticker: $ticker})
+SET s.average_score = $average_score,
+    s.sentiment_volatility = $sentiment_volatility,
+    s.positive_ratio = $positive_ratio,
+    s.negative_ratio = $negative_ratio,
+    s.sentiment_trend = $sentiment_trend,
+    s.timestamp = datetime()
+MERGE (c)-[:HAS_SENTIMENT]->(s)
+"""
+
+# Formatted with the relationship type
+MARKET_RELATIONSHIP_QUERY = """
+MATCH (c1:Company {ticker: $ticker})
+MATCH (c2:Company {ticker: $related_ticker})
+CREATE (c1)-[r:%s]->(c2)
+SET r += $properties
+"""
+
+PEER_COMPARISON_QUERY = """
+MATCH (c:Company {ticker: $ticker})
+MERGE (p:PeerComparison {ticker: $ticker})
+SET p.metrics = $metrics,
+    p.timestamp = datetime()
+MERGE (c)-[:HAS_PEER_COMPARISON]->(p)
+"""
+
+COMPANY_BY_TICKER_QUERY = """
+MATCH (c:Company {ticker: $ticker})
+RETURN c
+"""
+
+# Placeholder substring search; a real implementation would use vector
+# embeddings or a full-text index
+SEMANTIC_SEARCH_QUERY = """
+MATCH (c:TextChunk)
+WHERE c.content CONTAINS $search_term
+RETURN c.content AS content, c.chunk_id AS chunk_id
+LIMIT $limit
+"""
+
+DOCUMENT_QUERY = """
+MATCH (c:Company {ticker: $ticker})
+MERGE (d:Document {id: $doc_id})
+SET d += $properties
+MERGE (c)-[:HAS_DOCUMENT]->(d)
+"""
+
+TRANSCRIPT_QUERY = """
+MATCH (c:Company {ticker: $ticker})
+MERGE (t:Transcript {id: $transcript_id})
+SET t += $properties
+MERGE (c)-[:HAS_TRANSCRIPT]->(t)
+"""
+
+# Upserts the segments of a transcript, removes segments beyond the new count
+# and links consecutive segments by NEXT_SEGMENT relationships
+TRANSCRIPT_SEGMENTS_QUERY = """
+MATCH (t:Transcript {id: $transcript_id})
+UNWIND $segments AS segment
+MERGE (s:TranscriptSegment {id: segment.id})
+SET s += segment
+MERGE (t)-[:HAS_SEGMENT]->(s)
+WITH t, s ORDER BY s.ordinal
+WITH t, collect(s) AS segments
+OPTIONAL MATCH (t)-[:HAS_SEGMENT]->(stale:TranscriptSegment)
+WHERE stale.ordinal IS NULL OR stale.ordinal >= size(segments)
+DETACH DELETE stale
+WITH DISTINCT segments
+UNWIND range(0, size(segments) - 2) AS i
+WITH segments[i] AS current, segments[i + 1] AS following
+MERGE (current)-[:NEXT_SEGMENT]->(following)
+"""
+
+TRANSCRIPT_SEGMENTS_READ_QUERY = """
+MATCH (t:Transcript {id: $transcript_id})-[:HAS_SEGMENT]->(first:TranscriptSegment {ordinal: 0})
+MATCH path = (first)-[:NEXT_SEGMENT*0..]->(last)
+WHERE NOT (last)-[:NEXT_SEGMENT]->()
+RETURN [segment IN nodes(path) | properties(segment)] AS segments
+"""
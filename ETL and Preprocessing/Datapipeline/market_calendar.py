@@ -0,0 +1,242 @@
+"""
+Exchange trading calendars and market-aware cache expiry.
+
+MarketCalendar knows the regular session and the holidays of an exchange
+(NSE/BSE and NYSE/NASDAQ are built in). The TTL policies use it to decide
+when a cached payload goes stale:
+
+- MarketHoursTTL: prices and quotes expire within minutes while the market
+  is open, and stay valid until the next session opens once it has closed
+  (overnight, weekends and holidays).
+- ReportingCadenceTTL: statements and shareholding patterns only change when
+  companies report, so they are refreshed daily during the results season
+  after each quarter end and held until the next quarter end otherwise.
+- FixedTTL: a plain maximum age for everything else.
+
+The built-in holiday lists cover the published calendars; later years can be
+added through ``MarketCalendar.add_holidays`` (the ETL reads them from the
+``processing.market_holidays`` config entry).
+"""
+
+import logging
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Full-day closures of the regular session
+NSE_HOLIDAYS = (
+    "2024-01-22", "2024-01-26", "2024-03-08", "2024-03-25", "2024-03-29",
+    "2024-04-11", "2024-04-17", "2024-05-01", "2024-05-20", "2024-06-17",
+    "2024-07-17", "2024-08-15", "2024-10-02", "2024-11-01", "2024-11-15",
+    "2024-11-20", "2024-12-25",
+    "2025-02-26", "2025-03-14", "2025-03-31", "2025-04-10", "2025-04-14",
+    "2025-04-18", "2025-05-01", "2025-08-15", "2025-08-27", "2025-10-02",
+    "2025-10-21", "2025-10-22", "2025-11-05", "2025-12-25",
+    "2026-01-15", "2026-01-26", "2026-03-03", "2026-03-26", "2026-03-31",
+    "2026-04-03", "2026-04-14", "2026-05-01", "2026-05-28", "2026-06-26",
+    "2026-09-14", "2026-10-02", "2026-10-20", "2026-11-10", "2026-11-24",
+    "2026-12-25",
+)
+
+NYSE_HOLIDAYS = (
+    "2024-01-01", "2024-01-15", "2024-02-19", "2024-03-29", "2024-05-27",
+    "2024-06-19", "2024-07-04", "2024-09-02", "2024-11-28", "2024-12-25",
+    "2025-01-01", "2025-01-09", "2025-01-20", "2025-02-17", "2025-04-18",
+    "2025-05-26", "2025-06-19", "2025-07-04", "2025-09-01", "2025-11-27",
+    "2025-12-25",
+    "2026-01-01", "2026-01-19", "2026-02-16", "2026-04-03", "2026-05-25",
+    "2026-06-19", "2026-07-03", "2026-09-07", "2026-11-26", "2026-12-25",
+)
+
+# Longest stretch of consecutive closed days searched for the next session
+_MAX_CLOSED_DAYS = 30
+
+
+class MarketCalendar:
+    """Regular trading sessions and holidays of an exchange."""
+
+    def __init__(self, name, timezone, open_time, close_time, holidays=(), weekend=(5, 6)):
+        """
+        Initialize the calendar.
+
+        Args:
+            name: Exchange name (e.g. "NSE")
+            timezone: Exchange timezone (e.g. "Asia/Kolkata")
+            open_time: Session open as "HH:MM" local time
+            close_time: Session close as "HH:MM" local time
+            holidays: Dates ("YYYY-MM-DD" or date-likes) on which the exchange is closed
+            weekend: Weekdays without a session (Monday is 0)
+        """
+        self.name = name
+        self.timezone = timezone
+        self.open_time = pd.Timedelta(f"{open_time}:00")
+        self.close_time = pd.Timedelta(f"{close_time}:00")
+        self.weekend = frozenset(weekend)
+        self.holidays = set()
+        self.add_holidays(holidays)
+
+    def add_holidays(self, dates):
+        """Mark additional dates as exchange holidays."""
+        self.holidays.update(pd.Timestamp(date).date() for date in dates)
+
+    def has_holidays(self, year):
+        """Check whether any holidays of a year are known."""
+        return any(day.year == year for day in self.holidays)
+
+    def localize(self, when):
+        """Convert a timestamp (naive timestamps are taken as UTC) to exchange time."""
+        when = pd.Timestamp(when)
+        if when.tzinfo is None:
+            when = when.tz_localize("UTC")
+        return when.tz_convert(self.timezone)
+
+    def is_trading_day(self, day):
+        """Check whether the exchange holds a regular session on a date."""
+        day = pd.Timestamp(day)
+        return day.weekday() not in self.weekend and day.date() not in self.holidays
+
+    def session(self, day):
+        """Get the (open, close) timestamps of the session on a date."""
+        midnight = pd.Timestamp(pd.Timestamp(day).date()).tz_localize(self.timezone)
+        return midnight + self.open_time, midnight + self.close_time
+
+    def is_open(self, when):
+        """Check whether the regular session is in progress at a timestamp."""
+        when = self.localize(when)
+        if not self.is_trading_day(when):
+            return False
+        open_at, close_at = self.session(when)
+        return open_at <= when < close_at
+
+    def next_open(self, when):
+        """Get the open of the first session starting after a timestamp."""
+        when = self.localize(when)
+        day = when.normalize()
+        for _ in range(_MAX_CLOSED_DAYS):
+            if self.is_trading_day(day):
+                open_at = self.session(day)[0]
+                if open_at > when:
+                    return open_at
+            day += pd.Timedelta(days=1)
+        raise ValueError(f"No {self.name} session within {_MAX_CLOSED_DAYS} days of {when}")
+
+    def previous_close(self, when):
+        """Get the close of the last session that ended at or before a timestamp."""
+        when = self.localize(when)
+        day = when.normalize()
+        for _ in range(_MAX_CLOSED_DAYS):
+            if self.is_trading_day(day):
+                close_at = self.session(day)[1]
+                if close_at <= when:
+                    return close_at
+            day -= pd.Timedelta(days=1)
+        raise ValueError(f"No {self.name} session within {_MAX_CLOSED_DAYS} days before {when}")
+
+
+def default_calendars():
+    """Create the built-in exchange calendars keyed by exchange name."""
+    india = dict(timezone="Asia/Kolkata", open_time="09:15", close_time="15:30", holidays=NSE_HOLIDAYS)
+    us = dict(timezone="America/New_York", open_time="09:30", close_time="16:00", holidays=NYSE_HOLIDAYS)
+    return {
+        "NSE": MarketCalendar("NSE", **india),
+        "BSE": MarketCalendar("BSE", **india),
+        "NYSE": MarketCalendar("NYSE", **us),
+        "NASDAQ": MarketCalendar("NASDAQ", **us)
+    }
+
+
+def check_holiday_coverage(calendars, year=None):
+    """
+    Warn about calendars without holidays for a year (the current year by default).
+
+    Without them every exchange holiday is taken for a trading day, so cached
+    market data expires during closures.
+
+    Returns:
+        list: Names of the calendars lacking holidays for the year
+    """
+    year = year or pd.Timestamp.now(tz="UTC").year
+    missing = [name for name, calendar in calendars.items() if not calendar.has_holidays(year)]
+    for name in missing:
+        logger.warning(f"No {year} holidays known for {name}; add them to processing.market_holidays")
+    return missing
+
+
+def exchange_for_ticker(ticker):
+    """Infer the exchange of a Yahoo Finance symbol from its suffix."""
+    ticker = str(ticker).upper()
+    if ticker.endswith(".NS"):
+        return "NSE"
+    if ticker.endswith(".BO"):
+        return "BSE"
+    return "NYSE"
+
+
+class FixedTTL:
+    """Expire cached data a fixed time after it was saved."""
+
+    def __init__(self, hours):
+        self.max_age = pd.Timedelta(hours=hours)
+
+    def expires_at(self, saved_at, calendar):
+        """Get the time at which data saved at ``saved_at`` goes stale."""
+        return calendar.localize(saved_at) + self.max_age
+
+
+class MarketHoursTTL:
+    """
+    Expire market data quickly during sessions and hold it while the market is closed.
+
+    Data saved during a session, or within ``settle_minutes`` after its close
+    while the final bar is still being published, expires after
+    ``session_minutes``. Data saved later is valid until the next session opens.
+    """
+
+    def __init__(self, session_minutes, settle_minutes=30):
+        self.session_ttl = pd.Timedelta(minutes=session_minutes)
+        self.settle = pd.Timedelta(minutes=settle_minutes)
+
+    def expires_at(self, saved_at, calendar):
+        """Get the time at which data saved at ``saved_at`` goes stale."""
+        saved_at = calendar.localize(saved_at)
+        if calendar.is_open(saved_at) or saved_at < calendar.previous_close(saved_at) + self.settle:
+            return saved_at + self.session_ttl
+        return calendar.next_open(saved_at)
+
+
+class ReportingCadenceTTL:
+    """
+    Expire reported data on the quarterly reporting cadence.
+
+    During the results season, the ``season_days`` after each calendar quarter
+    end, data expires after ``season_hours``. Outside the season it is valid
+    until the next quarter end.
+    """
+
+    def __init__(self, season_days=60, season_hours=24):
+        self.season = pd.Timedelta(days=season_days)
+        self.season_ttl = pd.Timedelta(hours=season_hours)
+
+    def expires_at(self, saved_at, calendar):
+        """Get the time at which data saved at ``saved_at`` goes stale."""
+        saved_at = calendar.localize(saved_at)
+        quarter = saved_at.tz_localize(None).to_period("Q")
+        quarter_start = quarter.start_time.tz_localize(calendar.timezone)
+        if saved_at < quarter_start + self.season:
+            return saved_at + self.season_ttl
+        return (quarter + 1).start_time.tz_localize(calendar.timezone)
+
+
+# Cache data type -> expiry policy; other data types fall back to FixedTTL(24)
+DEFAULT_TTL_POLICIES = {
+    "yf_history": MarketHoursTTL(session_minutes=5),
+    "yf_info": MarketHoursTTL(session_minutes=15),
+    "technical_indicators": MarketHoursTTL(session_minutes=5),
+    "technical_indicator_series": MarketHoursTTL(session_minutes=5),
+    "yf_financials": ReportingCadenceTTL(),
+    "yf_balance_sheet": ReportingCadenceTTL(),
+    "yf_cash_flow": ReportingCadenceTTL(),
+    "yf_earnings": ReportingCadenceTTL(),
+    "shareholding": ReportingCadenceTTL(season_days=30),
+    "news": FixedTTL(24)
+}
@@ -0,0 +1,945 @@
+"""
+Vectorized technical indicator engine.
+
+Computes SMA, EMA, RSI, MACD, Bollinger Bands, ATR, the stochastic oscillator
+and OBV from NumPy arrays in one pass over a price history. The full series are
+returned aligned with the input bars, together with a snapshot of the latest
+values and a trend/momentum summary.
+
+Every function works along the last axis, so the same code handles a single
+ticker (1-D arrays) and a tickers x dates panel (2-D arrays); IndicatorPanel
+builds such a panel for a whole universe of tickers. IndicatorState updates the
+same indicators incrementally, one bar at a time.
+
+Conventions follow TA-Lib: EMAs and Wilder averages (RSI, ATR) are seeded with
+the simple average of their first ``period`` values, Bollinger Bands use the
+population standard deviation and the stochastic is the slow stochastic (5, 3, 3).
+"""
+
+import logging
+from collections import deque
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SMA_WINDOWS = (20, 50, 200)
+EMA_WINDOWS = (20, 50, 200)
+RSI_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BBANDS_PERIOD, BBANDS_STDDEV = 20, 2.0
+ATR_PERIOD = 14
+STOCH_FASTK, STOCH_SLOWK, STOCH_SLOWD = 5, 3, 3
+
+# Number of series from which recursive averages step through time in NumPy
+# instead of using pandas' per-column ewm
+_PANEL_MIN_SERIES = 64
+
+# Snapshot keys used by the ETL pipeline and the GROQ prompts -> series names
+SNAPSHOT_KEYS = {
+    "SMA20": "sma20",
+    "SMA50": "sma50",
+    "SMA200": "sma200",
+    "RSI": "rsi",
+    "MACD": "macd",
+    "MACD_signal": "macd_signal",
+    "MACD_hist": "macd_hist",
+    "BB_upper": "bollinger_upper",
+    "BB_middle": "bollinger_middle",
+    "BB_lower": "bollinger_lower",
+    "ATR": "atr",
+    "Stoch_K": "stoch_k",
+    "Stoch_D": "stoch_d"
+}
+
+NEUTRAL_SUMMARY = {
+    "trend": "NEUTRAL",
+    "momentum": "NEUTRAL",
+    "volatility": "MEDIUM",
+    "trend_strength": "WEAK"
+}
+
+def _as_float(values):
+    """Convert input values to a float64 array."""
+    return np.asarray(values, dtype=np.float64)
+
+def _shift(values, periods=1):
+    """Shift values forward along the last axis, filling the gap with NaN."""
+    shifted = np.full_like(values, np.nan)
+    shifted[..., periods:] = values[..., :-periods]
+    return shifted
+
+def _rolling_reduce(values, window, combine):
+    """
+    Reduce trailing windows along the last axis (one result per bar from ``window - 1`` on).
+
+    Combines ``window`` shifted views element-wise instead of reducing a sliding
+    window view, which keeps memory access contiguous on wide panels.
+    """
+    length = values.shape[-1]
+    result = values[..., window - 1:]
+    for offset in range(1, window):
+        result = combine(result, values[..., window - 1 - offset:length - offset])
+    return result
+
+def _pad_front(values, window):
+    """Pad the output of a rolling reduction so it lines up with the input bars."""
+    pad = np.full(values.shape[:-1] + (window - 1,), np.nan)
+    return np.concatenate([pad, values], axis=-1)
+
+def sma(values, window):
+    """Simple moving average; NaN until ``window`` bars are available."""
+    values = _as_float(values)
+    if values.shape[-1] < window:
+        return np.full_like(values, np.nan)
+    # Window sums from running totals: O(n) regardless of the window length
+    valid = ~np.isnan(values)
+    pad = np.zeros(values.shape[:-1] + (1,))
+    totals = np.concatenate([pad, np.cumsum(np.where(valid, values, 0.0), axis=-1)], axis=-1)
+    counts = np.concatenate([pad, np.cumsum(valid, axis=-1)], axis=-1)
+    sums = totals[..., window:] - totals[..., :-window]
+    full = (counts[..., window:] - counts[..., :-window]) == window
+    return _pad_front(np.where(full, sums / window, np.nan), window)
+
+def _seeded_average(values, period, alpha):
+    """
+    Recursive moving average along the last axis.
+
+    The average starts at the bar where ``period`` values are first available,
+    seeded with their simple mean, and then follows
+    ``avg[t] = alpha * x[t] + (1 - alpha) * avg[t - 1]``. Leading NaNs (e.g. the
+    warm-up of an input indicator) are skipped per row.
+    """
+    values = _as_float(values)
+    data = np.atleast_2d(values).T  # time-major (dates x series)
+    length, count = data.shape
+
+    valid = ~np.isnan(data)
+    first = np.where(valid.any(axis=0), valid.argmax(axis=0), length)
+    seed_row = first + period - 1
+    rows = np.arange(length)[:, None]
+
+    seeded = np.where(rows > seed_row, data, np.nan)
+    columns = np.nonzero(seed_row < length)[0]
+    if columns.size:
+        cumulative = np.vstack([np.zeros((1, count)), np.cumsum(np.nan_to_num(data), axis=0)])
+        seeds = (cumulative[seed_row[columns] + 1, columns] - cumulative[first[columns], columns]) / period
+        seeded[seed_row[columns], columns] = seeds
+
+    if count < _PANEL_MIN_SERIES:
+        averaged = pd.DataFrame(seeded).ewm(alpha=alpha, adjust=False, ignore_na=True).mean().to_numpy()
+    else:
+        averaged = _recursive_average(seeded, alpha)
+    averaged[rows < seed_row] = np.nan
+    averaged[(rows > seed_row) & ~valid] = np.nan
+    return averaged.T.reshape(values.shape)
+
+def _recursive_average(data, alpha):
+    """
+    ``avg[t] = alpha * x[t] + (1 - alpha) * avg[t - 1]`` over time-major data.
+
+    Equivalent to ``ewm(alpha, adjust=False, ignore_na=True)``, but steps
+    through time with one vectorized update for all series, which is much
+    faster than pandas' per-column loop for wide panels.
+    """
+    averaged = np.empty_like(data)
+    previous = data[0].copy()
+    averaged[0] = previous
+    for row in range(1, len(data)):
+        values = data[row]
+        updated = alpha * values + (1 - alpha) * previous
+        previous = np.where(np.isnan(previous), values, np.where(np.isnan(values), previous, updated))
+        averaged[row] = previous
+    return averaged
+
+def ema(values, period):
+    """Exponential moving average with smoothing ``2 / (period + 1)``."""
+    return _seeded_average(values, period, 2.0 / (period + 1))
+
+def wilder_average(values, period):
+    """Wilder's smoothing (an EMA with smoothing ``1 / period``)."""
+    return _seeded_average(values, period, 1.0 / period)
+
+def rsi(close, period=RSI_PERIOD):
+    """Relative Strength Index using Wilder's smoothing of gains and losses."""
+    close = _as_float(close)
+    change = close - _shift(close)
+    gains = np.where(change > 0, change, 0.0)
+    losses = np.where(change < 0, -change, 0.0)
+    gains[np.isnan(change)] = np.nan
+    losses[np.isnan(change)] = np.nan
+
+    avg_gain = wilder_average(gains, period)
+    avg_loss = wilder_average(losses, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    # No losses in the window means RSI 100 (or 50 when the price did not move)
+    values = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), values)
+    return np.where(np.isnan(avg_gain) | np.isnan(avg_loss), np.nan, values)
+
+def macd(close, fast=MACD_FAST, slow=MACD_SLOW, signal=MACD_SIGNAL):
+    """MACD line, signal line and histogram."""
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+def bollinger_bands(close, period=BBANDS_PERIOD, num_std=BBANDS_STDDEV):
+    """Upper, middle and lower Bollinger Bands."""
+    close = _as_float(close)
+    if close.shape[-1] < period:
+        empty = np.full_like(close, np.nan)
+        return empty, empty.copy(), empty.copy()
+    middle = sma(close, period)
+    # Two-pass variance around each window's mean, exact for flat prices
+    length = close.shape[-1]
+    mean = middle[..., period - 1:]
+    squares = np.zeros_like(mean)
+    for offset in range(period):
+        squares += (close[..., period - 1 - offset:length - offset] - mean) ** 2
+    deviation = _pad_front(np.sqrt(squares / period), period)
+    return middle + num_std * deviation, middle, middle - num_std * deviation
+
+def true_range(high, low, close):
+    """True range; the first bar uses its high-low range."""
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    previous_close = _shift(close)
+    ranges = np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+    return np.where(np.isnan(previous_close), high - low, ranges)
+
+def atr(high, low, close, period=ATR_PERIOD):
+    """Average True Range using Wilder's smoothing (starting from the second bar)."""
+    ranges = true_range(high, low, close)
+    ranges[np.isnan(_shift(_as_float(close)))] = np.nan
+    return wilder_average(ranges, period)
+
+def stochastic(high, low, close, fastk_period=STOCH_FASTK, slowk_period=STOCH_SLOWK,
+               slowd_period=STOCH_SLOWD):
+    """Slow stochastic oscillator %K and %D."""
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    if close.shape[-1] < fastk_period:
+        empty = np.full_like(close, np.nan)
+        return empty, empty.copy()
+    highest = _pad_front(_rolling_reduce(high, fastk_period, np.maximum), fastk_period)
+    lowest = _pad_front(_rolling_reduce(low, fastk_period, np.minimum), fastk_period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fast_k = np.where(highest > lowest, 100.0 * (close - lowest) / (highest - lowest), 0.0)
+    fast_k[np.isnan(highest) | np.isnan(close)] = np.nan
+    slow_k = sma(fast_k, slowk_period)
+    slow_d = sma(slow_k, slowd_period)
+    return slow_k, slow_d
+
+def obv(close, volume):
+    """On-Balance Volume, starting from the first bar's volume."""
+    close, volume = _as_float(close), _as_float(volume)
+    direction = np.sign(close - _shift(close))
+    signed = np.where(np.isnan(direction), 0.0, direction) * np.nan_to_num(volume)
+    # The first bar of each series (after any leading NaNs) starts the running total
+    first = ~np.isnan(close) & np.isnan(_shift(close))
+    signed[first] = np.nan_to_num(volume[first])
+    values = np.cumsum(signed, axis=-1)
+    return np.where(np.isnan(close) & (np.cumsum(~np.isnan(close), axis=-1) == 0), np.nan, values)
+
+def compute_indicators(close, high=None, low=None, volume=None):
+    """
+    Compute every indicator from price arrays.
+
+    Args:
+        close: Closing prices (last axis is time)
+        high: Optional high prices, required for ATR and the stochastic
+        low: Optional low prices, required for ATR and the stochastic
+        volume: Optional volumes, required for OBV
+
+    Returns:
+        dict: Indicator name -> array with the same shape as ``close``
+    """
+    close = _as_float(close)
+    series = {}
+
+    for window in SMA_WINDOWS:
+        series[f"sma{window}"] = sma(close, window)
+    for window in EMA_WINDOWS:
+        series[f"ema{window}"] = ema(close, window)
+
+    series["rsi"] = rsi(close)
+    series["macd"], series["macd_signal"], series["macd_hist"] = macd(close)
+    series["bollinger_upper"], series["bollinger_middle"], series["bollinger_lower"] = bollinger_bands(close)
+
+    if high is not None and low is not None:
+        series["atr"] = atr(high, low, close)
+        series["stoch_k"], series["stoch_d"] = stochastic(high, low, close)
+    if volume is not None:
+        series["obv"] = obv(close, volume)
+    return series
+
+def _scalar(value):
+    """Convert a NumPy value to a float, mapping NaN to None."""
+    if value is None:
+        return None
+    value = float(value)
+    return None if np.isnan(value) else value
+
+def summarize(latest, close):
+    """
+    Summarize the latest indicator values.
+
+    Args:
+        latest: Latest value of each series (None when unavailable)
+        close: Latest closing price
+
+    Returns:
+        dict: trend, momentum, volatility and trend_strength labels
+    """
+    summary = dict(NEUTRAL_SUMMARY)
+    sma20, sma50, sma200 = latest.get("sma20"), latest.get("sma50"), latest.get("sma200")
+
+    # Trend
+    if close is not None and None not in (sma20, sma50, sma200):
+        if close > sma200 and sma20 > sma50:
+            summary["trend"] = "BULLISH"
+        elif close < sma200 and sma20 < sma50:
+            summary["trend"] = "BEARISH"
+
+    # Momentum
+    rsi_value = latest.get("rsi")
+    if rsi_value is not None:
+        if rsi_value > 70:
+            summary["momentum"] = "OVERBOUGHT"
+        elif rsi_value < 30:
+            summary["momentum"] = "OVERSOLD"
+        elif rsi_value > 50:
+            summary["momentum"] = "POSITIVE"
+        elif rsi_value < 50:
+            summary["momentum"] = "NEGATIVE"
+
+    # Volatility
+    atr_value = latest.get("atr")
+    if atr_value is not None and close:
+        atr_percent = atr_value / close * 100
+        if atr_percent > 3:
+            summary["volatility"] = "HIGH"
+        elif atr_percent < 1:
+            summary["volatility"] = "LOW"
+
+    # Trend strength
+    macd_value, macd_signal = latest.get("macd"), latest.get("macd_signal")
+    if macd_value is not None and macd_signal is not None:
+        macd_diff = abs(macd_value - macd_signal)
+        if macd_diff > 1:
+            summary["trend_strength"] = "STRONG"
+        elif macd_diff >= 0.2:
+            summary["trend_strength"] = "MODERATE"
+
+    return summary
+
+def calculate_technical_indicators(price_history):
+    """
+    Calculate the full indicator series for a price history.
+
+    Args:
+        price_history (pd.DataFrame): OHLCV data indexed by date
+
+    Returns:
+        dict: Indicator name -> NumPy array aligned with the price history
+    """
+    if price_history is None or price_history.empty:
+        return {}
+
+    def column(name):
+        return price_history[name].to_numpy(dtype=np.float64) if name in price_history else None
+
+    return compute_indicators(column("Close"), column("High"), column("Low"), column("Volume"))
+
+def analyze_price_history(price_history):
+    """
+    Calculate indicators for a price history with a snapshot and summary.
+
+    Args:
+        price_history (pd.DataFrame): OHLCV data indexed by date
+
+    Returns:
+        dict: ``series`` (DataFrame of every indicator indexed like the prices),
+        ``latest`` (latest value per series), ``indicators`` (latest values under
+        the pipeline's snapshot keys) and ``summary``
+    """
+    if price_history is None or price_history.empty:
+        return {
+            "series": pd.DataFrame(),
+            "latest": {},
+            "indicators": {},
+            "summary": dict(NEUTRAL_SUMMARY)
+        }
+
+    series = calculate_technical_indicators(price_history)
+    frame = pd.DataFrame(series, index=price_history.index)
+    frame.index.name = "Date"
+
+    latest = {name: _scalar(values[-1]) for name, values in series.items()}
+    close = _scalar(price_history["Close"].iloc[-1])
+    return {
+        "series": frame,
+        "latest": latest,
+        "indicators": {key: latest.get(name) for key, name in SNAPSHOT_KEYS.items()},
+        "summary": summarize(latest, close)
+    }
+
+
+# Incremental indicator state
+#
+# The classes below update every indicator in constant time per bar and can be
+# serialized to plain dictionaries, so the state can be persisted next to the
+# price cache and advanced by only the newly arrived bars. Fed the same bars,
+# they produce the same values as the batch functions above.
+
+class _IncrementalIndicator:
+    """Base class providing dictionary (de)serialization of indicator state."""
+
+    def to_dict(self):
+        """Serialize the state to JSON-compatible values."""
+        state = {}
+        for name, value in self.__dict__.items():
+            if isinstance(value, _IncrementalIndicator):
+                state[name] = value.to_dict()
+            elif isinstance(value, deque):
+                state[name] = {"items": list(value), "maxlen": value.maxlen}
+            elif isinstance(value, list):
+                state[name] = list(value)
+            else:
+                state[name] = value
+        return state
+
+    @classmethod
+    def _field_types(cls):
+        """Map each attribute to its nested state class, ``deque``, ``list`` or None."""
+        if "_fields" not in cls.__dict__:
+            cls._fields = {
+                name: type(value) if isinstance(value, (_IncrementalIndicator, deque, list)) else None
+                for name, value in cls().__dict__.items()
+            }
+        return cls._fields
+
+    @classmethod
+    def from_dict(cls, state):
+        """Restore a state serialized with ``to_dict``."""
+        instance = cls.__new__(cls)
+        for name, field_type in cls._field_types().items():
+            stored = state[name]
+            if field_type is deque:
+                stored = deque(stored["items"], maxlen=stored["maxlen"])
+            elif field_type is list:
+                stored = list(stored)
+            elif field_type is not None:
+                stored = field_type.from_dict(stored)
+            setattr(instance, name, stored)
+        return instance
+
+def _value(value):
+    """Map a not-yet-available value to NaN."""
+    return np.nan if value is None else value
+
+class SMAState(_IncrementalIndicator):
+    """Incremental simple moving average."""
+
+    def __init__(self, window=20):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.updates = 0
+
+    def update(self, value):
+        """Add a value and return the average (None until ``window`` values are seen)."""
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+
+        # Re-sum periodically so floating point error cannot accumulate
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self.total = float(sum(self.values))
+
+        if len(self.values) < self.window:
+            return None
+        return self.total / self.window
+
+class EMAState(_IncrementalIndicator):
+    """Incremental EMA seeded with the SMA of its first ``period`` values."""
+
+    def __init__(self, period=20, alpha=None):
+        self.period = period
+        self.alpha = alpha if alpha is not None else 2.0 / (period + 1)
+        self.seed = []
+        self.value = None
+
+    def update(self, value):
+        """Add a value and return the average (None during the warm-up)."""
+        if self.value is None:
+            self.seed.append(value)
+            if len(self.seed) == self.period:
+                self.value = sum(self.seed) / self.period
+                self.seed = []
+            return self.value
+        self.value = self.alpha * value + (1 - self.alpha) * self.value
+        return self.value
+
+def wilder_state(period):
+    """Incremental Wilder average (an EMA with smoothing ``1 / period``)."""
+    return EMAState(period, alpha=1.0 / period)
+
+class RSIState(_IncrementalIndicator):
+    """Incremental RSI with Wilder's smoothing."""
+
+    def __init__(self, period=RSI_PERIOD):
+        self.previous_close = None
+        self.gains = wilder_state(period)
+        self.losses = wilder_state(period)
+
+    def update(self, close):
+        """Add a closing price and return the RSI."""
+        previous, self.previous_close = self.previous_close, close
+        if previous is None:
+            return None
+        change = close - previous
+        avg_gain = self.gains.update(max(change, 0.0))
+        avg_loss = self.losses.update(max(-change, 0.0))
+        if avg_gain is None or avg_loss is None:
+            return None
+        if avg_loss == 0:
+            return 50.0 if avg_gain == 0 else 100.0
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+class MACDState(_IncrementalIndicator):
+    """Incremental MACD line, signal line and histogram."""
+
+    def __init__(self, fast=MACD_FAST, slow=MACD_SLOW, signal=MACD_SIGNAL):
+        self.fast = EMAState(fast)
+        self.slow = EMAState(slow)
+        self.signal = EMAState(signal)
+
+    def update(self, close):
+        """Add a closing price and return (macd, signal, histogram)."""
+        fast, slow = self.fast.update(close), self.slow.update(close)
+        if fast is None or slow is None:
+            return None, None, None
+        line = fast - slow
+        signal = self.signal.update(line)
+        return line, signal, None if signal is None else line - signal
+
+class BollingerState(_IncrementalIndicator):
+    """Incremental Bollinger Bands using a sliding-window mean and variance."""
+
+    def __init__(self, period=BBANDS_PERIOD, num_std=BBANDS_STDDEV):
+        self.period = period
+        self.num_std = num_std
+        self.values = deque(maxlen=period)
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.updates = 0
+
+    def update(self, close):
+        """Add a closing price and return (upper, middle, lower)."""
+        if len(self.values) < self.period:
+            # Welford's update while the window fills
+            self.values.append(close)
+            delta = close - self.mean
+            self.mean += delta / len(self.values)
+            self.m2 += delta * (close - self.mean)
+        else:
+            oldest = self.values[0]
+            self.values.append(close)
+            previous_mean = self.mean
+            self.mean += (close - oldest) / self.period
+            self.m2 += (close - oldest) * (close - self.mean + oldest - previous_mean)
+
+        # Recompute from the window periodically so rounding error cannot accumulate
+        self.updates += 1
+        if self.updates % self.period == 0:
+            window = np.fromiter(self.values, dtype=np.float64)
+            self.mean = float(window.mean())
+            self.m2 = float(((window - self.mean) ** 2).sum())
+
+        if len(self.values) < self.period:
+            return None, None, None
+        deviation = np.sqrt(max(self.m2, 0.0) / self.period)
+        return self.mean + self.num_std * deviation, self.mean, self.mean - self.num_std * deviation
+
+class ATRState(_IncrementalIndicator):
+    """Incremental Average True Range with Wilder's smoothing."""
+
+    def __init__(self, period=ATR_PERIOD):
+        self.previous_close = None
+        self.average = wilder_state(period)
+
+    def update(self, high, low, close):
+        """Add a bar and return the ATR."""
+        previous, self.previous_close = self.previous_close, close
+        if previous is None:
+            return None
+        true_range = max(high - low, abs(high - previous), abs(low - previous))
+        return self.average.update(true_range)
+
+class StochasticState(_IncrementalIndicator):
+    """Incremental slow stochastic oscillator."""
+
+    def __init__(self, fastk_period=STOCH_FASTK, slowk_period=STOCH_SLOWK, slowd_period=STOCH_SLOWD):
+        self.highs = deque(maxlen=fastk_period)
+        self.lows = deque(maxlen=fastk_period)
+        self.slow_k = SMAState(slowk_period)
+        self.slow_d = SMAState(slowd_period)
+
+    def update(self, high, low, close):
+        """Add a bar and return (%K, %D)."""
+        self.highs.append(high)
+        self.lows.append(low)
+        if len(self.highs) < self.highs.maxlen:
+            return None, None
+        highest, lowest = max(self.highs), min(self.lows)
+        fast_k = 100.0 * (close - lowest) / (highest - lowest) if highest > lowest else 0.0
+        slow_k = self.slow_k.update(fast_k)
+        if slow_k is None:
+            return None, None
+        return slow_k, self.slow_d.update(slow_k)
+
+class OBVState(_IncrementalIndicator):
+    """Incremental On-Balance Volume."""
+
+    def __init__(self):
+        self.previous_close = None
+        self.value = 0.0
+
+    def update(self, close, volume):
+        """Add a bar and return the OBV."""
+        volume = 0.0 if volume is None or np.isnan(volume) else float(volume)
+        if self.previous_close is None:
+            self.value = volume
+        elif close > self.previous_close:
+            self.value += volume
+        elif close < self.previous_close:
+            self.value -= volume
+        self.previous_close = close
+        return self.value
+
+class IndicatorState(_IncrementalIndicator):
+    """
+    Incremental state for every indicator of ``compute_indicators``.
+
+    ``update`` advances all indicators by one bar in constant time and returns
+    the values for that bar under the same names as the batch series.
+    """
+
+    def __init__(self):
+        self.sma = {str(window): SMAState(window) for window in SMA_WINDOWS}
+        self.ema = {str(window): EMAState(window) for window in EMA_WINDOWS}
+        self.rsi = RSIState()
+        self.macd = MACDState()
+        self.bollinger = BollingerState()
+        self.atr = ATRState()
+        self.stochastic = StochasticState()
+        self.obv = OBVState()
+        self.last_date = None
+        self.last_close = None
+        self.bars = 0
+
+    def to_dict(self):
+        """Serialize the state to JSON-compatible values."""
+        state = super().to_dict()
+        state["sma"] = {window: sma_state.to_dict() for window, sma_state in self.sma.items()}
+        state["ema"] = {window: ema_state.to_dict() for window, ema_state in self.ema.items()}
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        """Restore a state serialized with ``to_dict``."""
+        instance = super().from_dict(state)
+        instance.sma = {window: SMAState.from_dict(value) for window, value in state["sma"].items()}
+        instance.ema = {window: EMAState.from_dict(value) for window, value in state["ema"].items()}
+        return instance
+
+    def copy(self):
+        """Get an independent copy of the state."""
+        return IndicatorState.from_dict(self.to_dict())
+
+    def update(self, close, high=None, low=None, volume=None, date=None):
+        """
+        Advance every indicator by one bar.
+
+        Args:
+            close: Closing price of the bar
+            high: High price (defaults to the close)
+            low: Low price (defaults to the close)
+            volume: Traded volume
+            date: Optional bar date recorded as ``last_date``
+
+        Returns:
+            dict: Indicator name -> value for this bar (NaN during warm-up)
+        """
+        close = float(close)
+        high = close if high is None else float(high)
+        low = close if low is None else float(low)
+
+        values = {}
+        for window, sma_state in self.sma.items():
+            values[f"sma{window}"] = _value(sma_state.update(close))
+        for window, ema_state in self.ema.items():
+            values[f"ema{window}"] = _value(ema_state.update(close))
+        values["rsi"] = _value(self.rsi.update(close))
+        values["macd"], values["macd_signal"], values["macd_hist"] = map(_value, self.macd.update(close))
+        (values["bollinger_upper"], values["bollinger_middle"],
+         values["bollinger_lower"]) = map(_value, self.bollinger.update(close))
+        values["atr"] = _value(self.atr.update(high, low, close))
+        values["stoch_k"], values["stoch_d"] = map(_value, self.stochastic.update(high, low, close))
+        values["obv"] = self.obv.update(close, volume)
+
+        self.last_date = date
+        self.last_close = close
+        self.bars += 1
+        return values
+
+    def update_bars(self, price_history):
+        """
+        Advance the state by every bar of a price history.
+
+        Args:
+            price_history: DataFrame with a Close and optional High, Low and Volume column
+
+        Returns:
+            list: The indicator values of each bar, as returned by ``update``
+        """
+        columns = {name: price_history[name].to_numpy(dtype=np.float64)
+                   for name in ("High", "Low", "Volume") if name in price_history}
+        return self.update_arrays(price_history["Close"].to_numpy(dtype=np.float64),
+                                  dates=price_history.index, **{name.lower(): values
+                                                                for name, values in columns.items()})
+
+    def update_arrays(self, close, high=None, low=None, volume=None, dates=None):
+        """
+        Advance the state by a sequence of bars given as arrays.
+
+        Args:
+            close: Closing prices
+            high: Optional high prices
+            low: Optional low prices
+            volume: Optional volumes
+            dates: Optional bar dates (datetime-like or strings)
+
+        Returns:
+            list: The indicator values of each bar, as returned by ``update``
+        """
+        rows = []
+        for position in range(len(close)):
+            date = None if dates is None else dates[position]
+            rows.append(self.update(
+                close[position],
+                None if high is None else high[position],
+                None if low is None else low[position],
+                None if volume is None else volume[position],
+                date=date.isoformat() if hasattr(date, "isoformat") else date
+            ))
+        return rows
+
+    def update_frame(self, price_history):
+        """
+        Advance the state by every bar of a price history.
+
+        Returns:
+            pd.DataFrame: Indicator values for those bars, indexed like the prices
+        """
+        frame = pd.DataFrame(self.update_bars(price_history), index=price_history.index)
+        frame.index.name = "Date"
+        return frame
+
+def snapshot(values, close):
+    """
+    Build the ``latest``/``indicators``/``summary`` snapshot for one bar's values.
+
+    Args:
+        values: Indicator name -> value, e.g. from ``IndicatorState.update``
+        close: Closing price of the bar
+
+    Returns:
+        dict: The snapshot part of ``analyze_price_history``'s result
+    """
+    latest = {name: _scalar(value) for name, value in values.items()}
+    return {
+        "latest": latest,
+        "indicators": {key: latest.get(name) for key, name in SNAPSHOT_KEYS.items()},
+        "summary": summarize(latest, _scalar(close))
+    }
+
+
+# Cross-sectional panel
+
+SCREEN_OPERATORS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "!=": np.not_equal
+}
+
+class IndicatorPanel:
+    """
+    Indicators for a whole universe computed on tickers x dates arrays.
+
+    The price histories of all tickers are aligned on the union of their
+    trading dates and every indicator is computed along the time axis in one
+    pass. Dates missing inside a ticker's history (e.g. a holiday on another
+    exchange in a mixed universe) carry the previous close forward with zero
+    volume, so a panel per exchange gives exactly the per-ticker values.
+
+    Attributes:
+        tickers: Ticker symbols, one per row
+        dates: Trading dates (tz-naive, exchange-local), one per column
+        prices: Price field (close, high, low, volume) -> 2-D array
+        series: Indicator name -> 2-D array
+        last_position: Column of each ticker's latest bar
+    """
+
+    PRICE_FIELDS = ("Close", "High", "Low", "Volume")
+
+    def __init__(self, tickers, dates, prices):
+        self.tickers = list(tickers)
+        self.dates = pd.DatetimeIndex(dates, name="Date")
+        self.prices = prices
+        self.series = {}
+        if prices["close"].size:
+            self.series = compute_indicators(prices["close"], prices["high"], prices["low"], prices["volume"])
+
+        valid = ~np.isnan(prices["close"])
+        self.last_position = np.full(len(self.tickers), -1)
+        if valid.size:
+            self.last_position = np.where(valid.any(axis=1), valid.shape[1] - 1 - valid[:, ::-1].argmax(axis=1), -1)
+        self._latest = None
+
+    @classmethod
+    def from_histories(cls, histories):
+        """
+        Build a panel from per-ticker price histories.
+
+        Args:
+            histories: Dictionary mapping ticker symbol to an OHLCV DataFrame
+
+        Returns:
+            IndicatorPanel: Panel over the tickers with non-empty history
+        """
+        histories = {ticker: history for ticker, history in histories.items()
+                     if history is not None and not history.empty and "Close" in history}
+        days = {ticker: cls._trading_days(history.index) for ticker, history in histories.items()}
+        calendar = np.unique(np.concatenate(list(days.values()))) if days else np.array([], dtype=np.int64)
+        dates = pd.to_datetime(calendar, unit="D")
+
+        shape = (len(histories), len(dates))
+        prices = {field.lower(): np.full(shape, np.nan) for field in cls.PRICE_FIELDS}
+        for row, (ticker, history) in enumerate(histories.items()):
+            columns = np.searchsorted(calendar, days[ticker])
+            close = history["Close"].to_numpy(dtype=np.float64)
+            for field in cls.PRICE_FIELDS:
+                values = history[field].to_numpy(dtype=np.float64) if field in history else close
+                prices[field.lower()][row, columns] = values
+
+        cls._fill_gaps(prices)
+        return cls(histories.keys(), dates, prices)
+
+    @staticmethod
+    def _trading_days(index):
+        """Exchange-local trading dates of a history index as days since the epoch."""
+        if not isinstance(index, pd.DatetimeIndex):
+            index = pd.DatetimeIndex(index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        return index.values.astype("datetime64[D]").astype(np.int64)
+
+    @staticmethod
+    def _fill_gaps(prices):
+        """Carry the close forward over dates missing inside each ticker's history."""
+        close = prices["close"]
+        valid = ~np.isnan(close)
+        positions = np.arange(close.shape[1])
+        last_valid = np.maximum.accumulate(np.where(valid, positions, -1), axis=1)
+        remaining = valid[:, ::-1].cumsum(axis=1)[:, ::-1] > 0
+        gaps = ~valid & (last_valid >= 0) & remaining
+
+        carried = np.take_along_axis(close, np.maximum(last_valid, 0), axis=1)
+        for field in ("close", "high", "low"):
+            prices[field][gaps] = carried[gaps]
+        prices["volume"][gaps] = 0.0
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def latest(self):
+        """
+        Get the latest value of every indicator for each ticker.
+
+        Returns:
+            pd.DataFrame: One row per ticker with the ``date`` of its latest bar,
+            its ``close``, ``volume`` and every indicator series as columns
+        """
+        if self._latest is None:
+            available = self.last_position >= 0
+            rows = np.nonzero(available)[0]
+            positions = self.last_position[available]
+            columns = {"date": self.dates[positions]}
+            for name in ("close", "volume"):
+                columns[name] = self.prices[name][rows, positions]
+            for name, values in self.series.items():
+                columns[name] = values[rows, positions]
+
+            index = pd.Index([self.tickers[row] for row in rows], name="ticker")
+            self._latest = pd.DataFrame(columns, index=index)
+        return self._latest
+
+    def series_frame(self, name):
+        """
+        Get one indicator (or price field) for every ticker and date.
+
+        Args:
+            name: Indicator series name (e.g. ``rsi``) or price field (e.g. ``close``)
+
+        Returns:
+            pd.DataFrame: Dates x tickers
+        """
+        values = self.series[name] if name in self.series else self.prices[name]
+        return pd.DataFrame(values.T, index=self.dates, columns=self.tickers)
+
+    def history(self, ticker):
+        """
+        Get every indicator series of one ticker.
+
+        Returns:
+            pd.DataFrame: Indicator series indexed by date, from the ticker's
+            first to its latest bar
+        """
+        row = self.tickers.index(ticker)
+        first = int(np.argmax(~np.isnan(self.prices["close"][row])))
+        frame = pd.DataFrame({name: values[row] for name, values in self.series.items()}, index=self.dates)
+        frame.index.name = "Date"
+        return frame.iloc[first:self.last_position[row] + 1]
+
+    def screen(self, conditions):
+        """
+        Select the tickers whose latest values meet every condition.
+
+        Args:
+            conditions: Iterable of ``(left, operator, right)`` tuples. ``left``
+                is a column of ``latest()``, ``operator`` one of SCREEN_OPERATORS
+                and ``right`` a number or another column,
+                e.g. ``[("rsi", "<", 30), ("close", ">", "sma200")]``
+
+        Returns:
+            pd.DataFrame: The rows of ``latest()`` matching all conditions
+        """
+        latest = self.latest()
+        mask = np.ones(len(latest), dtype=bool)
+        for left, operator, right in conditions:
+            if operator not in SCREEN_OPERATORS:
+                raise ValueError(f"Unsupported screen operator: {operator}")
+            if left not in latest:
+                raise ValueError(f"Unknown screen field: {left}")
+            if isinstance(right, str):
+                if right not in latest:
+                    raise ValueError(f"Unknown screen field: {right}")
+                right = latest[right].to_numpy(dtype=np.float64)
+            # Comparisons with NaN (indicator still warming up) never match
+            mask &= SCREEN_OPERATORS[operator](latest[left].to_numpy(dtype=np.float64), right)
+        return latest[mask]
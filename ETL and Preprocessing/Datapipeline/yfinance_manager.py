@@ -2,9 +2,22 @@ import logging
 import yfinance as yf
 import pandas as pd
 import time
-import ta
+from .technical_indicators import calculate_technical_indicators as compute_indicator_series
 
 class YFinanceManager:
+    # Indicator names returned by calculate_technical_indicators -> engine series
+    INDICATOR_NAMES = {
+        'SMA_20': 'sma20',
+        'SMA_50': 'sma50',
+        'SMA_200': 'sma200',
+        'RSI': 'rsi',
+        'MACD': 'macd',
+        'MACD_signal': 'macd_signal',
+        'MACD_diff': 'macd_hist',
+        'ATR': 'atr',
+        'OBV': 'obv'
+    }
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         
@@ -69,30 +82,12 @@ class YFinanceManager:
             if price_history.empty:
                 return {"summary": "No price data available"}
                 
-            # Initialize technical analysis indicators
-            ta_data = {}
-            
-            # Moving averages
-            ta_data['SMA_20'] = ta.trend.sma_indicator(price_history['Close'], window=20)
-            ta_data['SMA_50'] = ta.trend.sma_indicator(price_history['Close'], window=50)
-            ta_data['SMA_200'] = ta.trend.sma_indicator(price_history['Close'], window=200)
-            
-            # Momentum indicators
-            ta_data['RSI'] = ta.momentum.rsi(price_history['Close'], window=14)
-            macd = ta.trend.MACD(price_history['Close'])
-            ta_data['MACD'] = macd.macd()
-            ta_data['MACD_signal'] = macd.macd_signal()
-            ta_data['MACD_diff'] = macd.macd_diff()
-            
-            # Volatility indicators
-            ta_data['ATR'] = ta.volatility.average_true_range(
-                price_history['High'],
-                price_history['Low'],
-                price_history['Close']
-            )
-            
-            # Volume indicators
-            ta_data['OBV'] = ta.volume.on_balance_volume(price_history['Close'], price_history['Volume'])
+            # Compute every indicator in one vectorized pass
+            series = compute_indicator_series(price_history)
+            ta_data = {
+                name: pd.Series(series[key], index=price_history.index)
+                for name, key in self.INDICATOR_NAMES.items() if key in series
+            }
             
             # Get latest values
             latest = {k: v.iloc[-1] if isinstance(v, pd.Series) else v for k, v in ta_data.items()}
@@ -1,9 +1,15 @@
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
 from datetime import datetime, timedelta
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
+import functools
+import gzip
+import hashlib
 import logging
 import random
+import threading
 import os
 import sys
 import time  # Make sure time import is not removed or commented out
@@ -12,6 +18,12 @@ import time  # Make sure time import is not removed or commented out
 sys.modules['time'] = time
 globals()['time'] = time
 
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
 from Datapipeline.etl import FinancialDataETL
 from Datapipeline.ConfigManager import ConfigManager
 
@@ -39,6 +51,238 @@ def sleep(seconds):
     """Wrapper for time.sleep to ensure availability"""
     time.sleep(seconds)
 
+def indicators_payload(indicators, include_series=False):
+    """Convert a technical indicator result to a JSON-serializable dictionary."""
+    payload = {
+        'indicators': indicators.get('indicators', {}),
+        'latest': indicators.get('latest', {}),
+        'summary': indicators.get('summary', {})
+    }
+    series = indicators.get('series')
+    if include_series and series is not None and not series.empty:
+        payload['dates'] = [index.strftime('%Y-%m-%d') for index in series.index]
+        payload['series'] = {
+            column: [None if pd.isna(value) else float(value) for value in series[column]]
+            for column in series.columns
+        }
+    return payload
+
+class ResponseCache:
+    """
+    In-memory cache of endpoint responses with stale-while-revalidate.
+    
+    A cached response younger than the endpoint's ``fresh_seconds`` is served
+    as is. An older one is still served immediately while it is younger than
+    ``max_stale_seconds``, and a background worker recomputes it so the next
+    request gets fresh data; past that bound the request waits for a new
+    response. Only successful (200) responses are cached, except placeholder
+    data marked by ``fallback_response``, and a failed refresh keeps serving
+    the stale response until the bound.
+    """
+    
+    def __init__(self, enabled=True, max_entries=1024, workers=4):
+        """
+        Initialize the response cache.
+        
+        Args:
+            enabled: Serve from the cache; when False every request is computed
+            max_entries: Maximum number of responses kept (least recently used are evicted)
+            workers: Number of background refresh threads
+        """
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="response-refresh")
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+    
+    def cached(self, fresh_seconds, max_stale_seconds):
+        """
+        Decorate a view function so that its responses are served from the cache.
+        
+        Args:
+            fresh_seconds: Age up to which a response is served without refreshing
+            max_stale_seconds: Age up to which a stale response is still served
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(**kwargs):
+                # Direct calls from other views bypass the cache
+                if not self.enabled or request.endpoint != view.__name__:
+                    return view(**kwargs)
+                
+                key = (request.endpoint, request.method, tuple(sorted(kwargs.items())),
+                       request.query_string, request.get_data())
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        self._entries.move_to_end(key)
+                age = time.time() - entry["cached_at"] if entry is not None else None
+                
+                if age is not None and age < fresh_seconds:
+                    self._count("hits")
+                    return self._response(entry, "HIT", age)
+                if age is not None and age < max_stale_seconds:
+                    self._count("stale_hits")
+                    self._schedule_refresh(key, view, kwargs)
+                    return self._response(entry, "STALE", age)
+                
+                self._count("misses")
+                response = app.make_response(view(**kwargs))
+                self._store(key, response)
+                response.headers["X-Cache"] = "MISS"
+                return response
+            return wrapper
+        return decorator
+    
+    def _schedule_refresh(self, key, view, kwargs):
+        """Recompute a stale response in the background (once per key at a time)."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        request_args = dict(path=request.path, method=request.method, query_string=request.query_string,
+                            data=request.get_data(), content_type=request.content_type)
+        self._executor.submit(self._refresh, key, view, kwargs, request_args)
+    
+    def _refresh(self, key, view, kwargs, request_args):
+        """Rerun a view for a copy of the original request and store the result."""
+        try:
+            with app.test_request_context(**request_args):
+                response = app.make_response(view(**kwargs))
+            if self._store(key, response):
+                self._count("refreshes")
+            else:
+                self._count("refresh_errors")
+                logger.warning(f"Refresh of {request_args['path']} was not cacheable "
+                               f"(status {response.status_code}, {response.headers.get('X-Data-Source', 'upstream')} data)")
+        except Exception as e:
+            self._count("refresh_errors")
+            logger.error(f"Error refreshing {request_args['path']}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+    
+    def _store(self, key, response):
+        """Cache a successful response of real data; return whether it was stored."""
+        if (response.status_code != 200 or response.direct_passthrough
+                or response.headers.get("X-Data-Source") == "fallback"):
+            return False
+        entry = {
+            "body": response.get_data(),
+            "mimetype": response.mimetype,
+            "headers": {name: value for name, value in response.headers.items() if name.startswith("X-")},
+            "cached_at": time.time()
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+    
+    def _response(self, entry, state, age):
+        """Build a response from a cache entry."""
+        headers = {**entry["headers"], "X-Cache": state, "Age": str(int(age))}
+        return Response(entry["body"], mimetype=entry["mimetype"], headers=headers)
+    
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+    
+    def stats(self):
+        """Get the number of cached responses and the hit, stale and refresh counters."""
+        with self._lock:
+            return {"enabled": self.enabled, "entries": len(self._entries),
+                    "refreshing": len(self._refreshing), **self._stats}
+
+# Stale-while-revalidate for the data endpoints (STALE_WHILE_REVALIDATE=false disables it)
+response_cache = ResponseCache(
+    enabled=os.getenv("STALE_WHILE_REVALIDATE", "true").lower() not in ("0", "false", "no")
+)
+
+def fallback_response(data):
+    """
+    JSON response of placeholder data served when upstream data is unavailable.
+    
+    The ``X-Data-Source: fallback`` header keeps it out of the response cache, so
+    the next request tries the upstream again.
+    """
+    response = jsonify(data)
+    response.headers["X-Data-Source"] = "fallback"
+    return response
+
+# (fresh seconds, maximum staleness in seconds) of the cached responses
+PRICE_RESPONSE_TTL = (60, 15 * 60)
+FUNDAMENTALS_RESPONSE_TTL = (15 * 60, 24 * 3600)
+NEWS_RESPONSE_TTL = (15 * 60, 6 * 3600)
+ANALYSIS_RESPONSE_TTL = (3600, 24 * 3600)
+
+# JSON bodies smaller than this are sent uncompressed
+COMPRESSION_MIN_BYTES = 1024
+# Compressed bodies kept by (ETag, encoding), so a cached response is compressed once
+COMPRESSED_BODY_ENTRIES = 256
+_compressed_bodies = OrderedDict()
+_compressed_bodies_lock = threading.Lock()
+
+def wants_columnar(body=None):
+    """Check whether the client asked for columnar time series (?format=columnar or "format" in the body)."""
+    requested = request.args.get('format') or (body or {}).get('format') or 'records'
+    return str(requested).lower() == 'columnar'
+
+def response_encoding():
+    """Pick brotli or gzip from the request's Accept-Encoding (None to send the body as is)."""
+    if BROTLI_AVAILABLE and request.accept_encodings['br']:
+        return 'br'
+    if request.accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+def compressed_body(etag, body, encoding):
+    """Compress a response body, reusing the result for repeated responses with the same ETag."""
+    key = (etag, encoding)
+    with _compressed_bodies_lock:
+        if key in _compressed_bodies:
+            _compressed_bodies.move_to_end(key)
+            return _compressed_bodies[key]
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=5)
+    else:
+        compressed = gzip.compress(body, compresslevel=6)
+    with _compressed_bodies_lock:
+        _compressed_bodies[key] = compressed
+        while len(_compressed_bodies) > COMPRESSED_BODY_ENTRIES:
+            _compressed_bodies.popitem(last=False)
+    return compressed
+
+@app.after_request
+def finalize_json_response(response):
+    """
+    Tag successful JSON responses with an ETag, answer a matching If-None-Match
+    with 304 Not Modified, and compress large bodies with brotli or gzip.
+    
+    Only GET and HEAD requests are answered with 304 (RFC 7232, section 3.2).
+    """
+    if (response.status_code != 200 or response.direct_passthrough or not response.is_json
+            or 'Content-Encoding' in response.headers):
+        return response
+    body = response.get_data()
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    response.set_etag(etag, weak=True)
+    response.vary.add('Accept-Encoding')
+    
+    if request.method in ('GET', 'HEAD') and request.if_none_match.contains_weak(etag):
+        headers = {name: value for name, value in response.headers.items()
+                   if name in ('ETag', 'Vary') or name.startswith('X-')}
+        return Response(status=304, headers=headers)
+    
+    encoding = response_encoding() if len(body) >= COMPRESSION_MIN_BYTES else None
+    if encoding:
+        response.set_data(compressed_body(etag, body, encoding))
+        response.headers['Content-Encoding'] = encoding
+    return response
+
 # Make time available to all routes
 @app.before_request
 def before_request():
@@ -49,8 +293,14 @@ def before_request():
         etl_pipeline.yfinance_manager.time = time
 
 @app.route('/valuation_ratios', methods=['POST'])
+@response_cache.cached(*PRICE_RESPONSE_TTL)
 def get_valuation_ratios():
-    """Get valuation ratios and time series data for a stock."""
+    """
+    Get valuation ratios and time series data for a stock.
+    
+    With format=columnar the time series is returned as
+    {"dates": [...], "Open": [...], ...} instead of one object per date.
+    """
     try:
         data = request.get_json()
         if not data:
@@ -84,15 +334,21 @@ def get_valuation_ratios():
         
         if history is not None and not history.empty:
             # Convert history to time series format
-            for index, row in history.iterrows():
-                date_str = index.strftime('%Y-%m-%d')
-                time_series_ratios[date_str] = {
-                    'Open': float(row['Open']),
-                    'High': float(row['High']),
-                    'Low': float(row['Low']),
-                    'Close': float(row['Close']),
-                    'Volume': int(row['Volume']),
-                    'StockPrice': float(row['Close'])
+            dates = history.index.strftime('%Y-%m-%d').tolist()
+            close = history['Close'].astype(float).tolist()
+            columns = {
+                'Open': history['Open'].astype(float).tolist(),
+                'High': history['High'].astype(float).tolist(),
+                'Low': history['Low'].astype(float).tolist(),
+                'Close': close,
+                'Volume': history['Volume'].astype('int64').tolist(),
+                'StockPrice': close
+            }
+            if wants_columnar(data):
+                time_series_ratios = {'dates': dates, **columns}
+            else:
+                time_series_ratios = {
+                    date: dict(zip(columns, values)) for date, values in zip(dates, zip(*columns.values()))
                 }
         
         # Get latest data for overview
@@ -125,6 +381,7 @@ def get_valuation_ratios():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/company_overview/<ticker>', methods=['GET'])
+@response_cache.cached(*FUNDAMENTALS_RESPONSE_TTL)
 def get_company_overview(ticker):
     """Get detailed company overview."""
     try:
@@ -220,6 +477,7 @@ def get_company_overview(ticker):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/peer_comparison/<ticker>', methods=['GET'])
+@response_cache.cached(*FUNDAMENTALS_RESPONSE_TTL)
 def get_peer_comparison(ticker):
     """Get peer comparison data."""
     try:
@@ -316,12 +574,13 @@ def get_peer_comparison(ticker):
                     'evEbitda': 25.3
                 }
             ]
+            return fallback_response(peer_data)
                 
         return jsonify(peer_data)
         
     except Exception as e:
         logger.error(f"Error fetching peer comparison: {e}")
-        return jsonify([
+        return fallback_response([
             {
                 'name': 'AAPL',
                 'cmp': 175.50,
@@ -349,6 +608,7 @@ def get_peer_comparison(ticker):
         ])
 
 @app.route('/quarterly_results/<ticker>', methods=['GET'])
+@response_cache.cached(*FUNDAMENTALS_RESPONSE_TTL)
 def get_quarterly_results(ticker):
     """Get quarterly financial results."""
     try:
@@ -472,6 +732,7 @@ def get_quarterly_results(ticker):
                     'profit': float(profit)
                 }
                 quarterly_data.append(quarter_data)
+            return fallback_response(quarterly_data)
                 
         return jsonify(quarterly_data)
         
@@ -480,6 +741,7 @@ def get_quarterly_results(ticker):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/shareholding_pattern/<ticker>', methods=['GET'])
+@response_cache.cached(*FUNDAMENTALS_RESPONSE_TTL)
 def get_shareholding_pattern(ticker):
     """Get shareholding pattern data."""
     try:
@@ -572,6 +834,7 @@ def get_shareholding_pattern(ticker):
                 holding_data[1]['promoters'] = 12.8
                 holding_data[1]['fils'] = 44.1
                 holding_data[1]['public'] = 43.0
+            return fallback_response(holding_data)
         
         return jsonify(holding_data)
         
@@ -580,6 +843,7 @@ def get_shareholding_pattern(ticker):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/cash_flow/<ticker>', methods=['GET'])
+@response_cache.cached(*FUNDAMENTALS_RESPONSE_TTL)
 def get_cash_flow(ticker):
     """Get cash flow data."""
     try:
@@ -683,6 +947,7 @@ def get_cash_flow(ticker):
                     'net': float((base_operating + base_investing + base_financing) * year_factor)
                 }
                 cash_flow_data.append(flow_data)
+            return fallback_response(cash_flow_data)
         
         return jsonify(cash_flow_data)
         
@@ -691,6 +956,7 @@ def get_cash_flow(ticker):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/balance_sheet/<ticker>', methods=['GET'])
+@response_cache.cached(*FUNDAMENTALS_RESPONSE_TTL)
 def get_balance_sheet(ticker):
     """Get balance sheet data."""
     try:
@@ -795,6 +1061,7 @@ def get_balance_sheet(ticker):
                     'fixedAssets': float(base_assets * year_factor)
                 }
                 balance_sheet_data.append(sheet_data)
+            return fallback_response(balance_sheet_data)
         
         return jsonify(balance_sheet_data)
         
@@ -803,8 +1070,14 @@ def get_balance_sheet(ticker):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/stock_price/<ticker>', methods=['GET'])
+@response_cache.cached(*PRICE_RESPONSE_TTL)
 def get_stock_price(ticker):
-    """Get historical stock price data."""
+    """
+    Get historical stock price data.
+    
+    With ?format=columnar the prices are returned as {"dates": [...], "value": [...], "volume": [...]}
+    instead of one object per date.
+    """
     try:
         # Handle placeholder symbol
         if ticker == ':symbol':
@@ -817,22 +1090,25 @@ def get_stock_price(ticker):
         if duration not in valid_durations:
             return jsonify({'error': f'Invalid duration. Must be one of: {", ".join(valid_durations)}'}), 400
             
-        company_data = etl_pipeline.yfinance_manager.get_ticker_data(ticker)
+        company_data = etl_pipeline.yfinance_manager.get_ticker_data(ticker, prefetch=("history",))
         
         if not company_data:
             return jsonify({'error': 'Company not found'}), 404
             
         history = company_data.get('history')
-        price_data = []
-        
-        if history is not None and not history.empty:
-            for index, row in history.iterrows():
-                price_data.append({
-                    'date': index.strftime('%d %b %Y'),
-                    'value': float(row['Close']),
-                    'volume': int(row['Volume'])
-                })
-                
+        if history is None or history.empty:
+            return jsonify({'dates': [], 'value': [], 'volume': []} if wants_columnar() else [])
+        
+        dates = history.index.strftime('%d %b %Y').tolist()
+        values = history['Close'].astype(float).tolist()
+        volumes = history['Volume'].astype('int64').tolist()
+        if wants_columnar():
+            return jsonify({'dates': dates, 'value': values, 'volume': volumes})
+        
+        price_data = [
+            {'date': date, 'value': value, 'volume': volume}
+            for date, value, volume in zip(dates, values, volumes)
+        ]
         return jsonify(price_data)
         
     except Exception as e:
@@ -840,17 +1116,19 @@ def get_stock_price(ticker):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/technical_indicators/<ticker>', methods=['GET'])
+@response_cache.cached(*PRICE_RESPONSE_TTL)
 def get_technical_indicators(ticker):
     """Get technical indicators for a stock."""
     try:
-        company_data = etl_pipeline.yfinance_manager.get_ticker_data(ticker)
+        company_data = etl_pipeline.yfinance_manager.get_ticker_data(ticker, prefetch=("history",))
         if not company_data:
             return jsonify({'error': 'Company not found'}), 404
             
         history = company_data.get('history')
         if history is not None and not history.empty:
-            indicators = etl_pipeline.yfinance_manager.calculate_technical_indicators(history)
-            return jsonify(indicators)
+            indicators = etl_pipeline.yfinance_manager.calculate_technical_indicators(history, ticker)
+            include_series = request.args.get('series', 'false').lower() in ('1', 'true', 'yes')
+            return jsonify(indicators_payload(indicators, include_series))
         
         return jsonify({'error': 'No historical data available'}), 404
         
@@ -858,7 +1136,39 @@ def get_technical_indicators(ticker):
         logger.error(f"Error calculating technical indicators: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/screen', methods=['POST'])
+@response_cache.cached(*PRICE_RESPONSE_TTL)
+def screen_stocks():
+    """Screen a universe of stocks on their latest technical indicators."""
+    try:
+        data = request.json or {}
+        tickers = data.get('tickers', [])
+        if not tickers:
+            return jsonify({'error': 'No tickers provided'}), 400
+        
+        # Conditions are [left, operator, right] triples, e.g. ["rsi", "<", 30]
+        conditions = [tuple(condition) for condition in data.get('conditions', [])]
+        panel = etl_pipeline.build_indicator_panel(tickers, data.get('exchange'))
+        try:
+            matches = panel.screen(conditions)
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
+        
+        matches = matches.assign(date=matches['date'].dt.strftime('%Y-%m-%d')).astype(object)
+        return jsonify({
+            'universe': len(panel),
+            'matches': [
+                {'ticker': ticker, **{column: None if pd.isna(value) else value for column, value in row.items()}}
+                for ticker, row in matches.iterrows()
+            ]
+        })
+        
+    except Exception as e:
+        logger.error(f"Error screening stocks: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/company_news/<ticker>', methods=['GET'])
+@response_cache.cached(*NEWS_RESPONSE_TTL)
 def get_company_news(ticker):
     """Get recent news for a company."""
     try:
@@ -870,6 +1180,7 @@ def get_company_news(ticker):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/investment_thesis/<ticker>', methods=['GET'])
+@response_cache.cached(*ANALYSIS_RESPONSE_TTL)
 def get_investment_thesis(ticker):
     """Get AI-generated investment thesis."""
     try:
@@ -920,11 +1231,13 @@ def get_investment_thesis(ticker):
             'timestamp': thesis.get('timestamp', datetime.now().isoformat())
         }
         
+        if not all(thesis.get(field) for field in ('fundamental_analysis', 'news_impact', 'investment_thesis')):
+            return fallback_response(default_thesis)
         return jsonify(default_thesis)
         
     except Exception as e:
         logger.error(f"Error generating investment thesis: {e}")
-        return jsonify({
+        return fallback_response({
             'ticker': ticker,
             'company_name': ticker,
             'fundamental_analysis': f'Error: {str(e)}',
@@ -942,7 +1255,7 @@ def get_stock_prediction(ticker):
             ticker = 'AAPL'
             
         # Get historical data to base prediction on
-        company_data = etl_pipeline.yfinance_manager.get_ticker_data(ticker)
+        company_data = etl_pipeline.yfinance_manager.get_ticker_data(ticker, prefetch=("history",))
         if not company_data:
             return jsonify({'error': 'Company not found'}), 404
             
@@ -978,6 +1291,7 @@ def get_stock_prediction(ticker):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/generate_stock_report/<ticker>', methods=['GET'])
+@response_cache.cached(*ANALYSIS_RESPONSE_TTL)
 def generate_stock_report(ticker):
     """Generate a comprehensive AI analysis report for a stock."""
     try:
@@ -1003,7 +1317,7 @@ def generate_stock_report(ticker):
         technical_data = None
         history = company_data.get('history')
         if history is not None and not history.empty:
-            technical_data = etl_pipeline.yfinance_manager.calculate_technical_indicators(history)
+            technical_data = etl_pipeline.yfinance_manager.calculate_technical_indicators(history, ticker)
         
         # Financial statements 
         balance_sheet = company_data.get('balance_sheet')
@@ -1113,7 +1427,7 @@ def generate_stock_report(ticker):
                 'revenue': info.get('totalRevenue', 'N/A'),
                 'profit_margin': info.get('profitMargins', 'N/A')
             },
-            'technical_analysis': technical_data or {},
+            'technical_analysis': indicators_payload(technical_data) if technical_data else {},
             'investment_thesis': investment_thesis or {},
             'balance_sheet_summary': {} if balance_sheet is None or not isinstance(balance_sheet, pd.DataFrame) else balance_sheet.iloc[-1].to_dict(),
             'income_statement_summary': {} if income_stmt is None or not isinstance(income_stmt, pd.DataFrame) else income_stmt.iloc[-1].to_dict(),
@@ -1409,6 +1723,24 @@ def generate_text_report(ticker):
         logger.error(f"Error generating stock report: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/cache_stats', methods=['GET'])
+def get_cache_stats():
+    """Get hit/miss and memory statistics for the ticker data and response caches."""
+    try:
+        return jsonify({**etl_pipeline.yfinance_manager.cache_stats(), 'responses': response_cache.stats()})
+    except Exception as e:
+        logger.error(f"Error fetching cache stats: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/rate_limit_stats', methods=['GET'])
+def get_rate_limit_stats():
+    """Get queue depth and wait-time metrics for each rate-limited API."""
+    try:
+        return jsonify(etl_pipeline.rate_limiter.metrics())
+    except Exception as e:
+        logger.error(f"Error fetching rate limit stats: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/download_report/<filename>', methods=['GET'])
 def download_report(filename):
     """Download a previously generated stock report file."""
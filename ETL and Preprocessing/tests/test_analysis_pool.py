@@ -0,0 +1,56 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+from Datapipeline import etl as etl_module
+from Datapipeline.etl import FinancialDataETL, _frame_to_arrays, _arrays_to_frame
+
+def make_etl(executor):
+    """Build a FinancialDataETL with only the analysis settings initialised"""
+    etl = FinancialDataETL.__new__(FinancialDataETL)
+    etl.analysis_executor = executor
+    etl.analysis_workers = 2
+    etl._analysis_pool = None
+    etl._analysis_pool_lock = threading.Lock()
+    return etl
+
+def _pid_task(arrays):
+    return os.getpid(), _arrays_to_frame(arrays)["Close"].sum()
+
+def test_frame_arrays_round_trip_keeps_index_and_dtypes():
+    """Test that frames sent to analysis workers come back with their index and dtypes"""
+    index = pd.date_range("2024-01-01", periods=4, tz="Asia/Kolkata", name="Date")
+    frame = pd.DataFrame({
+        "Close": [1.0, 2.0, np.nan, 4.0],
+        "Volume": np.arange(4, dtype=np.int64),
+        "Dividends": 0.0
+    }, index=index)
+
+    arrays = _frame_to_arrays(frame, FinancialDataETL.OHLCV_COLUMNS)
+
+    assert list(arrays["columns"]) == ["Close", "Volume"]
+    pd.testing.assert_frame_equal(_arrays_to_frame(arrays), frame[["Close", "Volume"]], check_freq=False)
+
+def test_analysis_pool_runs_tasks_in_worker_processes():
+    """Test that process mode runs CPU tasks in reusable worker processes"""
+    etl = make_etl("process")
+    frame = pd.DataFrame({"Close": [1.0, 2.0, 3.0]}, index=pd.date_range("2024-01-01", periods=3))
+    try:
+        results = [etl._run_in_analysis_pool(_pid_task, _frame_to_arrays(frame)) for _ in range(4)]
+    finally:
+        etl.shutdown_analysis_pool()
+
+    pids = {pid for pid, _ in results}
+    assert os.getpid() not in pids
+    assert len(pids) <= 2
+    assert all(total == 6.0 for _, total in results)
+    assert etl._analysis_pool is None
+
+def test_analysis_worker_resources_are_created_once():
+    """Test that worker models are loaded once and reused across tasks"""
+    created = []
+    etl_module._init_analysis_worker()
+    for _ in range(3):
+        etl_module._analysis_worker_resource("model", lambda: created.append(1) or object())
+    assert created == [1]
+    etl_module._init_analysis_worker()
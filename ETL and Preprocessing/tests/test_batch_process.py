@@ -0,0 +1,144 @@
+import time
+import asyncio
+import threading
+import pandas as pd
+from Datapipeline.etl import ConfigManager, FinancialDataETL
+
+def make_etl(fetch_delay=0.05, store_delay=0.0):
+    """Build a FinancialDataETL whose per-ticker steps are local stand-ins"""
+    etl = FinancialDataETL.__new__(FinancialDataETL)
+    etl.config_manager = ConfigManager()
+    etl.analysis_executor = "thread"
+    etl.active = {"fetch": 0, "store": 0}
+    etl.peak = {"fetch": 0, "store": 0}
+    lock = threading.Lock()
+
+    def track(kind, delay):
+        with lock:
+            etl.active[kind] += 1
+            etl.peak[kind] = max(etl.peak[kind], etl.active[kind])
+        time.sleep(delay)
+        with lock:
+            etl.active[kind] -= 1
+
+    def fetch(ticker, exchange, full_refresh=False):
+        if ticker == "MISSING":
+            return None
+        if ticker == "SLOW":
+            time.sleep(0.5)
+        track("fetch", fetch_delay)
+        return {"info": {"shortName": ticker}}, pd.DataFrame()
+
+    etl._scrape_ir_documents = lambda ticker, exchange: None
+    etl._fetch_market_data = fetch
+    etl._compute_technical_indicators = lambda ticker, history, exchange=None: None
+    etl._fetch_news = lambda ticker: []
+    etl._store_company_data = lambda *args: track("store", store_delay)
+    return etl
+
+def test_run_batch_process_runs_tickers_concurrently():
+    """Test that the batch engine overlaps tickers up to max_threads and reports a summary"""
+    etl = make_etl(fetch_delay=0.1)
+    tickers = [f"T{i}" for i in range(12)]
+
+    start = time.monotonic()
+    summary = asyncio.run(etl.run_batch_process(tickers, max_concurrency=4))
+    elapsed = time.monotonic() - start
+
+    assert summary["success"] == 12
+    assert summary["failure"] == 0
+    assert set(summary["results"]) == set(tickers)
+    assert etl.peak["fetch"] == 4
+    assert elapsed < 0.9  # 12 tickers x 100 ms sequentially would take 1.2s
+
+def test_run_batch_process_bounds_each_upstream():
+    """Test that an upstream semaphore limits concurrent calls independently of max_threads"""
+    etl = make_etl(fetch_delay=0.0, store_delay=0.05)
+    etl.config_manager.set("processing.upstream_concurrency", {"neo4j": 1})
+
+    summary = asyncio.run(etl.run_batch_process([f"T{i}" for i in range(6)], max_concurrency=6))
+
+    assert summary["success"] == 6
+    assert etl.peak["store"] == 1
+
+def test_run_batch_process_reports_failures_and_timeouts():
+    """Test that missing tickers and tickers over the timeout are counted as failures"""
+    etl = make_etl(fetch_delay=0.0)
+
+    summary = asyncio.run(etl.run_batch_process(["OK", "MISSING", "SLOW", "OK"], ticker_timeout=0.2))
+
+    assert summary["total"] == 3
+    assert summary["success"] == 1
+    assert summary["failure"] == 2
+    assert summary["timeout"] == 1
+    assert summary["results"] == {"OK": "success", "MISSING": "failure", "SLOW": "timeout"}
+    assert summary["stages"]["fetch"]["timed_out_steps"] == 1
+    assert summary["stages"]["fetch"]["abandoned_running"] == 1  # the SLOW fetch thread is still sleeping
+
+def test_queue_waits_do_not_count_against_the_timeout():
+    """Test that tickers queued behind slow stores are not timed out by the backpressure"""
+    etl = make_etl(fetch_delay=0.0, store_delay=0.1)
+    etl.config_manager.set("processing.upstream_concurrency", {"neo4j": 1})
+    etl.config_manager.set("processing.pipeline_queue_size", 1)
+
+    summary = asyncio.run(etl.run_batch_process([f"T{i}" for i in range(6)], max_concurrency=3,
+                                                ticker_timeout=0.3))
+
+    # The last store starts about 0.5s after the batch, well past a per-ticker deadline
+    assert summary["success"] == 6
+    assert summary["timeout"] == 0
+
+def test_pipeline_overlaps_stages_and_applies_backpressure():
+    """Test that fetching continues during slow stores but never runs more than the queues allow ahead"""
+    etl = make_etl(fetch_delay=0.02, store_delay=0.05)
+    etl.config_manager.set("processing.upstream_concurrency", {"neo4j": 1})
+    etl.config_manager.set("processing.pipeline_queue_size", 1)
+    fetched, stored, ahead = [], [], []
+    fetch_market_data, store_company_data = etl._fetch_market_data, etl._store_company_data
+
+    def fetch(ticker, exchange, full_refresh=False):
+        fetched.append(ticker)
+        ahead.append(len(fetched) - len(stored))
+        return fetch_market_data(ticker, exchange, full_refresh)
+
+    def store(ticker, *args):
+        store_company_data(ticker, *args)
+        stored.append(ticker)
+
+    etl._fetch_market_data = fetch
+    etl._store_company_data = store
+
+    summary = asyncio.run(etl.run_batch_process([f"T{i}" for i in range(20)], max_concurrency=2))
+
+    assert summary["success"] == 20
+    assert summary["stages"]["store"]["workers"] == 1
+    assert summary["stages"]["analyze"]["max_queue"] <= 1
+    assert summary["stages"]["store"]["max_queue"] <= 1
+    # fetch workers + analyze workers + one slot per queue + the store worker
+    assert max(ahead) <= 2 + 2 + 1 + 1 + 1
+    # 1s of stores and 0.4s of fetches overlap instead of adding up
+    assert summary["elapsed_seconds"] < 1.3
+
+def test_fetch_news_reuses_sentiment_scored_at_fetch_time():
+    """Test that news scored when it was fetched is not sent through FinBERT again"""
+    etl = FinancialDataETL.__new__(FinancialDataETL)
+    scored = {"headline": "Results beat", "sentiment_score": 0.9, "sentiment": "POSITIVE"}
+    unscored = {"headline": "Plant shut"}
+    etl.get_company_news = lambda ticker: [scored, unscored]
+    sent, aggregated = [], []
+
+    class Analyzer:
+        def analyze_news(self, items):
+            sent.extend(items)
+            return [dict(item, sentiment_score=-0.8, sentiment="NEGATIVE") for item in items]
+
+        def get_aggregate_sentiment(self, items):
+            aggregated.extend(items)
+            return {}
+
+    etl.news_analyzer = Analyzer()
+    etl.analyze_news_sentiment = etl.news_analyzer.analyze_news
+
+    assert etl._fetch_news("TCS") == [scored, unscored]
+    assert sent == [unscored]
+    assert [item["sentiment_score"] for item in aggregated] == [0.9, -0.8]
@@ -0,0 +1,264 @@
+import os
+import time
+import pytest
+import numpy as np
+import pandas as pd
+from Datapipeline.etl import DataCache, MemoryCache, YFinanceManager
+from Datapipeline.market_calendar import FixedTTL
+
+def test_memory_cache_ttl_and_counters():
+    """Test that entries expire after their TTL and lookups are counted"""
+    cache = MemoryCache(default_ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+
+    assert cache.get("a") == 1
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["expirations"] == 1
+
+def test_memory_cache_lru_eviction_by_size():
+    """Test that the least recently used entry is evicted when over budget"""
+    cache = MemoryCache(max_bytes=2000)
+    cache.set("a", "x" * 500)
+    cache.set("b", "y" * 500)
+    cache.set("c", "z" * 500)
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("d", "w" * 500)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size_bytes"] <= 2000
+
+def test_data_cache_frame_round_trip(tmp_path):
+    """Test that frames keep their timezone-aware index and dtypes on disk"""
+    cache = DataCache(cache_dir=str(tmp_path))
+    index = pd.date_range("2024-01-01", periods=3, tz="Asia/Kolkata")
+    frame = pd.DataFrame({"Close": [1.0, 2.0, np.nan], "Volume": [10, 20, 30]}, index=index)
+
+    cache.save_frame("TCS.NS", "history", frame)
+    restored = cache.get_frame("TCS.NS", "history")
+
+    assert restored.index.equals(frame.index)
+    assert restored["Volume"].dtype == frame["Volume"].dtype
+    pd.testing.assert_frame_equal(restored, frame, check_freq=False)
+
+def test_yfinance_manager_serves_repeat_requests_from_cache(tmp_path):
+    """Test that repeated get_ticker_data calls only fetch upstream once per field"""
+    calls = []
+    history = pd.DataFrame({"Close": [1.0, 2.0]}, index=pd.date_range("2024-01-01", periods=2))
+    values = {"info": {"shortName": "Test"}, "history": history}
+
+    def fake_fetch(ticker, field):
+        calls.append(field)
+        return values.get(field, {})
+
+    manager = YFinanceManager(data_cache=DataCache(cache_dir=str(tmp_path)))
+    manager._fetch_field = fake_fetch
+
+    for _ in range(3):
+        data = manager.get_ticker_data("TEST")
+        assert data["info"]["shortName"] == "Test"
+        assert not data["history"].empty
+    assert calls == ["info", "history"]
+
+    # A new manager sharing the same disk cache does not hit upstream either
+    second = YFinanceManager(data_cache=DataCache(cache_dir=str(tmp_path)))
+    second._fetch_field = fake_fetch
+    assert second.get_ticker_data("TEST")["history"]["Close"].tolist() == [1.0, 2.0]
+    assert calls == ["info", "history"]
+
+def test_disk_hits_stay_in_memory_only_for_their_remaining_validity(tmp_path):
+    """Test that a nearly stale disk entry is not held in memory for a whole new TTL"""
+    cache = DataCache(cache_dir=str(tmp_path), ttl_policies={"yf_info": FixedTTL(1)})
+    cache.save("TEST", "yf_info", {"shortName": "Test"})
+    saved_at = time.time() - 50 * 60
+    os.utime(tmp_path / "TEST_yf_info.json", (saved_at, saved_at))
+
+    manager = YFinanceManager(data_cache=cache)
+    manager._fetch_field = lambda ticker, field: pytest.fail("info should come from the disk cache")
+    assert manager.get_ticker_data("TEST")["info"] == {"shortName": "Test"}
+
+    expires_at = manager.memory_cache._entries[("TEST", "info")][1]
+    assert 9 * 60 < expires_at - manager.memory_cache._now() <= 10 * 60
+
+def test_ticker_data_fetches_fields_lazily():
+    """Test that only the accessed fields are fetched and dict-style access still works"""
+    calls = []
+
+    def fake_fetch(ticker, field):
+        calls.append(field)
+        return {"info": {"sector": "Technology"}}.get(field, {})
+
+    manager = YFinanceManager()
+    manager._fetch_field = fake_fetch
+
+    data = manager.get_ticker_data("LAZY")
+    assert calls == ["info"]
+    assert "balance_sheet" in data
+    assert data.get("peers") is None
+    assert calls == ["info"]
+
+    assert data.get("info", {}).get("sector") == "Technology"
+    assert data["financials"] == {}
+    assert calls == ["info", "financials"]
+    assert data.loaded_fields == ["info", "financials"]
+
+def test_get_ticker_data_returns_none_when_prefetch_is_empty():
+    """Test that a ticker without info is reported as not found"""
+    manager = YFinanceManager()
+    manager._fetch_field = lambda ticker, field: {}
+    assert manager.get_ticker_data("MISSING") is None
+
+def test_bulk_history_splits_download_and_fills_cache():
+    """Test that a grouped download is split per ticker and served from cache afterwards"""
+    index = pd.date_range("2024-01-01", periods=3, tz="America/New_York")
+    columns = pd.MultiIndex.from_product([["AAPL", "TCS.NS"], ["Close", "Volume"]])
+    frame = pd.DataFrame(np.arange(12, dtype=float).reshape(3, 4), index=index, columns=columns)
+    frame.loc[index[1], ("TCS.NS", slice(None))] = np.nan  # exchange holiday
+    downloads = []
+
+    def fake_download(ticker_symbols, period):
+        downloads.append(list(ticker_symbols))
+        return frame
+
+    manager = YFinanceManager()
+    manager._download = fake_download
+
+    histories = manager.get_bulk_history(["AAPL", "TCS.NS", "AAPL"])
+    assert downloads == [["AAPL", "TCS.NS"]]
+    assert len(histories["AAPL"]) == 3
+    assert len(histories["TCS.NS"]) == 2
+    assert histories["TCS.NS"]["Volume"].dtype == np.int64
+
+    manager._fetch_field = lambda ticker, field: pytest.fail("history should come from cache")
+    assert len(manager.get_ticker_data("AAPL", prefetch=("history",))["history"]) == 3
+    manager.get_bulk_history(["AAPL", "TCS.NS"])
+    assert len(downloads) == 1
+
+def test_refresh_history_fetches_only_bars_after_watermark(tmp_path):
+    """Test that a second refresh only asks Yahoo for bars since the last stored bar"""
+    index = pd.date_range("2024-01-01", periods=30, tz="Asia/Kolkata")
+    upstream = pd.DataFrame({"Close": np.arange(30.0), "Dividends": 0.0, "Stock Splits": 0.0}, index=index)
+    requests = []
+
+    class FakeTicker:
+        def __init__(self, symbol):
+            pass
+
+        def history(self, period=None, start=None):
+            requests.append(period or start)
+            if period:
+                return upstream.iloc[:20]
+            return upstream[upstream.index >= pd.Timestamp(start, tz="Asia/Kolkata")]
+
+    # Stored history goes stale at once, so every refresh asks Yahoo for new bars
+    cache = DataCache(cache_dir=str(tmp_path), ttl_policies={"yf_history": FixedTTL(0)})
+    manager = YFinanceManager(data_cache=cache)
+    manager.yf = type("FakeYF", (), {"Ticker": FakeTicker})
+
+    assert len(manager.refresh_history("TCS.NS")) == 20
+    manager.memory_cache.clear()
+    history = manager.refresh_history("TCS.NS")
+
+    assert requests == ["1y", "2024-01-20"]
+    assert len(history) == 30
+    assert not history.index.duplicated().any()
+    assert str(manager.data_cache.get_watermark("TCS.NS", "cache")) == "2024-01-30"
+
+    # A dividend after the watermark forces a full re-sync
+    upstream.loc[index[-1] + pd.Timedelta(days=1)] = [30.0, 1.0, 0.0]
+    manager.memory_cache.clear()
+    manager.refresh_history("TCS.NS")
+    assert requests[-2:] == ["2024-01-30", "1y"]
+
+def test_refresh_history_serves_fresh_history_without_fetching(tmp_path):
+    """Test that history still valid under its TTL policy makes no history calls"""
+    index = pd.date_range("2024-01-01", periods=20, tz="Asia/Kolkata")
+    stored = pd.DataFrame({"Close": np.arange(20.0), "Dividends": 0.0, "Stock Splits": 0.0}, index=index)
+    requests = []
+
+    class FakeTicker:
+        def __init__(self, symbol):
+            pass
+
+        def history(self, period=None, start=None):
+            requests.append(period or start)
+            return stored
+
+    cache = DataCache(cache_dir=str(tmp_path), ttl_policies={"yf_history": FixedTTL(24)})
+    cache.save_frame("TCS.NS", "yf_history", stored)
+    cache.set_watermark("TCS.NS", "cache", index[-1].date())
+    manager = YFinanceManager(data_cache=cache)
+    manager.yf = type("FakeYF", (), {"Ticker": FakeTicker})
+
+    # From disk, then from memory
+    for _ in range(2):
+        assert len(manager.refresh_history("TCS.NS")) == 20
+    assert requests == []
+
+    manager.refresh_history("TCS.NS", full_refresh=True)
+    assert requests == ["1y"]
+
+@pytest.mark.parametrize("frame_format,memory_map", [("parquet", False), ("arrow", True), ("json", False)])
+def test_data_cache_columnar_formats(tmp_path, frame_format, memory_map):
+    """Test that history and statement frames round-trip through each storage format"""
+    pytest.importorskip("pyarrow")
+    cache = DataCache(cache_dir=str(tmp_path), frame_format=frame_format, memory_map=memory_map)
+    history = pd.DataFrame(
+        {"Close": [1.5, 2.5], "Volume": [100, 200]},
+        index=pd.DatetimeIndex(pd.date_range("2024-03-01", periods=2, tz="America/New_York"), name="Date")
+    )
+    statement = pd.DataFrame(
+        [[1e9, 2e9], [3e8, np.nan]],
+        index=["Total Revenue", "Net Income"],
+        columns=pd.to_datetime(["2023-12-31", "2022-12-31"])
+    )
+
+    cache.save_frame("AAPL", "yf_history", history)
+    cache.save_frame("AAPL", "yf_financials", statement)
+
+    assert (tmp_path / f"AAPL_yf_history.{frame_format}").exists()
+    pd.testing.assert_frame_equal(cache.get_frame("AAPL", "yf_history"), history, check_freq=False)
+    pd.testing.assert_frame_equal(cache.get_frame("AAPL", "yf_financials"), statement)
+
+    # Scalar payloads stay JSON regardless of the frame format
+    cache.save("AAPL", "yf_info", {"shortName": "Apple"})
+    assert (tmp_path / "AAPL_yf_info.json").exists()
+
+def test_concurrent_requests_share_one_upstream_fetch():
+    """Test that concurrent requests for the same ticker field are coalesced"""
+    import threading
+    calls = []
+    release = threading.Event()
+
+    def slow_fetch(ticker, field):
+        calls.append(field)
+        release.wait(timeout=5)
+        return {"shortName": "Coalesced"}
+
+    manager = YFinanceManager()
+    manager._fetch_field = slow_fetch
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(manager.get_ticker_data("HERD")["info"]))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while manager.inflight.stats()["coalesced"] < 7 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["info"]
+    assert [result["shortName"] for result in results] == ["Coalesced"] * 8
+    assert manager.cache_stats()["inflight"] == {"in_flight": 0, "executed": 1, "coalesced": 7}
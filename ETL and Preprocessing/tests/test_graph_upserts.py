@@ -0,0 +1,358 @@
+import asyncio
+import re
+from unittest import mock
+import numpy as np
+import pandas as pd
+from Datapipeline import database as database_module
+from Datapipeline.async_database import AsyncNeo4jDatabase
+from Datapipeline.database import Neo4jDatabase
+
+class FakeGraph:
+    """Driver stand-in that applies UNWIND batches to in-memory nodes keyed by their MERGE/MATCH properties"""
+
+    def __init__(self):
+        self.nodes = {}
+        self.batches = []
+        self.transactions = []
+        self.results = []
+
+    def session(self, **config):
+        return self
+
+    def execute_write(self, work, *args):
+        self.transactions.append("write")
+        return work(self, *args)
+
+    def execute_read(self, work, *args):
+        self.transactions.append("read")
+        return work(self, *args)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        # Closing a session consumes its open results, as the driver does
+        for result in self.results:
+            result.consumed = True
+        return False
+
+    def run(self, query, params):
+        clause, label, keys = re.search(r"(MERGE|MATCH) \(\w+:(\w+) \{(.*?)\}\)", query.split("UNWIND")[-1]).groups()
+        key_names = re.findall(r"(\w+):", keys)
+        written = created = 0
+        for row in params["rows"]:
+            values = {**params, **row}
+            key = (label,) + tuple(values[name] for name in key_names)
+            if clause == "MERGE":
+                created += key not in self.nodes
+                self.nodes[key] = dict(row)
+            elif key in self.nodes:
+                self.nodes[key].update(row["indicators"])
+            else:
+                continue
+            written += 1
+        self.batches.append(len(params["rows"]))
+        self.results.append(FakeResult(written, created))
+        return self.results[-1]
+
+class FakeResult:
+    def __init__(self, upserted, created):
+        self.upserted, self.created = upserted, created
+        self.consumed = False
+
+    def __iter__(self):
+        if self.consumed:
+            raise RuntimeError("result consumed")
+        return iter([{"rows": self.upserted}])
+
+    def single(self):
+        if self.consumed:
+            raise RuntimeError("result consumed")
+        return {"rows": self.upserted}
+
+    def consume(self):
+        counters = type("Counters", (), {"nodes_created": self.created})
+        return type("Summary", (), {"counters": counters})
+
+class FakeAsyncGraph:
+    """Async driver stand-in that applies the statements to a FakeGraph, yielding to the event loop on each"""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.in_flight = self.max_in_flight = 0
+
+    def session(self, **config):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute_write(self, work, *args):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return await work(self, *args)
+        finally:
+            self.in_flight -= 1
+
+    async def run(self, query, params):
+        await asyncio.sleep(0)
+        return FakeAsyncResult(self.graph.run(query, params))
+
+class FakeAsyncResult:
+    def __init__(self, result):
+        self.result = result
+
+    def __aiter__(self):
+        async def records():
+            for record in self.result:
+                yield record
+        return records()
+
+    async def consume(self):
+        return self.result.consume()
+
+def make_database():
+    database = Neo4jDatabase()
+    database.driver = FakeGraph()
+    return database
+
+def test_price_upserts_are_idempotent_and_batched(monkeypatch):
+    """Test that re-storing bars matches the existing Price nodes in UNWIND batches"""
+    monkeypatch.setattr(database_module, "UPSERT_BATCH_SIZE", 100)
+    database = make_database()
+    index = pd.date_range("2024-01-01", periods=250, tz="Asia/Kolkata", name="Date")
+    bars = pd.DataFrame({"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": np.arange(250.0),
+                         "Volume": np.arange(250)}, index=index)
+    bars.iloc[3, 0] = np.nan
+
+    assert database.create_stock_data_nodes("TCS.NS", bars) == {"created": 250, "matched": 0}
+    assert database.driver.batches == [100, 100, 50]
+
+    # An incremental run re-sends the last stored bar along with the new one
+    next_bar = bars.iloc[-1:].set_axis(index[-1:] + pd.Timedelta(days=1))
+    assert database.create_stock_data_nodes("TCS.NS", pd.concat([bars.iloc[-1:], next_bar])) == \
+        {"created": 1, "matched": 1}
+
+    row = database.driver.nodes[("Price", "TCS.NS", "2024-01-04")]
+    assert row["open"] is None and isinstance(row["volume"], int)
+
+def test_news_filings_and_statements_use_natural_keys():
+    """Test that news, filings and statements are matched on deterministic keys"""
+    database = make_database()
+    news = [{"headline": "Q4 results", "link": "https://example.com/a", "date": "2024-04-12"},
+            {"headline": "No link", "link": "", "date": "12 Apr"}]
+    filings = [{"type": "10-K", "filing_date": "2024-02-01", "url": "https://sec.gov/x", "accessionNumber": "0001"},
+               {"type": "8-K", "filing_date": None, "url": "https://sec.gov/y"}]
+    statement = pd.DataFrame({"Total Revenue": [1e9, 2e9], "Net Income": [np.nan, 3e8]},
+                             index=pd.to_datetime(["2023-03-31", "2024-03-31"]))
+
+    for _ in range(2):
+        news_counts = database.store_news("TCS.NS", news)
+        filing_counts = database.store_company_filings("TCS.NS", filings)
+        statement_counts = database.store_financial_statements("TCS.NS", {"income_statement": statement})
+    assert news_counts == {"created": 0, "matched": 2}
+    assert filing_counts == {"created": 0, "matched": 2}
+    assert statement_counts == {"IncomeStatement": {"created": 0, "matched": 2}}
+    assert len(database.driver.nodes) == 6
+
+    assert database.driver.nodes[("IncomeStatement", "TCS.NS", "2023-03-31")]["items"] == {"Total Revenue": 1e9}
+    assert news[1]["date"] == "12 Apr"  # input items are not modified
+
+def test_technical_indicators_accept_series_and_snapshots(monkeypatch):
+    """Test that indicator frames, analysis results and snapshots update Price nodes in batches"""
+    monkeypatch.setattr(database_module, "UPSERT_BATCH_SIZE", 100)
+    database = make_database()
+    index = pd.date_range("2024-01-01", periods=150, tz="America/New_York", name="Date")
+    database.create_stock_data_nodes("AAPL", pd.DataFrame({"Close": 1.0, "Volume": 10}, index=index))
+    database.driver.batches.clear()
+
+    series = pd.DataFrame({"sma20": np.arange(150.0), "rsi": 50.0, "Close": 1.0}, index=index)
+    series.iloc[:19, 0] = np.nan
+    assert database.store_technical_indicators("AAPL", {"series": series, "latest": {}}) == 150
+    assert database.driver.batches == [100, 50]
+
+    first = database.driver.nodes[("Price", "AAPL", "2024-01-01")]
+    assert "sma20" not in first and first["rsi"] == 50.0 and first["close"] == 1.0
+
+    snapshot = {"latest": {"sma20": 200.0, "macd": np.nan}, "date": index[-1].isoformat()}
+    assert database.store_technical_indicators("AAPL", snapshot) == 1
+    last = database.driver.nodes[("Price", "AAPL", "2024-05-29")]
+    assert last["sma20"] == 200.0 and "macd" not in last
+
+def test_transcript_segments_are_written_in_one_query_with_stable_ids():
+    """Test that all segments go out in one query whose IDs only depend on their position"""
+    database = make_database()
+    queries = []
+    database.write_query = lambda query, params=None: queries.append((query, params))
+    transcript = {"date": "2024-04-12", "segments": [
+        {"speaker": "CEO", "content": "Opening remarks"},
+        {"speaker": "CFO", "content": "Financials"},
+        {"speaker": "Analyst", "role": "Analyst", "content": "Question"}
+    ]}
+
+    for _ in range(2):
+        assert database.store_transcript("TCS.NS", transcript)
+    segment_queries = [params for query, params in queries if "UNWIND $segments" in query]
+    assert len(segment_queries) == 2
+    assert segment_queries[0] == segment_queries[1]
+
+    rows = segment_queries[0]["segments"]
+    assert [row["id"] for row in rows] == [f"TCS.NS_transcript_2024-04-12_seg_{i:04d}" for i in range(3)]
+    assert [row["ordinal"] for row in rows] == [0, 1, 2]
+    assert rows[0]["role"] == "Unknown" and rows[2]["role"] == "Analyst"
+
+def test_statements_share_one_managed_transaction():
+    """Test that batched statements run in a single write transaction and reads use read transactions"""
+    database = make_database()
+    rows = [{"ticker": "TCS.NS", "date": "2024-01-01"}]
+    query = "UNWIND $rows AS row MERGE (p:Price {ticker: row.ticker, date: row.date}) RETURN count(*) AS rows"
+
+    results = database.run_transaction([(query, {"rows": rows}), (query, {"rows": rows + rows})])
+    assert database.driver.transactions == ["write"]
+    assert [result.single()["rows"] for result in results] == [1, 2]
+    assert results[1].consume().counters.nodes_created == 0
+
+    assert database.read_query(query, {"rows": rows}).data() == [{"rows": 1}]
+    assert database.driver.transactions == ["write", "read"]
+
+def test_run_query_results_stay_readable_after_the_session_closes():
+    """Test that run_query buffers its records in a retried write transaction before the session is closed"""
+    database = make_database()
+    rows = [{"ticker": "TCS.NS", "date": "2024-01-01"}]
+    query = "UNWIND $rows AS row MERGE (p:Price {ticker: row.ticker, date: row.date}) RETURN count(*) AS rows"
+
+    result = database.run_query(query, {"rows": rows})
+    assert database.driver.transactions == ["write"]
+    assert all(driver_result.consumed for driver_result in database.driver.results)
+    assert [record["rows"] for record in result] == [1]
+    assert result.single() == {"rows": 1}
+    assert result.consume().counters.nodes_created == 1
+
+def test_async_client_runs_the_same_operations_concurrently():
+    """Test that the async client upserts like the blocking one with several tickers in flight"""
+    database = AsyncNeo4jDatabase()
+    database.driver = FakeAsyncGraph(FakeGraph())
+    index = pd.date_range("2024-01-01", periods=5, name="Date")
+    bars = pd.DataFrame({"Close": np.arange(5.0), "Volume": 10}, index=index)
+    tickers = ["TCS.NS", "INFY.NS", "AAPL"]
+
+    async def store(ticker):
+        news = [{"headline": f"{ticker} results", "link": f"https://example.com/{ticker}", "date": "2024-04-12"}]
+        return (await database.create_stock_data_nodes(ticker, bars), await database.store_news(ticker, news))
+
+    async def run_twice():
+        first = await asyncio.gather(*(store(ticker) for ticker in tickers))
+        return first, await asyncio.gather(*(store(ticker) for ticker in tickers))
+
+    first, second = asyncio.run(run_twice())
+    assert first == [({"created": 5, "matched": 0}, {"created": 1, "matched": 0})] * 3
+    assert second == [({"created": 0, "matched": 5}, {"created": 0, "matched": 1})] * 3
+    assert len(database.driver.graph.nodes) == 18
+    assert database.driver.max_in_flight == len(tickers)
+
+def test_async_client_round_trips_a_company_through_managed_transactions():
+    """Test that the async client writes a company in a write transaction and reads it back in a read one"""
+    companies, transactions = {}, []
+
+    async def run(query, params):
+        if query.strip().startswith("MERGE (c:Company"):
+            companies.setdefault(params["ticker"], {"ticker": params["ticker"]}).update(params["properties"])
+        result = mock.MagicMock()
+        result.__aiter__.return_value = [{"c": companies[params["ticker"]]}] if params["ticker"] in companies else []
+        result.consume = mock.AsyncMock()
+        return result
+
+    tx = mock.Mock(run=mock.AsyncMock(side_effect=run))
+
+    class Session:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+        async def execute_write(self, work, *args):
+            transactions.append("write")
+            return await work(tx, *args)
+
+        async def execute_read(self, work, *args):
+            transactions.append("read")
+            return await work(tx, *args)
+
+    driver = mock.Mock(close=mock.AsyncMock())
+    driver.session.side_effect = lambda **config: Session()
+    database = AsyncNeo4jDatabase(database="graph")
+    database.driver = driver
+
+    async def round_trip():
+        await database.create_company_node("TCS.NS", {"name": "TCS", "sector": "Technology"})
+        company = await database.get_company_by_ticker("TCS.NS")
+        missing = await database.get_company_by_ticker("INFY.NS")
+        await database.close()
+        return company, missing
+
+    assert asyncio.run(round_trip()) == ({"ticker": "TCS.NS", "name": "TCS", "sector": "Technology"}, None)
+    assert transactions == ["write", "read", "read"]
+    driver.session.assert_called_with(database="graph")
+    driver.close.assert_awaited_once()
+    assert database.driver is None
+
+def test_async_client_sends_the_same_statements_as_the_blocking_one():
+    """Test that the async operations run the blocking client's Cypher with the same parameters"""
+    operations = [
+        ("create_sector_node", ("Technology", {"company_count": 2})),
+        ("connect_company_to_sector", ("TCS.NS", "Technology")),
+        ("store_financial_ratios", ("TCS.NS", {"pe": 25.0})),
+        ("store_report", ("TCS", {"title": "Annual report", "url": "https://example.com/ar"})),
+        ("store_sector_report", ("Technology", {"title": "Outlook", "date": "2024-04-01"})),
+        ("store_analysis", ("TCS.NS", {"investment_thesis": "Hold", "timestamp": "2024-04-12T00:00:00"})),
+        ("store_sentiment_analysis", ("TCS.NS", {"average_score": 0.4})),
+        ("store_peer_comparison", ("TCS.NS", {"metrics": {"pe": 25.0},
+                                              "peers": [{"ticker": "INFY.NS", "similarity": 0.9}, {"ticker": "TCS.NS"}]})),
+        ("store_document", ("TCS.NS", {"type": "annual_report", "date": "2024-03-31", "title": "AR 2024"})),
+        ("store_transcript", ("TCS.NS", {"date": "2024-04-12", "segments": [{"speaker": "CEO", "content": "Hello"}]})),
+    ]
+
+    def scrub(params):
+        # Creation times differ between the two runs
+        params = dict(params or {})
+        if "properties" in params:
+            params["properties"] = {k: v for k, v in params["properties"].items() if k != "last_updated"}
+        return params
+
+    blocking = make_database()
+    expected = []
+    blocking.write_query = lambda query, params=None: expected.append((query, scrub(params)))
+    for name, args in operations:
+        getattr(blocking, name)(*args)
+
+    sent = []
+
+    async def run(query, params):
+        sent.append((query, scrub(params)))
+        result = mock.MagicMock()
+        result.__aiter__.return_value = []
+        result.consume = mock.AsyncMock()
+        return result
+
+    async def execute_write(work, *args):
+        return await work(tx, *args)
+
+    tx = mock.Mock(run=mock.AsyncMock(side_effect=run))
+    session = mock.MagicMock()
+    session.__aenter__.return_value = session
+    session.execute_write = mock.AsyncMock(side_effect=execute_write)
+    database = AsyncNeo4jDatabase()
+    database.driver = mock.Mock(session=mock.Mock(return_value=session))
+
+    async def run_all():
+        return [await getattr(database, name)(*args) for name, args in operations]
+
+    results = asyncio.run(run_all())
+    assert not any(result is None or result is False for result in results)
+    assert sent == expected
+    assert session.execute_write.await_count == len(expected) == 12
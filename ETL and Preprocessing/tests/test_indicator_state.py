@@ -0,0 +1,70 @@
+import json
+import numpy as np
+import pandas as pd
+from Datapipeline.etl import DataCache, YFinanceManager
+from Datapipeline.technical_indicators import IndicatorState, analyze_price_history, compute_indicators
+
+def make_history(periods=300, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, periods))
+    close[periods // 7:periods // 5] = close[periods // 7]  # flat stretch
+    return pd.DataFrame({
+        "High": close + rng.random(periods),
+        "Low": close - rng.random(periods),
+        "Close": close,
+        "Volume": rng.integers(1_000, 100_000, periods).astype(float)
+    }, index=pd.date_range("2023-01-02", periods=periods, tz="Asia/Kolkata", name="Date"))
+
+def test_incremental_state_matches_batch_after_round_trip():
+    """Test that a restored state continues to produce the batch indicator values"""
+    history = make_history()
+    state = IndicatorState()
+    head = state.update_frame(history.iloc[:150])
+    restored = IndicatorState.from_dict(json.loads(json.dumps(state.to_dict())))
+    incremental = pd.concat([head, restored.update_frame(history.iloc[150:])])
+
+    batch = compute_indicators(history["Close"].to_numpy(), history["High"].to_numpy(),
+                               history["Low"].to_numpy(), history["Volume"].to_numpy())
+    for name, values in batch.items():
+        np.testing.assert_allclose(incremental[name].to_numpy(), values, rtol=1e-9, atol=1e-9,
+                                   err_msg=name)
+
+def test_update_indicator_state_feeds_only_new_bars(tmp_path, monkeypatch):
+    """Test that refreshes advance the persisted state by the new bars only"""
+    history = make_history()
+    manager = YFinanceManager(data_cache=DataCache(cache_dir=str(tmp_path)))
+
+    first = manager.update_indicator_state("TCS.NS", history.iloc[:-5])
+    assert first["date"] == history.index[-6].isoformat()
+
+    fed = []
+    original = IndicatorState.update
+    monkeypatch.setattr(IndicatorState, "update", lambda self, *args, **kwargs: (
+        fed.append(kwargs.get("date")), original(self, *args, **kwargs))[1])
+
+    # A fresh manager picks the state up from disk
+    second = YFinanceManager(data_cache=DataCache(cache_dir=str(tmp_path)))
+    result = second.update_indicator_state("TCS.NS", history)
+    assert fed == [date.isoformat() for date in history.index[-6:]]
+
+    expected = analyze_price_history(history)
+    for key, value in expected["indicators"].items():
+        assert np.isclose(result["indicators"][key], value), key
+    assert result["summary"] == expected["summary"]
+
+    # Re-adjusted history (e.g. after a dividend) is rebuilt from scratch
+    fed.clear()
+    adjusted = history.copy()
+    adjusted[["High", "Low", "Close"]] *= 0.98
+    second.update_indicator_state("TCS.NS", adjusted)
+    assert len(fed) == len(adjusted)
+
+def test_state_copy_is_independent_during_warm_up():
+    """Test that updating a copy leaves the original state untouched"""
+    history = make_history(periods=30)
+    state = IndicatorState()
+    state.update_bars(history)
+    before = state.to_dict()
+
+    state.copy().update(101.0, 102.0, 100.0, 5_000.0, date="2023-02-01")
+    assert state.to_dict() == before
@@ -0,0 +1,85 @@
+import os
+import time
+import pandas as pd
+from Datapipeline.etl import DataCache, FinancialDataETL
+from Datapipeline.market_calendar import MarketHoursTTL, ReportingCadenceTTL, check_holiday_coverage, default_calendars
+
+CALENDARS = default_calendars()
+
+def test_sessions_skip_weekends_and_holidays():
+    """Test that the next session skips weekends and exchange holidays"""
+    nse, nyse = CALENDARS["NSE"], CALENDARS["NYSE"]
+
+    # Friday 2025-04-18 is Good Friday on both exchanges
+    assert not nse.is_trading_day("2025-04-18")
+    assert nse.next_open(pd.Timestamp("2025-04-17 16:00", tz="Asia/Kolkata")) == \
+        pd.Timestamp("2025-04-21 09:15", tz="Asia/Kolkata")
+    assert nyse.next_open(pd.Timestamp("2025-04-17 20:00", tz="America/New_York")) == \
+        pd.Timestamp("2025-04-21 09:30", tz="America/New_York")
+
+    assert nyse.is_open(pd.Timestamp("2025-04-21 14:00", tz="UTC"))
+    assert not nse.is_open(pd.Timestamp("2025-04-21 14:00", tz="UTC"))
+
+def test_holiday_coverage_of_the_built_in_calendars(caplog):
+    """Test that the built-in calendars know the 2026 holidays and gaps are reported"""
+    assert not CALENDARS["NSE"].is_trading_day("2026-04-03")
+    assert check_holiday_coverage(CALENDARS, 2026) == []
+    assert check_holiday_coverage(CALENDARS, 2030) == ["NSE", "BSE", "NYSE", "NASDAQ"]
+    assert "No 2030 holidays known for NSE" in caplog.text
+
+def test_market_hours_ttl_holds_prices_while_closed():
+    """Test that prices expire quickly in session and are held over the weekend"""
+    policy, nyse = MarketHoursTTL(session_minutes=5), CALENDARS["NYSE"]
+
+    in_session = pd.Timestamp("2025-03-07 11:00", tz="America/New_York")
+    assert policy.expires_at(in_session, nyse) == in_session + pd.Timedelta(minutes=5)
+
+    # Just after the close the final bar may still be settling
+    settling = pd.Timestamp("2025-03-07 16:10", tz="America/New_York")
+    assert policy.expires_at(settling, nyse) == settling + pd.Timedelta(minutes=5)
+
+    friday_evening = pd.Timestamp("2025-03-07 19:00", tz="America/New_York")
+    assert policy.expires_at(friday_evening, nyse) == pd.Timestamp("2025-03-10 09:30", tz="America/New_York")
+
+def test_reporting_cadence_ttl():
+    """Test that statements refresh daily in results season and quarterly otherwise"""
+    policy, nse = ReportingCadenceTTL(season_days=60), CALENDARS["NSE"]
+
+    in_season = pd.Timestamp("2025-05-10 12:00", tz="Asia/Kolkata")
+    assert policy.expires_at(in_season, nse) == in_season + pd.Timedelta(hours=24)
+
+    off_season = pd.Timestamp("2025-06-10 12:00", tz="Asia/Kolkata")
+    assert policy.expires_at(off_season, nse) == pd.Timestamp("2025-07-01", tz="Asia/Kolkata")
+
+def test_data_cache_applies_policies_and_explicit_max_age(tmp_path):
+    """Test that data types expire by their policy unless a maximum age is given"""
+    cache = DataCache(cache_dir=str(tmp_path), holidays={"NSE": ["2030-01-02"]})
+    assert CALENDARS["NSE"].is_open(pd.Timestamp("2030-01-02 10:00", tz="Asia/Kolkata"))
+    assert not cache.calendars["NSE"].is_open(pd.Timestamp("2030-01-02 10:00", tz="Asia/Kolkata"))
+
+    cache.save("TCS.NS", "yf_info", {"shortName": "TCS"})
+    cache.save("TCS.NS", "news", [{"title": "Results"}])
+    assert cache.get("TCS.NS", "yf_info") == {"shortName": "TCS"}
+
+    # Saved a month ago: stale under every policy, but not under an unbounded age
+    month_ago = time.time() - 31 * 24 * 3600
+    for data_type in ("yf_info", "news"):
+        os.utime(tmp_path / f"TCS.NS_{data_type}.json", (month_ago, month_ago))
+        assert cache.get("TCS.NS", data_type) is None
+    assert cache.get("TCS.NS", "yf_info", max_age_hours=float("inf")) == {"shortName": "TCS"}
+
+def test_indicators_are_cached_under_the_exchange_symbol(tmp_path):
+    """Test that indicator caches of Indian tickers expire on the NSE calendar"""
+    etl = FinancialDataETL.__new__(FinancialDataETL)
+    etl.data_cache = DataCache(cache_dir=str(tmp_path))
+    series = pd.DataFrame({"rsi": [50.0]}, index=pd.date_range("2025-03-07", periods=1, name="Date"))
+    etl.calculate_technical_indicators = lambda history, symbol: {
+        "latest": {"rsi": 50.0}, "indicators": {}, "summary": {}, "series": series}
+
+    etl._compute_technical_indicators("TCS", series.assign(Close=1.0), "NSE")
+    assert {path.stem for path in tmp_path.iterdir()} == {"TCS.NS_technical_indicators", "TCS.NS_technical_indicator_series"}
+
+    # Saved on Friday evening in India: held over the weekend until the NSE open
+    friday_evening = pd.Timestamp("2025-03-07 19:00", tz="Asia/Kolkata")
+    assert etl.data_cache.expires_at("TCS.NS", "technical_indicators", friday_evening) == \
+        pd.Timestamp("2025-03-10 09:15", tz="Asia/Kolkata")
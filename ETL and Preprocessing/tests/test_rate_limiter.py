@@ -0,0 +1,62 @@
+import time
+import asyncio
+import threading
+from Datapipeline.etl import RateLimiter, TokenBucket
+
+def test_token_bucket_allows_burst_then_paces():
+    """Test that a full bucket serves a burst immediately and then refills at the configured rate"""
+    bucket = TokenBucket(requests_per_minute=600, burst=3)  # 10 requests per second
+
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    start = time.monotonic()
+    waited = bucket.acquire()
+    elapsed = time.monotonic() - start
+
+    assert 0.05 < waited <= 0.1
+    assert elapsed >= waited * 0.9
+    metrics = bucket.metrics()
+    assert metrics["acquired"] == 4
+    assert metrics["waited"] == 1
+    assert metrics["queue_depth"] == 0
+
+def test_waiting_threads_do_not_serialize_on_the_lock():
+    """Test that callers sleep outside the lock so queued waits overlap"""
+    limiter = RateLimiter()
+    limiter.buckets["test"] = TokenBucket(requests_per_minute=1200, burst=1)  # 20 per second
+    calls = []
+    wrapped = limiter.with_rate_limit(lambda i: calls.append(i), "test")
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=wrapped, args=(i,)) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    # Four callers wait 50, 100, 150 and 200 ms concurrently rather than back to back
+    assert sorted(calls) == [0, 1, 2, 3, 4]
+    assert elapsed < 0.45
+    assert limiter.metrics()["test"]["max_wait_seconds"] <= 0.2 + 1e-6
+
+def test_async_acquire_and_coroutine_wrapping():
+    """Test that async callers are rate limited without blocking the event loop"""
+    limiter = RateLimiter()
+    limiter.buckets["test"] = TokenBucket(requests_per_minute=600, burst=2)
+
+    async def fetch(value):
+        return value * 2
+
+    async def main():
+        wrapped = limiter.with_rate_limit(fetch, "test")
+        return await asyncio.gather(*(wrapped(i) for i in range(4)), limiter.acquire_async("test"))
+
+    results = asyncio.run(main())
+    assert results[:4] == [0, 2, 4, 6]
+    assert limiter.metrics()["test"]["acquired"] == 5
+
+def test_unknown_api_uses_default_bucket():
+    """Test that unknown API names share the default limits"""
+    limiter = RateLimiter()
+    limiter.acquire("unknown-api")
+    assert limiter.metrics()["default"]["acquired"] == 1
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+import pytest
+from Datapipeline import etl as etl_module
+from Datapipeline import technical_indicators as ti
+from Datapipeline.etl import YFinanceManager
+
+def make_history(periods=300, seed=0):
+    """Random-walk OHLCV history"""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, periods))
+    return pd.DataFrame({
+        "Open": close,
+        "High": close + rng.random(periods),
+        "Low": close - rng.random(periods),
+        "Close": close,
+        "Volume": rng.integers(100_000, 1_000_000, periods)
+    }, index=pd.date_range("2024-01-01", periods=periods, tz="Asia/Kolkata", name="Date"))
+
+def seeded_average_loop(values, period, alpha):
+    """Reference recursive average seeded with the SMA of the first period values"""
+    out = np.full(len(values), np.nan)
+    first = int(np.argmax(~np.isnan(values)))
+    out[first + period - 1] = np.mean(values[first:first + period])
+    for t in range(first + period, len(values)):
+        out[t] = alpha * values[t] + (1 - alpha) * out[t - 1]
+    return out
+
+def test_indicators_match_reference_definitions():
+    """Test the vectorized indicators against straightforward reference implementations"""
+    history = make_history()
+    close, high, low = (history[c].to_numpy() for c in ("Close", "High", "Low"))
+
+    assert np.allclose(ti.ema(close, 20), seeded_average_loop(close, 20, 2 / 21), equal_nan=True)
+    assert np.allclose(ti.sma(close, 50), history["Close"].rolling(50).mean(), equal_nan=True)
+
+    change = np.diff(close, prepend=np.nan)
+    gains, losses = np.where(change > 0, change, 0.0), np.where(change < 0, -change, 0.0)
+    gains[0] = losses[0] = np.nan
+    avg_gain = seeded_average_loop(gains, 14, 1 / 14)
+    avg_loss = seeded_average_loop(losses, 14, 1 / 14)
+    assert np.allclose(ti.rsi(close), 100 - 100 / (1 + avg_gain / avg_loss), equal_nan=True)
+
+    line, signal, hist = ti.macd(close)
+    expected_line = seeded_average_loop(close, 12, 2 / 13) - seeded_average_loop(close, 26, 2 / 27)
+    assert np.allclose(line, expected_line, equal_nan=True)
+    assert np.allclose(signal, seeded_average_loop(expected_line, 9, 0.2), equal_nan=True)
+
+    upper, middle, lower = ti.bollinger_bands(close)
+    rolling = history["Close"].rolling(20)
+    assert np.allclose(upper, rolling.mean() + 2 * rolling.std(ddof=0), equal_nan=True)
+
+    fast_k = 100 * (history["Close"] - history["Low"].rolling(5).min()) / (
+        history["High"].rolling(5).max() - history["Low"].rolling(5).min())
+    slow_k, slow_d = ti.stochastic(high, low, close)
+    assert np.allclose(slow_k, fast_k.rolling(3).mean(), equal_nan=True)
+    assert np.allclose(slow_d, fast_k.rolling(3).mean().rolling(3).mean(), equal_nan=True)
+
+    volume = history["Volume"].to_numpy(dtype=float)
+    expected_obv = np.r_[volume[0], np.sign(np.diff(close)) * volume[1:]].cumsum()
+    assert np.allclose(ti.obv(close, volume), expected_obv)
+
+def test_panel_rows_match_single_series():
+    """Test that 2-D input is computed row by row along the time axis"""
+    close = make_history()["Close"].to_numpy()
+    late_listing = np.r_[np.full(40, np.nan), close[40:]]
+    panel = np.vstack([close, close * 2, late_listing])
+
+    assert np.allclose(ti.ema(panel, 20)[1], ti.ema(close * 2, 20), equal_nan=True)
+    assert np.allclose(ti.rsi(panel)[0], ti.rsi(close), equal_nan=True)
+    assert np.allclose(ti.ema(panel, 20)[2], seeded_average_loop(late_listing, 20, 2 / 21), equal_nan=True)
+
+def test_analyze_price_history_returns_aligned_series_and_snapshot():
+    """Test that the full series are aligned with the bars and the snapshot is their last row"""
+    history = make_history(periods=60)
+    result = ti.analyze_price_history(history)
+
+    series = result["series"]
+    assert series.index.equals(history.index)
+    assert {"sma20", "ema50", "rsi", "macd", "bollinger_upper", "atr", "stoch_k", "obv"} <= set(series.columns)
+    assert result["latest"]["rsi"] == pytest.approx(series["rsi"].iloc[-1])
+    assert result["indicators"]["RSI"] == result["latest"]["rsi"]
+    assert result["latest"]["sma200"] is None  # not enough bars yet
+    assert set(result["summary"]) == {"trend", "momentum", "volatility", "trend_strength"}
+
+def test_indicators_are_cached_per_ticker_and_last_bar(monkeypatch):
+    """Test that the same history is not recomputed and a new bar is"""
+    calls = []
+    analyze = ti.analyze_price_history
+    monkeypatch.setattr(etl_module, "analyze_price_history",
+                        lambda history: calls.append(len(history)) or analyze(history))
+    manager = YFinanceManager()
+    history = make_history(periods=100)
+
+    first = manager.calculate_technical_indicators(history, "TCS.NS")
+    assert manager.calculate_technical_indicators(history.copy(), "TCS.NS") is first
+    manager.calculate_technical_indicators(make_history(periods=101), "TCS.NS")
+    manager.calculate_technical_indicators(history)  # no ticker, no caching
+    assert calls == [100, 101, 100]
+
+def test_history_without_close_is_not_cached(monkeypatch):
+    """Test that a frame lacking the Close column is analyzed without a cache key"""
+    calls = []
+    monkeypatch.setattr(etl_module, "analyze_price_history",
+                        lambda history: calls.append(history) or {"latest": {}})
+    manager = YFinanceManager()
+    history = make_history(periods=30).drop(columns="Close")
+
+    assert manager.calculate_technical_indicators(history, "TCS.NS") == {"latest": {}}
+    manager.calculate_technical_indicators(history, "TCS.NS")
+    assert len(calls) == 2
+
+def test_panel_matches_per_ticker_analysis_and_screens():
+    """Test that the cross-sectional panel reproduces per-ticker indicators and screens on them"""
+    # Enough series for the panel's NumPy recursion, with different history lengths
+    histories = {f"T{i}": make_history(periods=250 - i, seed=i).iloc[i % 3:] for i in range(80)}
+    histories["SHORT"] = make_history(periods=10, seed=99)
+    panel = ti.IndicatorPanel.from_histories(histories)
+    latest = panel.latest()
+
+    for ticker in ("T0", "T7", "T79", "SHORT"):
+        expected = ti.analyze_price_history(histories[ticker])
+        for name, value in expected["latest"].items():
+            if value is None:
+                assert np.isnan(latest.loc[ticker, name]), (ticker, name)
+            else:
+                assert np.isclose(latest.loc[ticker, name], value), (ticker, name)
+        np.testing.assert_allclose(panel.history(ticker).to_numpy(), expected["series"].to_numpy(),
+                                   rtol=1e-9, atol=1e-9)
+
+    matches = panel.screen([("rsi", "<", 50), ("close", ">", "sma20")])
+    expected = latest[(latest["rsi"] < 50) & (latest["close"] > latest["sma20"])]
+    assert list(matches.index) == list(expected.index)
+    assert "SHORT" not in panel.screen([("close", ">", "sma200")]).index
+    with pytest.raises(ValueError):
+        panel.screen([("rsi", "~", 30)])
+
+def test_panel_aligns_tickers_on_different_calendars():
+    """Test that a holiday on one exchange carries the close forward instead of breaking windows"""
+    india = make_history(periods=60, seed=1)
+    us = make_history(periods=61, seed=2)
+    us.index = pd.date_range("2024-01-01", periods=61, tz="America/New_York", name="Date")
+    holiday = india.index[30]
+    panel = ti.IndicatorPanel.from_histories({"TCS.NS": india.drop(holiday), "AAPL": us})
+
+    assert len(panel.dates) == 61
+    closes = panel.series_frame("close")
+    gap = holiday.tz_localize(None).normalize()
+    assert closes.loc[gap, "TCS.NS"] == india["Close"].iloc[29]
+    assert panel.latest().loc["TCS.NS", "date"] == india.index[-1].tz_localize(None).normalize()
+    assert not np.isnan(panel.latest().loc["TCS.NS", "sma20"])
@@ -49,6 +49,12 @@ def process_stocks(etl, stocks, exchange):
         "failed": []
     }
     
+    # Fetch price history for all stocks in a few bulk requests
+    try:
+        etl.prefetch_price_history(stocks, exchange)
+    except Exception as e:
+        logger.warning(f"Bulk price history prefetch failed: {e}")
+    
     for ticker in stocks:
         try:
             logger.info(f"Processing {ticker} from {exchange}")
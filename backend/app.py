@@ -1,14 +1,28 @@
-from flask import app,json,jsonify,Flask,request
+from flask import app,json,jsonify,Flask,request,Response
 from flask_cors import CORS
 import yfinance as yf 
+from yfinance.data import YfData
 import os 
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 import pandas as pd
+import numpy as np
 import traceback
+import threading
+import time
+import functools
+import gzip
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from datetime import datetime
 from transformers import pipeline
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
 
 load_dotenv()
 
@@ -17,7 +31,183 @@ CORS(app)
 
 os.environ["HF_TOKEN"] = os.getenv("HF_TOKEN")
 
+class ResponseCache:
+    """
+    In-memory cache of endpoint responses with stale-while-revalidate.
+
+    A cached response younger than the endpoint's fresh_seconds is served as
+    is. An older one is still served immediately while it is younger than
+    max_stale_seconds, and a background worker recomputes it; past that bound
+    the request waits for a new response. Only 200 responses of real data are
+    cached (see fallback_response), and a failed refresh keeps serving the stale
+    response until the bound.
+    """
+
+    def __init__(self, enabled=True, max_entries=1024, workers=4):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="response-refresh")
+
+    def cached(self, fresh_seconds, max_stale_seconds):
+        """Decorate a view so that its responses are served from the cache."""
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(**kwargs):
+                if not self.enabled or request.endpoint != view.__name__:
+                    return view(**kwargs)
+
+                key = (request.endpoint, tuple(sorted(kwargs.items())), request.query_string, request.get_data())
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        self._entries.move_to_end(key)
+                age = time.time() - entry["cached_at"] if entry is not None else None
+
+                if age is not None and age < fresh_seconds:
+                    return self._response(entry, "HIT", age)
+                if age is not None and age < max_stale_seconds:
+                    self._schedule_refresh(key, view, kwargs)
+                    return self._response(entry, "STALE", age)
+
+                response = app.make_response(view(**kwargs))
+                self._store(key, response)
+                response.headers["X-Cache"] = "MISS"
+                return response
+            return wrapper
+        return decorator
+
+    def _schedule_refresh(self, key, view, kwargs):
+        """Recompute a stale response in the background (once per key at a time)."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        request_args = dict(path=request.path, method=request.method, query_string=request.query_string,
+                            data=request.get_data(), content_type=request.content_type)
+        self._executor.submit(self._refresh, key, view, kwargs, request_args)
+
+    def _refresh(self, key, view, kwargs, request_args):
+        try:
+            with app.test_request_context(**request_args):
+                response = app.make_response(view(**kwargs))
+            if not self._store(key, response):
+                print(f"Refresh of {request_args['path']} returned status {response.status_code} "
+                      f"or fallback data, keeping the stale response")
+        except Exception as e:
+            print(f"Error refreshing {request_args['path']}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _store(self, key, response):
+        """Cache a successful response of real data; return whether it was stored."""
+        if (response.status_code != 200 or response.direct_passthrough
+                or response.headers.get("X-Data-Source") == "fallback"):
+            return False
+        with self._lock:
+            self._entries[key] = {
+                "body": response.get_data(),
+                "mimetype": response.mimetype,
+                "headers": {name: value for name, value in response.headers.items() if name.startswith("X-")},
+                "cached_at": time.time()
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def _response(self, entry, state, age):
+        headers = {**entry["headers"], "X-Cache": state, "Age": str(int(age))}
+        # The snapshot a cached response was built from has aged along with it
+        if "X-Snapshot-Age" in headers:
+            headers["X-Snapshot-Age"] = str(int(headers["X-Snapshot-Age"]) + int(age))
+        return Response(entry["body"], mimetype=entry["mimetype"], headers=headers)
+
+# Stale-while-revalidate for the data endpoints (STALE_WHILE_REVALIDATE=false disables it)
+response_cache = ResponseCache(enabled=os.getenv("STALE_WHILE_REVALIDATE", "true").lower() not in ("0", "false", "no"))
+
+def fallback_response(response):
+    """
+    Mark a response as built from placeholder or incomplete upstream data.
+
+    The ``X-Data-Source: fallback`` header keeps it out of the response cache, so
+    the next request tries the upstream again.
+    """
+    response.headers["X-Data-Source"] = "fallback"
+    return response
+
+# (fresh seconds, maximum staleness in seconds) of the cached responses
+PRICE_RESPONSE_TTL = (60, 15 * 60)
+HEADLINES_RESPONSE_TTL = (5 * 60, 3600)
+
+# JSON bodies smaller than this are sent uncompressed
+COMPRESSION_MIN_BYTES = 1024
+# Compressed bodies kept by (ETag, encoding), so a cached response is compressed once
+COMPRESSED_BODY_ENTRIES = 256
+_compressed_bodies = OrderedDict()
+_compressed_bodies_lock = threading.Lock()
+
+def wants_columnar(body=None):
+    """Check whether the client asked for columnar time series (?format=columnar or "format" in the body)."""
+    requested = request.args.get("format") or (body or {}).get("format") or "records"
+    return str(requested).lower() == "columnar"
+
+def response_encoding():
+    """Pick brotli or gzip from the request's Accept-Encoding (None to send the body as is)."""
+    if BROTLI_AVAILABLE and request.accept_encodings["br"]:
+        return "br"
+    if request.accept_encodings["gzip"]:
+        return "gzip"
+    return None
+
+def compressed_body(etag, body, encoding):
+    """Compress a response body, reusing the result for repeated responses with the same ETag."""
+    key = (etag, encoding)
+    with _compressed_bodies_lock:
+        if key in _compressed_bodies:
+            _compressed_bodies.move_to_end(key)
+            return _compressed_bodies[key]
+    if encoding == "br":
+        compressed = brotli.compress(body, quality=5)
+    else:
+        compressed = gzip.compress(body, compresslevel=6)
+    with _compressed_bodies_lock:
+        _compressed_bodies[key] = compressed
+        while len(_compressed_bodies) > COMPRESSED_BODY_ENTRIES:
+            _compressed_bodies.popitem(last=False)
+    return compressed
+
+@app.after_request
+def finalize_json_response(response):
+    """
+    Tag successful JSON responses with an ETag, answer a matching If-None-Match
+    with 304 Not Modified, and compress large bodies with brotli or gzip.
+
+    Only GET and HEAD requests are answered with 304 (RFC 7232, section 3.2).
+    """
+    if (response.status_code != 200 or response.direct_passthrough or not response.is_json
+            or "Content-Encoding" in response.headers):
+        return response
+    body = response.get_data()
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    response.set_etag(etag, weak=True)
+    response.vary.add("Accept-Encoding")
+
+    if request.method in ("GET", "HEAD") and request.if_none_match.contains_weak(etag):
+        headers = {name: value for name, value in response.headers.items() if name in ("ETag", "Vary") or name.startswith("X-")}
+        return Response(status=304, headers=headers)
+
+    encoding = response_encoding() if len(body) >= COMPRESSION_MIN_BYTES else None
+    if encoding:
+        response.set_data(compressed_body(etag, body, encoding))
+        response.headers["Content-Encoding"] = encoding
+    return response
+
 @app.route("/stock_history",methods=['POST'])
+@response_cache.cached(*PRICE_RESPONSE_TTL)
 def historic_data():
     try:
         data = request.get_json()
@@ -47,257 +237,261 @@ def historic_data():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Ratios averaged over the requested period, in response order
+RATIO_NAMES = [
+    "P/E Ratio", "P/S Ratio", "P/B Ratio", "EV/Revenue", "EV/EBITDA",
+    "Profit Margin", "Gross Margin", "Return on Assets (ROA)", "Return on Equity (ROE)",
+    "Debt-to-Equity", "Debt-to-Assets",
+    "Current Ratio", "Quick Ratio",
+    "Dividend Rate", "Dividend Yield", "Payout Ratio",
+    "Beta", "Short Ratio"
+]
+
 @app.route("/valuation_ratios", methods=["POST"])
+@response_cache.cached(*PRICE_RESPONSE_TTL)
 def get_valuation_ratios():
-    """Calculate comprehensive financial ratios and include OHLCV data."""
+    """
+    Calculate comprehensive financial ratios and include OHLCV data.
+
+    With format=columnar the daily series are returned as {"dates": [...], column: [...]}
+    instead of one object per date.
+    """
     try:
         body = request.get_json()
         ticker_symbol = body.get('company', '')
         duration = body.get('duration', '1y')
 
-        ticker = yf.Ticker(ticker_symbol)
-        hist_data = ticker.history(period=duration)
-        financials = ticker.financials
-        balance_sheet = ticker.balance_sheet
-        current_info = ticker.info
-
-        results = {
-            "ticker": ticker_symbol,
-            "duration": duration,
-            "time_series_ratios": {},
-            "average_ratios": {},
-            "current_ratios": {}
-        }
-
-        for date, row in hist_data.iterrows():
-            date_str = date.strftime('%Y-%m-%d')
-            stock_price = row['Close']
-
-            closest_financials = get_closest_financial_data(financials, date)
-            closest_balance_sheet = get_closest_financial_data(balance_sheet, date)
-
-            if closest_financials is not None and closest_balance_sheet is not None:
-                eps = get_trailing_eps(ticker, date)
-                revenue = closest_financials.get('Total Revenue', None)
-                book_value_per_share = get_book_value_per_share(closest_balance_sheet, ticker, date)
-                shares_outstanding = get_shares_outstanding(ticker, date)
-                ebitda = closest_financials.get('EBITDA', None)
-
-                market_cap = stock_price * shares_outstanding if shares_outstanding else None
-                total_debt = get_total_debt(closest_balance_sheet)
-                cash_and_cash_equiv = get_cash_and_equivalents(closest_balance_sheet)
-                ev = (market_cap + total_debt - cash_and_cash_equiv) if all([market_cap, total_debt, cash_and_cash_equiv]) else None
-
-                historical_data = {
-                    "currentPrice": stock_price,
-                    "trailingEps": eps,
-                    "totalRevenue": revenue,
-                    "bookValue": book_value_per_share,
-                    "enterpriseValue": ev,
-                    "ebitda": ebitda,
-                    "sharesOutstanding": shares_outstanding,
-                    "profitMargins": current_info.get("profitMargins"),
-                    "grossMargins": current_info.get("grossMargins"),
-                    "returnOnAssets": current_info.get("returnOnAssets"),
-                    "returnOnEquity": current_info.get("returnOnEquity"),
-                    "totalDebt": total_debt,
-                    "marketCap": market_cap,
-                    "totalAssets": closest_balance_sheet.get('Total Assets', None),
-                    "currentRatio": current_info.get("currentRatio"),
-                    "quickRatio": current_info.get("quickRatio"),
-                    "dividendRate": current_info.get("dividendRate"),
-                    "dividendYield": current_info.get("dividendYield"),
-                    "payoutRatio": current_info.get("payoutRatio"),
-                    "beta": current_info.get("beta"),
-                    "shortRatio": current_info.get("shortRatio")
-                }
-
-                pe_ratio = stock_price / eps if eps and eps > 0 else None
-                ps_ratio = (stock_price * shares_outstanding) / revenue if revenue and revenue > 0 and shares_outstanding else None
-                pb_ratio = stock_price / book_value_per_share if book_value_per_share and book_value_per_share > 0 else None
-                ev_revenue = ev / revenue if ev and revenue and revenue > 0 else None
-                ev_ebitda = ev / ebitda if ev and ebitda and ebitda > 0 else None
-
-                results["time_series_ratios"][date_str] = {
-                    "P/E Ratio": pe_ratio,
-                    "P/S Ratio": ps_ratio,
-                    "P/B Ratio": pb_ratio,
-                    "EV/Revenue": ev_revenue,
-                    "EV/EBITDA": ev_ebitda,
-
-                    # OHLCV
-                    "Open": row['Open'],
-                    "High": row['High'],
-                    "Low": row['Low'],
-                    "Close": row['Close'],
-                    "Volume": row['Volume'],
-                    "Stock Price": stock_price,
-
-                    **get_profitability_ratios(historical_data),
-                    **get_leverage_ratios(historical_data),
-                    **get_liquidity_ratios(historical_data),
-                    **get_dividend_ratios(historical_data),
-                    **get_market_ratios(historical_data)
-                }
-
-        if results["time_series_ratios"]:
-            all_ratios = {
-                "P/E Ratio": [], "P/S Ratio": [], "P/B Ratio": [], "EV/Revenue": [], "EV/EBITDA": [],
-                "Profit Margin": [], "Gross Margin": [], "Return on Assets (ROA)": [], "Return on Equity (ROE)": [],
-                "Debt-to-Equity": [], "Debt-to-Assets": [],
-                "Current Ratio": [], "Quick Ratio": [],
-                "Dividend Rate": [], "Dividend Yield": [], "Payout Ratio": [],
-                "Beta": [], "Short Ratio": []
-            }
-
-            for date_data in results["time_series_ratios"].values():
-                for ratio_name, ratio_value in date_data.items():
-                    if ratio_name in all_ratios and ratio_value is not None:
-                        all_ratios[ratio_name].append(ratio_value)
-
-            for ratio_name, ratio_values in all_ratios.items():
-                results["average_ratios"][ratio_name] = sum(ratio_values) / len(ratio_values) if ratio_values else None
-
-        # Current ratios
-        data = current_info
-        stock_price = data.get("currentPrice")
-        eps = data.get("trailingEps")
-        revenue = data.get("totalRevenue")
-        book_value = data.get("bookValue")
-        ev = data.get("enterpriseValue")
-        ebitda = data.get("ebitda")
-        shares_outstanding = data.get("sharesOutstanding")
-
-        results["current_ratios"] = {
-            "P/E Ratio": stock_price / eps if eps and eps > 0 else None,
-            "P/S Ratio": stock_price / (revenue / shares_outstanding) if revenue and shares_outstanding and revenue > 0 else None,
-            "P/B Ratio": stock_price / book_value if book_value and book_value > 0 else None,
-            "EV/Revenue": ev / revenue if ev and revenue and revenue > 0 else None,
-            "EV/EBITDA": ev / ebitda if ev and ebitda and ebitda > 0 else None,
-
-            **get_profitability_ratios(data),
-            **get_leverage_ratios(data),
-            **get_liquidity_ratios(data),
-            **get_dividend_ratios(data),
-            **get_market_ratios(data)
-        }
-
-        return jsonify(results)
+        return jsonify(calculate_valuation_ratios(ticker_symbol, duration, columnar=wants_columnar(body)))
 
     except Exception as e:
         return jsonify({"error": str(e), "traceback": traceback.format_exc()}), 500
-# Helper functions to retrieve and process financial data
-def get_closest_financial_data(financials_df, target_date):
-    """Get the closest available financial data to a target date."""
-    if financials_df is None or financials_df.empty:
-        return None
-    
-    # Convert target_date to datetime if it's not already
-    if not isinstance(target_date, datetime):
-        target_date = pd.to_datetime(target_date)
-    
-    # Handle timezone issues - convert both to timezone naive
-    if hasattr(target_date, 'tz') and target_date.tz is not None:
-        target_date = target_date.tz_localize(None)
-    
-    # Get the column dates
-    dates = financials_df.columns
-    
-    # Convert all dates to tz-naive for comparison
-    tz_naive_dates = []
-    for date in dates:
-        if hasattr(date, 'tz') and date.tz is not None:
-            tz_naive_dates.append(date.tz_localize(None))
-        else:
-            tz_naive_dates.append(date)
-    
-    # Find the closest date
-    if tz_naive_dates:
-        closest_date_index = min(range(len(tz_naive_dates)), key=lambda i: abs(tz_naive_dates[i] - target_date))
-        closest_date = dates[closest_date_index]  # Get the original date from the original list
-    else:
-        return None
-    
-    # Return the data for the closest date
-    return financials_df[closest_date]
 
-def get_trailing_eps(ticker, date):
-    """Attempt to get the trailing EPS for a specific date."""
+def fetch_fundamentals(ticker_symbol, duration):
+    """Fetch price history, statements and info for a ticker, touching each yfinance property once."""
+    ticker = yf.Ticker(ticker_symbol)
     try:
-        # Try to get from earnings
         earnings = ticker.earnings
-        if earnings is not None and not earnings.empty:
-            # Handle timezone issues
-            if hasattr(date, 'tz') and date.tz is not None:
-                date_naive = date.tz_localize(None)
-            else:
-                date_naive = date
-                
-            # Get closest earnings date before the target date
-            earnings_dates = earnings.index
-            
-            # Convert earnings dates to tz-naive for comparison
-            valid_dates = []
-            for d in earnings_dates:
-                if hasattr(d, 'tz') and d.tz is not None:
-                    d_naive = d.tz_localize(None)
-                else:
-                    d_naive = d
-                if d_naive <= date_naive:
-                    valid_dates.append((d, d_naive))
-            
-            if valid_dates:
-                # Get the original date with the max naive date
-                closest_date = max(valid_dates, key=lambda x: x[1])[0]
-                return earnings.loc[closest_date, 'EPS']
-        
-        # Fallback to current info
-        return ticker.info.get('trailingEps')
     except Exception as e:
-        print(f"Error getting EPS: {e}")
-        return None
+        print(f"Error getting earnings for {ticker_symbol}: {e}")
+        earnings = None
 
-def get_book_value_per_share(balance_sheet, ticker, date):
-    """Calculate book value per share for a specific date."""
-    try:
-        total_assets = balance_sheet.get('Total Assets', None)
-        total_liabilities = balance_sheet.get('Total Liabilities Net Minority Interest', None)
-        
-        if total_assets is not None and total_liabilities is not None:
-            shareholders_equity = total_assets - total_liabilities
-            shares_outstanding = get_shares_outstanding(ticker, date)
-            
-            if shares_outstanding:
-                return shareholders_equity / shares_outstanding
-        
-        # Fallback to current info
-        return ticker.info.get('bookValue')
-    except:
-        return None
+    return {
+        "history": ticker.history(period=duration),
+        "financials": ticker.financials,
+        "balance_sheet": ticker.balance_sheet,
+        "earnings": earnings,
+        "info": ticker.info or {}
+    }
 
-def get_shares_outstanding(ticker, date):
-    """Get the shares outstanding for a specific date."""
-    try:
-        # Try to get from historical data
-        # Note: This is a simplification, as getting historical shares outstanding 
-        # is complex and might require additional data sources
-        return ticker.info.get('sharesOutstanding')
-    except:
-        return None
+def calculate_valuation_ratios(ticker_symbol, duration, fundamentals=None, columnar=False):
+    """
+    Calculate the daily valuation ratio time series, averages and current ratios for a ticker.
 
-def get_total_debt(balance_sheet):
-    """Get total debt from balance sheet."""
-    try:
-        return balance_sheet.get('Total Debt', None)
-    except:
-        return None
+    Statements are as-of joined onto the price dates once and every ratio is
+    computed for all dates as an array operation.
+    """
+    frame, current_info = calculate_ratio_frame(ticker_symbol, duration, fundamentals)
+    return valuation_results(ticker_symbol, duration, frame, current_info, columnar)
+
+def calculate_ratio_frame(ticker_symbol, duration, fundamentals=None):
+    """Get the daily ratio frame (None without price history or statements) and the info of a ticker."""
+    if fundamentals is None:
+        fundamentals = fetch_fundamentals(ticker_symbol, duration)
+    hist_data = fundamentals["history"]
+    financials = fundamentals["financials"]
+    balance_sheet = fundamentals["balance_sheet"]
+
+    statements_available = (financials is not None and not financials.empty
+                            and balance_sheet is not None and not balance_sheet.empty)
+    if hist_data is None or hist_data.empty or not statements_available:
+        return None, fundamentals["info"]
+    frame = build_ratio_frame(hist_data, financials, balance_sheet, fundamentals["earnings"], fundamentals["info"])
+    return frame, fundamentals["info"]
+
+def valuation_results(ticker_symbol, duration, frame, current_info, columnar=False):
+    """Build the /valuation_ratios response (columnar or per-date series) from a ratio frame and the ticker info."""
+    results = {
+        "ticker": ticker_symbol,
+        "duration": duration,
+        "time_series_ratios": {},
+        "average_ratios": {},
+        "current_ratios": {}
+    }
+
+    if frame is not None:
+        results["time_series_ratios"] = frame_to_columns(frame) if columnar else frame_to_records(frame)
+        averages = frame[RATIO_NAMES].mean()
+        results["average_ratios"] = {name: to_json_value(value) for name, value in averages.items()}
+
+    # Current ratios
+    data = current_info
+    stock_price = data.get("currentPrice")
+    eps = data.get("trailingEps")
+    revenue = data.get("totalRevenue")
+    book_value = data.get("bookValue")
+    ev = data.get("enterpriseValue")
+    ebitda = data.get("ebitda")
+    shares_outstanding = data.get("sharesOutstanding")
+
+    results["current_ratios"] = {
+        "P/E Ratio": stock_price / eps if eps and eps > 0 else None,
+        "P/S Ratio": stock_price / (revenue / shares_outstanding) if revenue and shares_outstanding and revenue > 0 else None,
+        "P/B Ratio": stock_price / book_value if book_value and book_value > 0 else None,
+        "EV/Revenue": ev / revenue if ev and revenue and revenue > 0 else None,
+        "EV/EBITDA": ev / ebitda if ev and ebitda and ebitda > 0 else None,
+
+        **get_profitability_ratios(data),
+        **get_leverage_ratios(data),
+        **get_liquidity_ratios(data),
+        **get_dividend_ratios(data),
+        **get_market_ratios(data)
+    }
+
+    return results
+
+def build_ratio_frame(hist_data, financials, balance_sheet, earnings, info):
+    """Compute every daily ratio as a column of a DataFrame indexed like the price history."""
+    dates = tz_naive_index(hist_data.index)
+    price = hist_data["Close"].to_numpy(dtype=float)
+
+    income = asof_statement(financials, dates, ["Total Revenue", "EBITDA"])
+    balance = asof_statement(balance_sheet, dates, [
+        "Total Assets", "Total Liabilities Net Minority Interest", "Total Debt", "Cash And Cash Equivalents"
+    ])
+    revenue, ebitda = income["Total Revenue"], income["EBITDA"]
+    total_assets, total_debt = balance["Total Assets"], balance["Total Debt"]
+    cash = balance["Cash And Cash Equivalents"]
+
+    eps = trailing_eps_series(earnings, dates, info.get("trailingEps"))
+    shares = to_float(info.get("sharesOutstanding"))
+    if shares:
+        market_cap = price * shares
+    else:
+        shares = market_cap = np.nan
+
+    # Book value from the balance sheet when it reports the line items, otherwise from info
+    if {"Total Assets", "Total Liabilities Net Minority Interest"} <= set(balance_sheet.index) and shares > 0:
+        book_value_per_share = (total_assets - balance["Total Liabilities Net Minority Interest"]) / shares
+    else:
+        book_value_per_share = np.full(len(dates), to_float(info.get("bookValue")))
+
+    ev = np.where(nonzero(market_cap) & nonzero(total_debt) & nonzero(cash), market_cap + total_debt - cash, np.nan)
+
+    columns = {
+        "P/E Ratio": safe_divide(price, eps, eps > 0),
+        "P/S Ratio": safe_divide(market_cap, revenue, revenue > 0),
+        "P/B Ratio": safe_divide(price, book_value_per_share, book_value_per_share > 0),
+        "EV/Revenue": safe_divide(ev, revenue, nonzero(ev) & (revenue > 0)),
+        "EV/EBITDA": safe_divide(ev, ebitda, nonzero(ev) & (ebitda > 0)),
+
+        # OHLCV
+        "Open": hist_data["Open"].to_numpy(),
+        "High": hist_data["High"].to_numpy(),
+        "Low": hist_data["Low"].to_numpy(),
+        "Close": price,
+        "Volume": hist_data["Volume"].to_numpy(),
+        "Stock Price": price,
+
+        **get_profitability_ratios(info),
+        "Debt-to-Equity": safe_divide(total_debt, market_cap - total_debt, nonzero(market_cap) & nonzero(total_debt)),
+        "Debt-to-Assets": safe_divide(total_debt, total_assets, nonzero(total_assets) & nonzero(total_debt)),
+        **get_liquidity_ratios(info),
+        **get_dividend_ratios(info),
+        **get_market_ratios(info)
+    }
+
+    frame = pd.DataFrame(columns, index=hist_data.index.strftime('%Y-%m-%d'))
+    frame[RATIO_NAMES] = frame[RATIO_NAMES].astype(float)
+    return frame
+
+def tz_naive_index(index):
+    """Price dates as a tz-naive DatetimeIndex (exchange-local wall time)."""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.astype("datetime64[ns]")
+
+def asof_statement(statement, dates, items):
+    """
+    Line items of the statement period closest to each date.
+
+    Args:
+        statement: yfinance statement with line items as rows and period dates as columns
+        dates: tz-naive DatetimeIndex to align onto
+        items: Line items to return
+
+    Returns:
+        Dictionary mapping each line item to a float array aligned with ``dates``
+        (NaN when the item is not reported)
+    """
+    periods = tz_naive_index(pd.to_datetime(statement.columns))
+    order = np.argsort(periods.asi8)
+    periods = periods.asi8[order]
+    values = statement.reindex(items).to_numpy(dtype=float)[:, order]
+
+    # Nearest period to each date; ties go to the later period
+    targets = dates.asi8
+    later = np.clip(np.searchsorted(periods, targets, side="left"), 0, len(periods) - 1)
+    earlier = np.clip(later - 1, 0, len(periods) - 1)
+    use_earlier = (targets - periods[earlier]) < (periods[later] - targets)
+    nearest = np.where(use_earlier, earlier, later)
+    return {item: values[row, nearest] for row, item in enumerate(items)}
+
+def trailing_eps_series(earnings, dates, fallback):
+    """EPS of the latest earnings period on or before each date, falling back to the trailing EPS from info."""
+    eps = np.full(len(dates), to_float(fallback))
+    if earnings is None or getattr(earnings, "empty", True) or "EPS" not in earnings:
+        return eps
 
-def get_cash_and_equivalents(balance_sheet):
-    """Get cash and cash equivalents from balance sheet."""
     try:
-        return balance_sheet.get('Cash And Cash Equivalents', None)
-    except:
+        periods = tz_naive_index(pd.to_datetime(earnings.index))
+    except (TypeError, ValueError):
+        return eps
+    reported = pd.Series(earnings["EPS"].to_numpy(dtype=float), index=periods).sort_index()
+    positions = reported.index.searchsorted(dates, side="right") - 1
+    known = positions >= 0
+    eps[known] = reported.to_numpy()[positions[known]]
+    return eps
+
+def to_float(value):
+    """Convert an optional number to a float, mapping None to NaN."""
+    try:
+        return float(value) if value is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+def nonzero(values):
+    """Mask of values that are present and non-zero."""
+    values = np.asarray(values, dtype=float)
+    return ~np.isnan(values) & (values != 0)
+
+def safe_divide(numerator, denominator, mask):
+    """Element-wise division where ``mask`` holds, NaN elsewhere."""
+    numerator, denominator = np.broadcast_arrays(np.asarray(numerator, dtype=float),
+                                                 np.asarray(denominator, dtype=float))
+    result = np.full(numerator.shape, np.nan)
+    np.divide(numerator, denominator, out=result, where=np.asarray(mask) & (denominator != 0))
+    return result
+
+def to_json_value(value):
+    """Convert a NumPy scalar to a JSON-serializable value, mapping NaN to None."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
         return None
+    return value.item() if isinstance(value, np.generic) else value
+
+def frame_to_records(frame):
+    """Convert a ratio frame to ``{date: {column: value}}`` with NaN as None."""
+    columns = list(frame.columns)
+    # tolist() yields native Python numbers; NaN is the only value not equal to itself
+    values = [[None if value != value else value for value in frame[column].tolist()] for column in columns]
+    return {date: dict(zip(columns, row)) for date, row in zip(frame.index, zip(*values))}
+
+def frame_to_columns(frame):
+    """Convert a date-indexed frame to ``{"dates": [...], column: [...]}`` with NaN as None."""
+    columns = {"dates": frame.index.tolist()}
+    for column in frame.columns:
+        columns[column] = [None if value != value else value for value in frame[column].tolist()]
+    return columns
 
 # Additional ratio functions
 
@@ -342,155 +536,308 @@ def get_market_ratios(data):
         "Short Ratio": data.get("shortRatio"),
     }
     
+# Maximum number of companies fetched concurrently by /detailed_comparison
+COMPARISON_WORKERS = 8
+
 @app.route("/detailed_comparison", methods=["POST"])
+@response_cache.cached(*PRICE_RESPONSE_TTL)
 def detailed_comparison():
     """
     Compare detailed financial ratios for multiple companies over a specified duration.
     Takes a list of company ticker symbols and a duration parameter.
-    Returns comprehensive comparative financial data in JSON format.
+    Returns comprehensive comparative financial data in JSON format, with the
+    daily series in columnar form when format=columnar.
     """
     try:
         body = request.get_json()
         companies = body.get('companies', [])
         duration = body.get('duration', '1y')
+        columnar = wants_columnar(body)
         
         # Validate input
         if not companies:
             return jsonify({"error": "No companies provided"}), 400
-            
-        # Initialize results container
+        companies = list(dict.fromkeys(companies))
+        
+        # Fetch and compute every company concurrently
+        frames = {}
         comparison_results = {
             "duration": duration,
             "companies": {},
             "comparison_summary": {}
         }
+        with ThreadPoolExecutor(max_workers=min(COMPARISON_WORKERS, len(companies))) as executor:
+            futures = {company: executor.submit(calculate_ratio_frame, company, duration) for company in companies}
+            for company, future in futures.items():
+                try:
+                    frame, info = future.result()
+                except Exception as e:
+                    return jsonify({"error": f"Error processing {company}: {e}"}), 500
+                comparison_results["companies"][company] = valuation_results(company, duration, frame, info, columnar)
+                if frame is not None:
+                    frames[company] = frame
         
-        # For each company, calculate the valuation ratios
-        for company in companies:
-            # Create a mock request body for the get_valuation_ratios function
-            mock_request_body = {
-                'company': company,
-                'duration': duration
-            }
-            
-            # Get valuation ratios by leveraging the existing function
-            # We'll simulate the request context to reuse the function
-            with app.test_request_context(json=mock_request_body):
-                # Call the function directly rather than through the route
-                valuation_response = get_valuation_ratios()
-                
-                # Convert response to dict if it's a Response object
-                if isinstance(valuation_response, tuple):
-                    # Error occurred in the function
-                    return jsonify({"error": f"Error processing {company}: {valuation_response[0].json}"}), 500
-                
-                if hasattr(valuation_response, 'json'):
-                    valuation_data = valuation_response.json
-                else:
-                    valuation_data = json.loads(valuation_response.data)
-                
-                # Store the results for this company
-                comparison_results["companies"][company] = valuation_data
-        
-        # Generate comparison summary for current ratios
-        ratio_categories = [
-            # Valuation ratios
-            "P/E Ratio", "P/S Ratio", "P/B Ratio", "EV/Revenue", "EV/EBITDA",
-            # Profitability ratios
-            "Profit Margin", "Gross Margin", "Return on Assets (ROA)", "Return on Equity (ROE)",
-            # Leverage ratios
-            "Debt-to-Equity", "Debt-to-Assets",
-            # Liquidity ratios
-            "Current Ratio", "Quick Ratio",
-            # Dividend ratios
-            "Dividend Rate", "Dividend Yield", "Payout Ratio",
-            # Market ratios
-            "Beta", "Short Ratio"
-        ]
-        
-        # For each ratio, find the min, max, and average across companies
-        for ratio in ratio_categories:
-            ratio_values = []
-            company_ratios = {}
-            
-            for company, data in comparison_results["companies"].items():
-                if "current_ratios" in data and ratio in data["current_ratios"]:
-                    ratio_value = data["current_ratios"][ratio]
-                    if ratio_value is not None:
-                        ratio_values.append(ratio_value)
-                        company_ratios[company] = ratio_value
-            
-            if ratio_values:
-                comparison_results["comparison_summary"][ratio] = {
-                    "min": min(ratio_values),
-                    "max": max(ratio_values),
-                    "avg": sum(ratio_values) / len(ratio_values),
-                    "by_company": company_ratios,
-                    # Find companies with min and max values
-                    "min_company": min(company_ratios.items(), key=lambda x: x[1])[0] if company_ratios else None,
-                    "max_company": max(company_ratios.items(), key=lambda x: x[1])[0] if company_ratios else None
-                }
-        
-        # Add time series comparison for stock price trends
-        comparison_results["price_trends"] = {}
-        
-        # Collect all dates from all companies
-        all_dates = set()
-        for company, data in comparison_results["companies"].items():
-            if "time_series_ratios" in data:
-                all_dates.update(data["time_series_ratios"].keys())
-        
-        # For each date, collect stock prices from all companies
-        for date in sorted(all_dates):
-            comparison_results["price_trends"][date] = {}
-            for company, data in comparison_results["companies"].items():
-                if "time_series_ratios" in data and date in data["time_series_ratios"]:
-                    stock_price = data["time_series_ratios"][date].get("Stock Price")
-                    if stock_price is not None:
-                        comparison_results["price_trends"][date][company] = stock_price
-        
+        comparison_results["comparison_summary"] = comparison_summary(comparison_results["companies"])
+        comparison_results["price_trends"] = price_trends(frames, columnar)
         return jsonify(comparison_results)
     
     except Exception as e:
         return jsonify({"error": str(e), "traceback": traceback.format_exc()}), 500
 
+def comparison_summary(company_results):
+    """Min, max and average of each current ratio across companies, with the companies holding the extremes."""
+    current = pd.DataFrame(
+        {company: data["current_ratios"] for company, data in company_results.items()}
+    ).T.reindex(columns=RATIO_NAMES).astype(float)
+    
+    summary = {}
+    for ratio in RATIO_NAMES:
+        values = current[ratio].dropna()
+        if values.empty:
+            continue
+        summary[ratio] = {
+            "min": values.min(),
+            "max": values.max(),
+            "avg": values.mean(),
+            "by_company": values.to_dict(),
+            "min_company": values.idxmin(),
+            "max_company": values.idxmax()
+        }
+    return summary
+
+def price_trends(frames, columnar=False):
+    """Stock price of each company by date, from an outer join of the companies' ratio frames."""
+    if not frames:
+        return {}
+    prices = pd.concat({company: frame["Stock Price"] for company, frame in frames.items()}, axis=1).sort_index()
+    if columnar:
+        return frame_to_columns(prices)
+    # NaN (no price for the company on that date) is the only value not equal to itself
+    return {date: {company: price for company, price in row.items() if price == price}
+            for date, row in prices.to_dict(orient="index").items()}
+
+
+# Sector keys known to Yahoo Finance, kept warm by the background snapshot job
+SECTOR_KEYS = [
+    "basic-materials", "communication-services", "consumer-cyclical", "consumer-defensive",
+    "energy", "financial-services", "healthcare", "industrials", "real-estate",
+    "technology", "utilities"
+]
+SECTOR_REFRESH_SECONDS = int(os.getenv("SECTOR_REFRESH_SECONDS", 6 * 3600))
+
+class SectorSnapshots:
+    """
+    Snapshots of yf.Sector data (sector info and top companies) per sector key.
+
+    A background thread refreshes every known sector on a schedule, so the
+    sector endpoints are served from memory. A sector missing from the
+    snapshot, or whose snapshot is more than two refresh intervals old because
+    refreshing failed, is fetched live and stored. Each sector has a refresh
+    lock, so concurrent misses and the background thread share one fetch per
+    sector instead of each calling Yahoo. Only the known sector keys are
+    served, so the snapshots stay bounded.
+    """
+
+    def __init__(self, sector_keys, refresh_seconds):
+        self.sector_keys = list(sector_keys)
+        self.refresh_seconds = refresh_seconds
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self._refresh_locks = {sector_key: threading.Lock() for sector_key in self.sector_keys}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self, sector_key):
+        """Get the snapshot of a known sector and its age in seconds."""
+        if sector_key not in self.sector_keys:
+            raise KeyError(f"Unknown sector {sector_key!r}")
+        snapshot = self._usable(sector_key)
+        if snapshot is None:
+            with self._refresh_locks[sector_key]:
+                # Another request or the background thread may have refreshed it while we waited
+                snapshot = self._usable(sector_key) or self._fetch(sector_key)
+        return snapshot, time.time() - snapshot["fetched_at"]
+
+    def _usable(self, sector_key):
+        """The stored snapshot of a sector, unless it is missing or too old to serve."""
+        with self._lock:
+            snapshot = self._snapshots.get(sector_key)
+        if snapshot is None or time.time() - snapshot["fetched_at"] > 2 * self.refresh_seconds:
+            return None
+        return snapshot
+
+    def refresh(self, sector_key):
+        """Fetch a sector from Yahoo Finance and store its snapshot."""
+        with self._refresh_locks[sector_key]:
+            return self._fetch(sector_key)
+
+    def _fetch(self, sector_key):
+        sector = yf.Sector(key=sector_key)
+        companies_df = sector.top_companies[:10].reset_index()  # symbol becomes a column
+        companies_df = companies_df.rename(columns={"market weight": "market_weight"})
+        snapshot = {
+            "info": sector.ticker.info,
+            "top_companies": json.loads(companies_df.to_json(orient='records')),
+            "fetched_at": time.time()
+        }
+        with self._lock:
+            self._snapshots[sector_key] = snapshot
+        return snapshot
+
+    def refresh_all(self):
+        """Refresh the snapshot of every known sector."""
+        for sector_key in self.sector_keys:
+            if self._stop.is_set():
+                return
+            try:
+                self.refresh(sector_key)
+            except Exception as e:
+                print(f"Error refreshing sector snapshot for {sector_key}: {e}")
+
+    def start(self):
+        """Start the background refresh thread (once)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="sector-snapshots", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background refresh thread."""
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh_all()
+            self._stop.wait(self.refresh_seconds)
+
+    def status(self):
+        """Age in seconds of each sector snapshot (None if not fetched yet)."""
+        now = time.time()
+        with self._lock:
+            return {
+                sector_key: now - self._snapshots[sector_key]["fetched_at"] if sector_key in self._snapshots else None
+                for sector_key in dict.fromkeys(self.sector_keys + list(self._snapshots))
+            }
+
+sector_snapshots = SectorSnapshots(SECTOR_KEYS, SECTOR_REFRESH_SECONDS)
+# Warm the snapshots as soon as the app is set up rather than on the first request
+if os.getenv("SECTOR_SNAPSHOTS", "true").lower() not in ("0", "false", "no"):
+    sector_snapshots.start()
+
+def snapshot_response(payload, age):
+    """JSON response carrying the age of the snapshot it was served from."""
+    response = jsonify(payload)
+    response.headers["X-Snapshot-Age"] = str(int(age))
+    return response
 
 @app.route('/top_companies_sector',methods=["POST"])
+@response_cache.cached(*PRICE_RESPONSE_TTL)
 def top_industrials():
-    body = request.get_json()
-    industry = body.get("sector")
-    data = yf.Sector(key=industry)
-    companies_df = data.top_companies[:10].reset_index()  # symbol becomes a column
-    companies_df = companies_df.rename(columns={"market weight": "market_weight"})
-    # Convert to list of dicts
-    companies = json.loads(companies_df.to_json(orient='records'))
-    #print(companies)
-    enriched_data = []
-
-    for company in companies:
-        symbol = company['symbol']
-        ticker_info = yf.Ticker(symbol).info
-
-        current_price = ticker_info.get('currentPrice')
-        previous_close = ticker_info.get('previousClose')
-        pe_ratio = ticker_info.get('trailingPE')
+    try:
+        body = request.get_json()
+        industry = body.get("sector")
+
+        if not industry:
+            return jsonify({"error": "Sector 'key' is required in JSON body"}), 400
+        if industry not in SECTOR_KEYS:
+            return jsonify({"error": f"Unknown sector {industry!r}, expected one of {SECTOR_KEYS}"}), 400
+
+        snapshot, age = sector_snapshots.get(industry)
+        companies = [dict(company) for company in snapshot["top_companies"]]
+
+        # One quote request for all companies instead of an info call per symbol
+        quotes = get_quotes([company['symbol'] for company in companies])
+        for company in companies:
+            company.update(quotes[company['symbol']])
+
+        response = snapshot_response(companies, age)
+        # Companies without a quote get None placeholders, which must not be cached
+        if any(quote["stock_price"] is None for quote in quotes.values()):
+            return fallback_response(response)
+        return response
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/sector_snapshots', methods=['GET'])
+def get_sector_snapshots():
+    """Age in seconds of every sector snapshot."""
+    return jsonify({
+        "refresh_seconds": sector_snapshots.refresh_seconds,
+        "age_seconds": sector_snapshots.status()
+    })
+
+# Seconds a batched quote stays fresh
+QUOTE_TTL_SECONDS = 60
+# Yahoo Finance quote endpoint, which takes a comma-separated list of symbols
+YAHOO_QUOTE_URL = "https://query1.finance.yahoo.com/v7/finance/quote"
+
+_quote_cache = {}  # symbol -> (fetched_at, quote)
+_quote_cache_lock = threading.Lock()
+
+def get_quotes(symbols):
+    """
+    Get the price, percent change and trailing P/E of many symbols.
+
+    Quotes are cached for QUOTE_TTL_SECONDS; all symbols missing from the
+    cache are fetched together in one quote request.
+
+    Returns:
+        Dictionary mapping each symbol to its ``stock_price``, ``percent_change``
+        and ``pe_ratio`` (None when unavailable)
+    """
+    now = time.monotonic()
+    quotes, missing = {}, []
+    with _quote_cache_lock:
+        for symbol in dict.fromkeys(symbols):
+            cached = _quote_cache.get(symbol)
+            if cached is not None and now - cached[0] < QUOTE_TTL_SECONDS:
+                quotes[symbol] = cached[1]
+            else:
+                missing.append(symbol)
+
+    if missing:
+        fetched = fetch_quotes(missing)
+        with _quote_cache_lock:
+            for symbol, quote in fetched.items():
+                _quote_cache[symbol] = (now, quote)
+        # Symbols the upstream did not return are not cached so the next request retries them
+        for symbol in missing:
+            quotes[symbol] = fetched.get(symbol, {"stock_price": None, "percent_change": None, "pe_ratio": None})
+    return quotes
+
+def fetch_quotes(symbols):
+    """
+    Fetch the quotes of many symbols in one Yahoo Finance quote request.
+
+    The fields are the ones ``yf.Ticker(symbol).info`` takes from the same
+    endpoint: ``currentPrice`` (regularMarketPrice), ``previousClose`` and
+    ``trailingPE``. yfinance's request session supplies the cookie and crumb
+    the endpoint requires.
+    """
+    try:
+        data = YfData().get_raw_json(YAHOO_QUOTE_URL, params={"symbols": ",".join(symbols), "formatted": "false"})
+        results = data["quoteResponse"]["result"] or []
+    except Exception as e:
+        print(f"Error fetching quotes: {e}")
+        return {}
+
+    quotes = {}
+    for result in results:
+        current_price = result.get('regularMarketPrice')
+        previous_close = result.get('regularMarketPreviousClose')
 
         percent_change = None
         if current_price and previous_close:
-            try:
-                percent_change = round(((current_price - previous_close) / previous_close) * 100, 2)
-            except:
-                percent_change = None
+            percent_change = round(((current_price - previous_close) / previous_close) * 100, 2)
 
-        company.update({
+        quotes[result.get('symbol')] = {
             "stock_price": current_price,
             "percent_change": percent_change,
-            "pe_ratio": pe_ratio
-        })
-
-        enriched_data.append(company)
-
-    return jsonify(enriched_data)
+            "pe_ratio": result.get('trailingPE')
+        }
+    return quotes
 
 @app.route('/sector_info', methods=['POST'])
 def get_sector_info():
@@ -501,12 +848,13 @@ def get_sector_info():
 
         if not sector_key:
             return jsonify({"error": "Sector 'key' is required in JSON body"}), 400
+        if sector_key not in SECTOR_KEYS:
+            return jsonify({"error": f"Unknown sector {sector_key!r}, expected one of {SECTOR_KEYS}"}), 400
 
-        # Get sector info using yfinance
-        sector_data = yf.Sector(key=sector_key)
-        ticker_info = sector_data.ticker.info
+        # Served from the sector snapshot, fetched live only on a miss
+        snapshot, age = sector_snapshots.get(sector_key)
 
-        return jsonify(ticker_info)
+        return snapshot_response(snapshot["info"], age)
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -517,6 +865,7 @@ NEWS_API_KEY = os.getenv('NEWS_API_KEY')
 
 
 @app.route('/api/stock-market-headlines', methods=['GET'])
+@response_cache.cached(*HEADLINES_RESPONSE_TTL)
 def get_stock_market_headlines():
     try:
         # Get top headlines specifically about business/finance
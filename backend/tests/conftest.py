@@ -0,0 +1,45 @@
+"""
+Shared setup of the backend tests.
+
+yfinance and transformers are replaced by empty modules before the app is
+imported, and each test patches the yfinance entry points it exercises, so no
+test reaches Yahoo Finance or loads a model.
+"""
+import os
+import sys
+import types
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("HF_TOKEN", "")
+os.environ["SECTOR_SNAPSHOTS"] = "false"
+
+def _module(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    return module
+
+sys.modules["yfinance"] = _module("yfinance", Ticker=None, Sector=None)
+sys.modules["yfinance.data"] = _module("yfinance.data", YfData=None)
+sys.modules["transformers"] = _module("transformers", pipeline=None)
+
+import app as backend  # noqa: E402
+
+class ImmediateExecutor:
+    """Executor running submitted work in the calling thread, so refreshes finish before asserts."""
+
+    def submit(self, fn, *args, **kwargs):
+        fn(*args, **kwargs)
+
+@pytest.fixture
+def app_module(monkeypatch):
+    """The backend app module with empty caches and synchronous background refreshes."""
+    backend.response_cache._entries.clear()
+    backend._quote_cache.clear()
+    backend.sector_snapshots._snapshots.clear()
+    monkeypatch.setattr(backend.response_cache, "_executor", ImmediateExecutor())
+    return backend
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
@@ -0,0 +1,189 @@
+import threading
+import time
+import types
+import numpy as np
+import pandas as pd
+import pytest
+
+def price_history(dates, closes):
+    """OHLCV history with the given closes on exchange-local dates"""
+    index = pd.DatetimeIndex(pd.to_datetime(dates), name="Date").tz_localize("America/New_York")
+    closes = np.asarray(closes, dtype=float)
+    return pd.DataFrame({"Open": closes, "High": closes + 1, "Low": closes - 1,
+                         "Close": closes, "Volume": np.full(len(closes), 1000)}, index=index)
+
+def statements():
+    """Annual income statement and balance sheet reported for 2023 and 2024"""
+    periods = pd.to_datetime(["2024-12-31", "2023-12-31"])
+    financials = pd.DataFrame({periods[0]: [200.0, 40.0], periods[1]: [100.0, 20.0]},
+                              index=["Total Revenue", "EBITDA"])
+    balance_sheet = pd.DataFrame({periods[0]: [2000.0, 1500.0, 200.0, 50.0],
+                                  periods[1]: [1000.0, 500.0, 100.0, 50.0]},
+                                 index=["Total Assets", "Total Liabilities Net Minority Interest",
+                                        "Total Debt", "Cash And Cash Equivalents"])
+    return financials, balance_sheet
+
+def make_ticker(closes=(10.0, 20.0, 30.0), on_history=None):
+    """Stand-in for yf.Ticker with fixed history, statements and info"""
+    financials, balance_sheet = statements()
+    history = price_history(["2023-12-29", "2024-06-03", "2024-12-31"], closes)
+
+    def get_history(period=None):
+        if on_history:
+            on_history()
+        return history
+
+    return types.SimpleNamespace(
+        history=get_history, financials=financials, balance_sheet=balance_sheet, earnings=None,
+        recommendations=None,
+        info={"sharesOutstanding": 10, "trailingEps": 1.0, "currentPrice": closes[-1], "profitMargins": 0.2})
+
+def test_asof_statement_takes_the_nearest_period(app_module):
+    """Test that each date gets the closest statement period, ties going to the later one"""
+    statement = pd.DataFrame({pd.Timestamp("2024-01-03"): [3.0], pd.Timestamp("2024-01-01"): [1.0]},
+                             index=["Total Revenue"])
+    dates = pd.DatetimeIndex(["2023-06-01", "2024-01-02", "2024-01-03", "2025-01-01"])
+
+    aligned = app_module.asof_statement(statement, dates, ["Total Revenue", "EBITDA"])
+
+    assert aligned["Total Revenue"].tolist() == [1.0, 3.0, 3.0, 3.0]
+    assert np.isnan(aligned["EBITDA"]).all()
+
+def test_trailing_eps_series_uses_the_latest_reported_period(app_module):
+    """Test that EPS changes on its report date and falls back to the trailing EPS before it"""
+    earnings = pd.DataFrame({"EPS": [3.0, 2.0]}, index=pd.to_datetime(["2024-09-30", "2024-03-31"]))
+    dates = pd.DatetimeIndex(["2024-01-02", "2024-03-31", "2024-10-01"])
+
+    assert app_module.trailing_eps_series(earnings, dates, 1.5).tolist() == [1.5, 2.0, 3.0]
+    assert app_module.trailing_eps_series(None, dates, 1.5).tolist() == [1.5, 1.5, 1.5]
+    assert np.isnan(app_module.trailing_eps_series(pd.DataFrame(), dates, None)).all()
+
+def test_build_ratio_frame_computes_every_date(app_module):
+    """Test the daily ratios against values worked out by hand"""
+    ticker = make_ticker()
+    earnings = pd.DataFrame({"EPS": [2.0]}, index=pd.to_datetime(["2024-03-31"]))
+
+    frame = app_module.build_ratio_frame(ticker.history(), ticker.financials, ticker.balance_sheet,
+                                         earnings, ticker.info)
+
+    assert frame.index.tolist() == ["2023-12-29", "2024-06-03", "2024-12-31"]
+    assert frame["P/E Ratio"].tolist() == [10.0, 10.0, 15.0]
+    assert frame["P/S Ratio"].tolist() == [1.0, 2.0, 1.5]
+    assert frame["P/B Ratio"].tolist() == pytest.approx([0.2, 0.4, 0.6])
+    assert frame["Debt-to-Assets"].tolist() == [0.1, 0.1, 0.1]
+    assert frame["Profit Margin"].tolist() == [0.2, 0.2, 0.2]
+    assert frame["Stock Price"].tolist() == [10.0, 20.0, 30.0]
+
+def test_detailed_comparison_fetches_companies_concurrently(app_module, client, monkeypatch):
+    """Test that each distinct company is fetched once, in parallel, and summarized"""
+    both_fetching = threading.Barrier(2, timeout=5)
+    fetched = []
+
+    def ticker(symbol):
+        fetched.append(symbol)
+        return make_ticker(closes=(10.0, 20.0, 30.0) if symbol == "AAA" else (20.0, 40.0, 60.0),
+                           on_history=both_fetching.wait)
+
+    monkeypatch.setattr(app_module.yf, "Ticker", ticker)
+    response = client.post("/detailed_comparison", json={"companies": ["AAA", "BBB", "AAA"]})
+
+    assert response.status_code == 200
+    assert sorted(fetched) == ["AAA", "BBB"]
+    body = response.get_json()
+    assert list(body["companies"]) == ["AAA", "BBB"]
+    assert body["comparison_summary"]["P/E Ratio"]["min_company"] == "AAA"
+    assert body["price_trends"]["2024-12-31"] == {"AAA": 30.0, "BBB": 60.0}
+
+def test_get_quotes_batches_missing_symbols_and_caches_them(app_module, monkeypatch):
+    """Test that uncached symbols share one request and only returned quotes are cached"""
+    requested = []
+
+    class YfData:
+        def get_raw_json(self, url, params=None):
+            requested.append(params["symbols"])
+            return {"quoteResponse": {"result": [
+                {"symbol": symbol, "regularMarketPrice": 110.0, "regularMarketPreviousClose": 100.0,
+                 "trailingPE": 20.0}
+                for symbol in params["symbols"].split(",") if symbol != "GONE"]}}
+
+    monkeypatch.setattr(app_module, "YfData", YfData)
+
+    quotes = app_module.get_quotes(["AAA", "GONE", "AAA", "BBB"])
+    assert requested == ["AAA,GONE,BBB"]
+    assert quotes["AAA"] == {"stock_price": 110.0, "percent_change": 10.0, "pe_ratio": 20.0}
+    assert quotes["GONE"]["stock_price"] is None
+
+    app_module.get_quotes(["BBB", "GONE", "AAA"])
+    assert requested == ["AAA,GONE,BBB", "GONE"]
+
+def fake_sector(calls, delay=0.0):
+    """Stand-in for yf.Sector recording the sectors fetched"""
+    def sector(key):
+        calls.append(key)
+        time.sleep(delay)
+        companies = pd.DataFrame({"name": ["Alpha"], "market weight": [1.0]},
+                                 index=pd.Index(["AAA"], name="symbol"))
+        return types.SimpleNamespace(ticker=types.SimpleNamespace(info={"name": key}), top_companies=companies)
+    return sector
+
+def test_unknown_sectors_are_rejected(app_module, client, monkeypatch):
+    """Test that sector keys outside SECTOR_KEYS get a 400 without reaching Yahoo Finance"""
+    calls = []
+    monkeypatch.setattr(app_module.yf, "Sector", fake_sector(calls))
+
+    for endpoint in ("/sector_info", "/top_companies_sector"):
+        response = client.post(endpoint, json={"sector": "not-a-sector"})
+        assert response.status_code == 400
+        assert "Unknown sector" in response.get_json()["error"]
+    assert calls == []
+    assert client.post("/sector_info", json={"sector": "technology"}).get_json() == {"name": "technology"}
+
+def test_concurrent_sector_misses_share_one_refresh(app_module, monkeypatch):
+    """Test that requests missing the same sector snapshot wait for a single fetch"""
+    calls = []
+    monkeypatch.setattr(app_module.yf, "Sector", fake_sector(calls, delay=0.2))
+
+    threads = [threading.Thread(target=app_module.sector_snapshots.get, args=("energy",)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["energy"]
+
+def test_stale_while_revalidate_states(app_module, client, monkeypatch):
+    """Test MISS, HIT, STALE with a background refresh, and MISS past the staleness bound"""
+    closes = iter([(10.0, 20.0, 30.0), (10.0, 20.0, 31.0), (10.0, 20.0, 32.0)])
+    monkeypatch.setattr(app_module.yf, "Ticker", lambda symbol: make_ticker(closes=next(closes)))
+    fresh_seconds, max_stale_seconds = app_module.PRICE_RESPONSE_TTL
+
+    def request():
+        response = client.post("/stock_history", json={"company": "AAA"})
+        return response.headers["X-Cache"], response.get_json()["data"][-1]["Close"]
+
+    def age_entries(seconds):
+        for entry in app_module.response_cache._entries.values():
+            entry["cached_at"] -= seconds
+
+    assert request() == ("MISS", 30.0)
+    assert request() == ("HIT", 30.0)
+
+    age_entries(fresh_seconds + 1)
+    assert request() == ("STALE", 30.0)  # refreshed in the background
+    assert request() == ("HIT", 31.0)
+
+    age_entries(max_stale_seconds + 1)
+    assert request() == ("MISS", 32.0)
+
+def test_not_modified_only_for_get_and_head(app_module, client, monkeypatch):
+    """Test that a matching If-None-Match is answered with 304 for GET and HEAD, not POST"""
+    monkeypatch.setattr(app_module.yf, "Sector", fake_sector([]))
+
+    etag = client.get("/sector_snapshots").headers["ETag"]
+    assert client.get("/sector_snapshots", headers={"If-None-Match": etag}).status_code == 304
+    assert client.head("/sector_snapshots", headers={"If-None-Match": etag}).status_code == 304
+
+    etag = client.post("/sector_info", json={"sector": "energy"}).headers["ETag"]
+    response = client.post("/sector_info", json={"sector": "energy"}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.get_json() == {"name": "energy"}